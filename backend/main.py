@@ -1,16 +1,35 @@
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from typing import List
+from contextlib import asynccontextmanager
 import asyncio
 import json
 import os
-from datetime import datetime
 
 from services.price_service import PriceService
 from services.signal_service_ict import ICTSignalService
+from services.analysis_executor import AnalysisExecutor
+from services.signal_engine import SignalEngine
+from services.broadcast_hub import BroadcastHub
+from services.indicators import TechnicalIndicators
+from services.divergence import scan_divergences
+from services.signal_stability import MultiTimeframeAnalyzer
 from models.signal import SignalResponse
 
-app = FastAPI(title="Crypto Futures Signals Bot")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Open pooled exchange connections on startup and release them on shutdown"""
+    await price_service.start()
+    analysis_executor.start()
+    try:
+        yield
+    finally:
+        await signal_engine.stop()
+        analysis_executor.shutdown()
+        await price_service.close()
+
+app = FastAPI(title="Crypto Futures Signals Bot", lifespan=lifespan)
 
 # CORS middleware for React frontend
 
@@ -37,29 +56,48 @@ app.add_middleware(
 )
 
 # Initialize services
-price_service = PriceService()
-signal_service = ICTSignalService(price_service)  # ICT-Only signal service
+# INDICATOR_BACKEND: "numpy" (vectorized kernels) or "ta" (ta library objects)
+TechnicalIndicators.set_backend(os.getenv("INDICATOR_BACKEND", "numpy"))
 
-# WebSocket connection manager
-class ConnectionManager:
-    def __init__(self):
-        self.active_connections: List[WebSocket] = []
-
-    async def connect(self, websocket: WebSocket):
-        await websocket.accept()
-        self.active_connections.append(websocket)
+# EXCHANGE_BACKEND: "async" (pooled ccxt.async_support client) or "thread" (sync ccxt in worker threads)
+price_service = PriceService(
+    backend=os.getenv("EXCHANGE_BACKEND", "async"),
+    pool_size=int(os.getenv("EXCHANGE_POOL_SIZE", 100)),
+    cache_ttl=float(os.getenv("PRICE_CACHE_TTL", 2.0)),
+    # MTF confirmation timeframes are resampled from the base timeframe's history
+    resample_targets=MultiTimeframeAnalyzer.TIMEFRAME_HIERARCHY
+)
+# ANALYSIS_EXECUTOR: "process" (worker pool, uses all cores), "thread" or "inline"
+analysis_executor = AnalysisExecutor(
+    mode=os.getenv("ANALYSIS_EXECUTOR", "thread"),
+    max_workers=int(os.getenv("ANALYSIS_WORKERS", 0)) or None,
+    timeout=float(os.getenv("ANALYSIS_TIMEOUT", 10.0))
+)
+signal_service = ICTSignalService(  # ICT-Only signal service
+    price_service,
+    mtf_deadline=float(os.getenv("MTF_DEADLINE", 5.0)),
+    executor=analysis_executor
+)
 
-    def disconnect(self, websocket: WebSocket):
-        self.active_connections.remove(websocket)
+# Background engine: one signal computation per (symbol, timeframe) shared by all websocket clients
+# Pending setups wait on a shared ticker poll instead of recomputing every interval
+signal_engine = SignalEngine(
+    signal_service,
+    publish=lambda stream, message: manager.broadcast(message, topic=stream),
+    interval=float(os.getenv("SIGNAL_INTERVAL", 30)),
+    watch_interval=float(os.getenv("SIGNAL_WATCH_INTERVAL", 2.0)),
+    watch_max_age=float(os.getenv("SIGNAL_WATCH_MAX_AGE", 300))
+)
 
-    async def broadcast(self, message: dict):
-        for connection in self.active_connections:
-            try:
-                await connection.send_json(message)
-            except:
-                pass
+# Max signals generated at once across all multi-symbol requests
+multi_signal_semaphore = asyncio.Semaphore(int(os.getenv("MULTI_SIGNAL_CONCURRENCY", 8)))
 
-manager = ConnectionManager()
+# WebSocket broadcast hub: per-client bounded queues and writer tasks
+# WS_OVERFLOW_POLICY: "drop_oldest" or "disconnect" when a client's queue is full
+manager = BroadcastHub(
+    max_queue=int(os.getenv("WS_QUEUE_SIZE", 16)),
+    overflow_policy=os.getenv("WS_OVERFLOW_POLICY", "drop_oldest")
+)
 
 @app.get("/")
 async def root():
@@ -83,24 +121,123 @@ async def get_signal(symbol: str, timeframe: str = "15m"):
     signal = await signal_service.generate_signal(symbol.replace("-", "/"), timeframe)
     return signal
 
-@app.get("/api/signals/multi/{symbols}")
-async def get_multi_signals(symbols: str, timeframe: str = "15m"):
-    """Get trading signals for multiple symbols (comma-separated)"""
-    symbol_list = [s.strip().replace("-", "/") for s in symbols.split(",")]
-    signals = []
-    
-    for symbol in symbol_list:
+def parse_symbol_list(symbols: str) -> List[str]:
+    """Split a comma-separated symbol list (BTC-USDT,ETH-USDT) into ccxt symbols"""
+    return [s.strip().replace("-", "/") for s in symbols.split(",") if s.strip()]
+
+async def prefetch_prices(symbol_list: List[str]):
+    """Warm the ticker cache for a symbol list with one batched exchange call"""
+    try:
+        await price_service.get_current_prices(symbol_list)
+    except Exception as e:
+        # Each signal falls back to its own ticker request
+        print(f"Batch ticker fetch failed: {str(e)}")
+
+async def generate_signal_safe(symbol: str, timeframe: str) -> dict:
+    """Generate one signal under the shared concurrency limit, reporting errors inline"""
+    async with multi_signal_semaphore:
         try:
             signal = await signal_service.generate_signal(symbol, timeframe)
-            signals.append(signal.model_dump())
+            return signal.model_dump()
         except Exception as e:
-            signals.append({
+            return {
                 "symbol": symbol,
                 "error": str(e),
                 "timeframe": timeframe
-            })
+            }
+
+@app.get("/api/signals/multi/{symbols}")
+async def get_multi_signals(symbols: str, timeframe: str = "15m"):
+    """Get trading signals for multiple symbols (comma-separated)"""
+    symbol_list = parse_symbol_list(symbols)
+    await prefetch_prices(symbol_list)
     
-    return {"signals": signals, "count": len(signals)}
+    signals = await asyncio.gather(*[
+        generate_signal_safe(symbol, timeframe) for symbol in symbol_list
+    ])
+    
+    return {"signals": list(signals), "count": len(signals)}
+
+@app.get("/api/signals/multi/{symbols}/stream")
+async def stream_multi_signals(symbols: str, timeframe: str = "15m"):
+    """
+    Stream trading signals for multiple symbols as NDJSON
+    
+    One JSON object per line, emitted as soon as each symbol's signal is ready
+    (completion order, not request order).
+    """
+    symbol_list = parse_symbol_list(symbols)
+    
+    async def signal_lines():
+        await prefetch_prices(symbol_list)
+        tasks = [
+            asyncio.create_task(generate_signal_safe(symbol, timeframe))
+            for symbol in symbol_list
+        ]
+        try:
+            for next_signal in asyncio.as_completed(tasks):
+                signal = await next_signal
+                yield json.dumps(signal, default=str) + "\n"
+        finally:
+            # Client went away - stop the remaining work
+            for task in tasks:
+                task.cancel()
+    
+    return StreamingResponse(signal_lines(), media_type="application/x-ndjson")
+
+async def fetch_candle_frames(symbol_list: List[str], timeframe: str, limit: int):
+    """Fetch OHLCV frames concurrently; returns (frames, errors) keyed by symbol"""
+    async def fetch_candles(symbol: str):
+        async with multi_signal_semaphore:
+            return await price_service.get_ohlcv_df(symbol, timeframe, limit)
+    
+    results = await asyncio.gather(
+        *[fetch_candles(symbol) for symbol in symbol_list],
+        return_exceptions=True
+    )
+    
+    frames, errors = {}, {}
+    for symbol, result in zip(symbol_list, results):
+        if isinstance(result, Exception):
+            errors[symbol] = str(result)
+        else:
+            frames[symbol] = result
+    return frames, errors
+
+@app.get("/api/indicators/multi/{symbols}")
+async def get_multi_indicators(symbols: str, timeframe: str = "15m", limit: int = 200):
+    """
+    Indicator screener for multiple symbols (comma-separated)
+    
+    Candles are fetched concurrently, then every symbol's indicators are
+    computed in one vectorized pass over a (symbols x candles) block.
+    """
+    frames, errors = await fetch_candle_frames(parse_symbol_list(symbols), timeframe, limit)
+    
+    table = await analysis_executor.run(TechnicalIndicators.calculate_batch, frames, limit)
+    table = table.astype(object).where(table.notna(), None)  # NaN is not valid JSON
+    
+    return {
+        "indicators": table.to_dict(orient="index"),
+        "errors": errors,
+        "count": len(table)
+    }
+
+@app.get("/api/divergences/multi/{symbols}")
+async def get_multi_divergences(symbols: str, timeframe: str = "15m", limit: int = 200, lookback: int = 10):
+    """
+    Divergence scanner: RSI/MACD divergences completed in the last `lookback`
+    candles for multiple symbols (comma-separated)
+    """
+    frames, errors = await fetch_candle_frames(parse_symbol_list(symbols), timeframe, limit)
+    
+    divergences = await analysis_executor.run(scan_divergences, frames, lookback)
+    
+    return {
+        "divergences": divergences,
+        "errors": errors,
+        "count": len(divergences)
+    }
 
 @app.get("/api/ohlcv/{symbol}")
 async def get_ohlcv(symbol: str, timeframe: str = "15m", limit: int = 100):
@@ -111,54 +248,38 @@ async def get_ohlcv(symbol: str, timeframe: str = "15m", limit: int = 100):
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
     """WebSocket endpoint for real-time ICT signal updates"""
-    await manager.connect(websocket)
+    # Read query params for symbol/timeframe
+    params = websocket.query_params
+    symbol = params.get("symbol", "BTC/USDT")
+    timeframe = params.get("timeframe", "15m")
+    
+    # Updates arrive through the hub from the shared engine stream
+    connection = await manager.connect(websocket, topic=(symbol, timeframe))
+    signal_engine.subscribe(symbol, timeframe)
     try:
         # Send initial data
-        await websocket.send_json({
+        manager.send(connection, {
             "type": "connected",
             "message": "Connected to ICT signals stream"
         })
+        latest = signal_engine.latest(symbol, timeframe)
+        if latest:
+            manager.send(connection, latest)
         
-        # Keep sending updates
+        # Keep reading so a disconnect is noticed right away (client messages are ignored)
         while True:
-            try:
-                # Read query params for symbol/timeframe
-                params = websocket.query_params
-                symbol = params.get("symbol", "BTC/USDT")
-                timeframe = params.get("timeframe", "15m")
-
-                # Generate ICT signal
-                signal = await signal_service.generate_signal(symbol, timeframe)
-                
-                await websocket.send_json({
-                    "type": "signal_update",
-                    "data": signal.model_dump(),
-                    "timestamp": datetime.now().isoformat()
-                })
-                
-                # Wait 30 seconds before next update
-                await asyncio.sleep(30)
-                
-            except WebSocketDisconnect:
-                # Client disconnected, break out of loop
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
                 break
-            except Exception as e:
-                # Log error but don't try to send if disconnected
-                print(f"WebSocket error: {str(e)}")
-                try:
-                    await websocket.send_json({
-                        "type": "error",
-                        "message": str(e)
-                    })
-                except:
-                    # If we can't send, connection is likely dead
-                    break
-                await asyncio.sleep(30)
-                
+            
     except WebSocketDisconnect:
         pass
+    except Exception as e:
+        # Connection was closed by the hub or is otherwise dead
+        print(f"WebSocket error: {str(e)}")
     finally:
-        manager.disconnect(websocket)
+        signal_engine.unsubscribe(symbol, timeframe)
+        manager.disconnect(connection)
 
 if __name__ == "__main__":
     import uvicorn
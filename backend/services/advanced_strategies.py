@@ -5,37 +5,37 @@ Enhanced confluences for higher accuracy trades
 from typing import Dict, List, Tuple
 import pandas as pd
 import numpy as np
+from services.indicators import LazyIndicators, requires_indicators
+from services.divergence import MIN_DIVERGENCE_CANDLES, find_divergences, recent_divergence_flags
+from services.swing_index import SwingIndex
 
 
 class AdvancedStrategies:
     """Advanced trading strategies with multiple confirmation layers"""
     
     @staticmethod
-    def detect_support_resistance(df: pd.DataFrame, indicators: Dict[str, float]) -> Tuple[List[float], List[float]]:
+    @requires_indicators('ema_50', 'bb_upper', 'bb_lower')
+    def detect_support_resistance(
+        df: pd.DataFrame, indicators: Dict[str, float], lookback: int = 50
+    ) -> Tuple[List[float], List[float]]:
         """
         Detect key support and resistance levels using multiple methods
         """
+        if len(df) < 50:
+            return [], []
+        
+        return AdvancedStrategies._support_resistance(SwingIndex.for_frame(df), indicators, lookback)
+    
+    @staticmethod
+    def _support_resistance(
+        swings: SwingIndex, indicators: Dict[str, float], lookback: int = 50
+    ) -> Tuple[List[float], List[float]]:
         support_levels = []
         resistance_levels = []
         
-        if len(df) < 50:
-            return support_levels, resistance_levels
-        
         # Method 1: Recent swing highs/lows
-        highs = df['high'].tail(50)
-        lows = df['low'].tail(50)
-        
-        # Find local peaks and troughs
-        for i in range(2, len(highs) - 2):
-            # Resistance - local peak
-            if highs.iloc[i] > highs.iloc[i-1] and highs.iloc[i] > highs.iloc[i-2] and \
-               highs.iloc[i] > highs.iloc[i+1] and highs.iloc[i] > highs.iloc[i+2]:
-                resistance_levels.append(highs.iloc[i])
-            
-            # Support - local trough
-            if lows.iloc[i] < lows.iloc[i-1] and lows.iloc[i] < lows.iloc[i-2] and \
-               lows.iloc[i] < lows.iloc[i+1] and lows.iloc[i] < lows.iloc[i+2]:
-                support_levels.append(lows.iloc[i])
+        resistance_levels.extend(swings.swing_highs(lookback)[1])
+        support_levels.extend(swings.swing_lows(lookback)[1])
         
         # Method 2: EMA levels as dynamic S/R
         support_levels.append(indicators.get('ema_50', 0))
@@ -107,6 +107,7 @@ class AdvancedStrategies:
         return patterns
     
     @staticmethod
+    @requires_indicators('adx', 'ema_9', 'ema_21', 'ema_50', 'volume_ratio')
     def calculate_trend_strength(df: pd.DataFrame, indicators: Dict[str, float]) -> float:
         """
         Calculate trend strength score (0-100)
@@ -150,39 +151,46 @@ class AdvancedStrategies:
         return min(100, max(0, score))
     
     @staticmethod
-    def detect_divergence(df: pd.DataFrame, indicators: Dict[str, float]) -> Dict[str, bool]:
+    def detect_divergence(df: pd.DataFrame, indicators: Dict[str, float], lookback: int = 10) -> Dict[str, bool]:
         """
         Detect RSI and MACD divergences
+        
+        Compares consecutive swing pivots in price with the RSI / MACD line at
+        the same candles and reports the divergences completed within the last
+        `lookback` candles. `indicators` may be a LazyIndicators whose full
+        series are reused; otherwise the series are computed from `df`.
+        Frames shorter than MIN_DIVERGENCE_CANDLES report no divergences.
         """
         divergences = {
             'rsi_bullish': False,
             'rsi_bearish': False,
             'macd_bullish': False,
-            'macd_bearish': False
+            'macd_bearish': False,
+            'rsi_hidden_bullish': False,
+            'rsi_hidden_bearish': False,
+            'macd_hidden_bullish': False,
+            'macd_hidden_bearish': False
         }
         
-        if len(df) < 20:
+        if len(df) < MIN_DIVERGENCE_CANDLES:
             return divergences
         
-        # This is a simplified version - full divergence detection requires storing indicator history
-        # For now, we'll check if price and RSI are moving in opposite directions
-        
-        recent_prices = df['close'].tail(10).values
-        if len(recent_prices) >= 10:
-            price_trend = recent_prices[-1] - recent_prices[0]
-            
-            # If price is falling but RSI is not extremely oversold, might be bullish divergence
-            rsi = indicators.get('rsi', 50)
-            if price_trend < 0 and rsi > 35 and rsi < 50:
-                divergences['rsi_bullish'] = True
-            
-            # If price is rising but RSI is not extremely overbought, might be bearish divergence
-            if price_trend > 0 and rsi < 65 and rsi > 50:
-                divergences['rsi_bearish'] = True
+        series = indicators if isinstance(indicators, LazyIndicators) else LazyIndicators(df)
+        low = df['low'].to_numpy(dtype=np.float64)
+        high = df['high'].to_numpy(dtype=np.float64)
+        
+        for name in ('rsi', 'macd'):
+            found = find_divergences(low, high, series.series(name))
+            flags = recent_divergence_flags(found, len(df), lookback)
+            divergences[f'{name}_bullish'] = flags['regular_bullish']
+            divergences[f'{name}_bearish'] = flags['regular_bearish']
+            divergences[f'{name}_hidden_bullish'] = flags['hidden_bullish']
+            divergences[f'{name}_hidden_bearish'] = flags['hidden_bearish']
         
         return divergences
     
     @staticmethod
+    @requires_indicators('atr')
     def calculate_volatility_percentile(df: pd.DataFrame, indicators: Dict[str, float]) -> float:
         """
         Calculate current volatility as percentile of recent volatility
@@ -201,6 +209,7 @@ class AdvancedStrategies:
         return percentile
     
     @staticmethod
+    @requires_indicators('adx', 'bb_width', 'ema_9', 'ema_21', 'ema_50')
     def market_regime_detection(df: pd.DataFrame, indicators: Dict[str, float]) -> str:
         """
         Detect market regime: TRENDING_UP, TRENDING_DOWN, RANGING, VOLATILE
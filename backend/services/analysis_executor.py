@@ -0,0 +1,145 @@
+"""
+Analysis Executor
+Runs CPU-bound strategy analysis off the event loop
+"""
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from typing import Any, Callable, Dict, Tuple
+import numpy as np
+import pandas as pd
+from services.indicators import TechnicalIndicators
+from services.advanced_strategies import AdvancedStrategies
+from services.smc_strategy import SMCStrategy, SMC_PIPELINE
+from services.analysis_pipeline import AnalysisContext, Stage
+
+OHLCV_FIELDS = ('open', 'high', 'low', 'close', 'volume')
+
+# SMC stages plus the candle-level indicator, trend, volatility and S/R
+# stages; S/R reads the same swing index as the SMC detectors
+CANDLE_PIPELINE = SMC_PIPELINE.extend([
+    Stage('indicators', ('df',), TechnicalIndicators.calculate_all),
+    Stage('trend', ('df', 'indicators'), TechnicalIndicators.detect_trend),
+    Stage('volatility', ('indicators',), TechnicalIndicators.detect_volatility),
+    Stage('support_resistance', ('swings', 'indicators'), AdvancedStrategies._support_resistance,
+          50, lambda: ([], [])),
+])
+CANDLE_OUTPUTS = ('indicators', 'trend', 'volatility', 'smc', 'support_resistance')
+
+
+def frame_to_payload(df: pd.DataFrame) -> Dict[str, np.ndarray]:
+    """Pack an OHLCV DataFrame into plain arrays (cheap to pickle)"""
+    payload = {field: df[field].to_numpy(dtype=np.float64) for field in OHLCV_FIELDS}
+    payload['timestamp'] = df.index.values
+    return payload
+
+
+def payload_to_frame(payload: Dict[str, np.ndarray]) -> pd.DataFrame:
+    """Rebuild the OHLCV DataFrame from frame_to_payload output"""
+    df = pd.DataFrame(
+        {field: payload[field] for field in OHLCV_FIELDS},
+        index=pd.DatetimeIndex(payload['timestamp'], name='timestamp')
+    )
+    return df
+
+
+def run_candle_analysis(
+    payload: Dict[str, np.ndarray],
+    current_time: datetime = None,
+    indicators: Dict[str, float] = None,
+    smc: Tuple = None
+) -> Dict:
+    """
+    Indicators, trend, volatility, ICT analysis and S/R for one candle window
+
+    Module-level so it can run in a worker process. Pass `indicators` and `smc`
+    when they are already known (from StreamingIndicatorEngine /
+    StreamingSMCEngine) to skip recomputing them. `timings` holds the run
+    time (ms) of every CANDLE_PIPELINE stage that ran.
+    """
+    known = {name: value for name, value in (('indicators', indicators), ('smc', smc)) if value is not None}
+    context = AnalysisContext(payload_to_frame(payload), current_time, **known)
+    analysis = CANDLE_PIPELINE.run(context, *CANDLE_OUTPUTS)
+    analysis['timings'] = context.timings
+    return analysis
+
+
+def run_smc_signal(payload: Dict[str, np.ndarray], current_time: datetime = None) -> Tuple:
+    """generate_smc_signal on a packed candle window (worker-process safe)"""
+    return SMCStrategy.generate_smc_signal(payload_to_frame(payload), current_time)
+
+
+class AnalysisExecutor:
+    """
+    Dispatch analysis functions to a process pool, a worker thread or inline
+
+    Modes:
+        process: ProcessPoolExecutor with `max_workers` processes - uses every core
+        thread:  asyncio.to_thread - keeps the event loop free, shares the GIL
+        inline:  call directly on the event loop (tests / debugging)
+
+    `timeout` bounds how long a request waits for a result. A timed-out job in
+    a worker process still runs to completion, but nobody waits on it.
+    Worker processes get the indicator backend that is set when the pool
+    starts - spawned workers don't inherit class state set at runtime.
+    """
+
+    MODES = ("process", "thread", "inline")
+
+    def __init__(self, mode: str = "thread", max_workers: int = None, timeout: float = 10.0):
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown analysis executor mode: {mode}")
+
+        self.mode = mode
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self._pool = None
+
+    def start(self):
+        """Create the worker pool (no-op unless mode is "process")"""
+        if self.mode == "process" and self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                initializer=TechnicalIndicators.set_backend,
+                initargs=(TechnicalIndicators.backend,)
+            )
+
+    def shutdown(self):
+        """Stop worker processes and drop queued jobs"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    async def run_local(self, fn: Callable, *args) -> Any:
+        """
+        Run `fn(*args)` in this process, off the event loop (inline in "inline" mode)
+
+        For CPU work on in-process state, such as the streaming engines, which
+        a worker process can't update. No timeout: the call always finishes,
+        so callers can hold a lock across it.
+        """
+        if self.mode == "inline":
+            return fn(*args)
+        return await asyncio.to_thread(fn, *args)
+
+    async def run(self, fn: Callable, *args) -> Any:
+        """Run `fn(*args)` according to the executor mode and return its result"""
+        if self.mode == "inline":
+            return fn(*args)
+
+        if self.mode == "thread":
+            return await asyncio.wait_for(asyncio.to_thread(fn, *args), timeout=self.timeout)
+
+        self.start()
+        loop = asyncio.get_running_loop()
+        try:
+            return await asyncio.wait_for(
+                loop.run_in_executor(self._pool, fn, *args),
+                timeout=self.timeout
+            )
+        except BrokenProcessPool:
+            # A worker died (e.g. OOM) - replace the pool for the next request
+            print("Analysis process pool broken, restarting")
+            self.shutdown()
+            raise
@@ -0,0 +1,115 @@
+"""
+Analysis Pipeline
+Named analysis stages over one candle window, each run at most once per request
+"""
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Tuple
+import numpy as np
+import pandas as pd
+
+CONTEXT_FIELDS = ('open', 'high', 'low', 'close', 'volume')
+
+
+@dataclass
+class Stage:
+    """
+    One pipeline step: `fn(*inputs)` produces the artifact `name`
+
+    Windows shorter than `min_candles` skip `fn` (and its inputs) and get
+    `fallback()` instead - the detectors' "not enough data" result.
+    """
+    name: str
+    inputs: Tuple[str, ...]
+    fn: Callable
+    min_candles: int = 0
+    fallback: Callable = None
+
+
+class AnalysisContext:
+    """
+    Everything derived from one candle window during one analysis
+
+    Holds the frame, its OHLCV columns as float64 arrays (extracted once),
+    `price` (last close), `current_time` and every artifact the stages have
+    produced so far. Keyword arguments seed artifacts that are already known,
+    e.g. indicators from StreamingIndicatorEngine - stages producing them are
+    then skipped. `timings` records each stage's own run time in ms.
+    """
+
+    def __init__(self, df: pd.DataFrame, current_time=None, **artifacts):
+        self.length = len(df)
+        self.artifacts: Dict[str, Any] = {'df': df, 'current_time': current_time}
+        for field in CONTEXT_FIELDS:
+            if field in df:
+                self.artifacts[field] = df[field].to_numpy(dtype=np.float64)
+        self.artifacts['price'] = self.artifacts['close'][-1] if self.length else None
+        self.artifacts.update(artifacts)
+        self.timings: Dict[str, float] = {}
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.artifacts
+
+    def __getitem__(self, name: str) -> Any:
+        return self.artifacts[name]
+
+
+class Pipeline:
+    """
+    Stages keyed by the artifact they produce
+
+    `run` works backwards from the requested outputs: a stage runs only if
+    something asked for its artifact and the context doesn't hold it yet, so
+    each runs at most once per context however many stages read it.
+    """
+
+    def __init__(self, stages: List[Stage]):
+        self.stages: Dict[str, Stage] = {}
+        for stage in stages:
+            if stage.name in self.stages:
+                raise ValueError(f"Duplicate pipeline stage: {stage.name}")
+            self.stages[stage.name] = stage
+        self._check_acyclic()
+
+    def extend(self, stages: List[Stage]) -> 'Pipeline':
+        """New pipeline with these stages added"""
+        return Pipeline(list(self.stages.values()) + list(stages))
+
+    def run(self, context: AnalysisContext, *outputs: str) -> Dict[str, Any]:
+        """Produce `outputs` in `context`; returns {output: artifact}"""
+        return {name: self._resolve(context, name) for name in outputs}
+
+    def _resolve(self, context: AnalysisContext, name: str) -> Any:
+        if name in context:
+            return context[name]
+
+        stage = self.stages.get(name)
+        if stage is None:
+            raise KeyError(f"No pipeline stage produces '{name}'")
+
+        if context.length < stage.min_candles:
+            value = stage.fallback()
+        else:
+            args = [self._resolve(context, input_name) for input_name in stage.inputs]
+            started = time.perf_counter()
+            value = stage.fn(*args)
+            context.timings[name] = (time.perf_counter() - started) * 1000
+
+        context.artifacts[name] = value
+        return value
+
+    def _check_acyclic(self):
+        state: Dict[str, int] = {}  # 1: visiting, 2: done
+
+        def visit(name: str):
+            if state.get(name) == 2 or name not in self.stages:
+                return
+            if state.get(name) == 1:
+                raise ValueError(f"Pipeline stage '{name}' depends on itself")
+            state[name] = 1
+            for input_name in self.stages[name].inputs:
+                visit(input_name)
+            state[name] = 2
+
+        for name in self.stages:
+            visit(name)
@@ -0,0 +1,135 @@
+"""
+Broadcast Hub
+Websocket fan-out with per-client queues and backpressure
+"""
+import asyncio
+import json
+from typing import Dict, Hashable, Optional, Set
+from fastapi import WebSocket
+
+# Close code sent when a client is dropped for not keeping up (RFC 6455 "try again later")
+SLOW_CLIENT_CLOSE_CODE = 1013
+
+
+class ClientConnection:
+    """A websocket with its own bounded outbound queue and writer task"""
+
+    def __init__(self, websocket: WebSocket, max_queue: int):
+        self.websocket = websocket
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self.topics: Set[Hashable] = set()
+        self.writer: Optional[asyncio.Task] = None
+        self.closed = False
+        self.dropped_messages = 0
+
+
+class BroadcastHub:
+    """
+    Topic-based websocket broadcaster
+
+    Every connection gets a bounded queue drained by a dedicated writer task,
+    so one slow client never delays the others. Messages are serialized once
+    per broadcast and enqueued for every recipient without awaiting any send.
+
+    When a client's queue is full the overflow policy applies:
+        drop_oldest: discard the oldest queued message and keep the client
+        disconnect:  close the client so it can reconnect and resync
+    """
+
+    POLICIES = ("drop_oldest", "disconnect")
+
+    def __init__(self, max_queue: int = 16, overflow_policy: str = "drop_oldest"):
+        if overflow_policy not in self.POLICIES:
+            raise ValueError(f"Unknown overflow policy: {overflow_policy}")
+
+        self.max_queue = max_queue
+        self.overflow_policy = overflow_policy
+        self.connections: Dict[WebSocket, ClientConnection] = {}
+        self.topics: Dict[Hashable, Set[ClientConnection]] = {}
+
+    async def connect(self, websocket: WebSocket, topic: Hashable = None) -> ClientConnection:
+        """Accept a websocket, start its writer and optionally join a topic"""
+        await websocket.accept()
+
+        connection = ClientConnection(websocket, self.max_queue)
+        connection.writer = asyncio.create_task(self._write_loop(connection))
+        self.connections[websocket] = connection
+
+        if topic is not None:
+            self.subscribe(connection, topic)
+        return connection
+
+    def subscribe(self, connection: ClientConnection, topic: Hashable):
+        connection.topics.add(topic)
+        self.topics.setdefault(topic, set()).add(connection)
+
+    def disconnect(self, connection: ClientConnection):
+        """Forget a connection and stop its writer (safe to call twice)"""
+        if connection.closed:
+            return
+        connection.closed = True
+
+        self.connections.pop(connection.websocket, None)
+        for topic in connection.topics:
+            members = self.topics.get(topic)
+            if members is not None:
+                members.discard(connection)
+                if not members:
+                    del self.topics[topic]
+
+        if connection.writer is not None and connection.writer is not asyncio.current_task():
+            connection.writer.cancel()
+
+    def send(self, connection: ClientConnection, message: dict):
+        """Queue a message for a single connection"""
+        self._enqueue(connection, json.dumps(message, default=str))
+
+    def broadcast(self, message: dict, topic: Hashable = None) -> int:
+        """
+        Queue a message for every connection (or every member of `topic`)
+
+        Returns the number of connections the message was queued for.
+        """
+        recipients = self.topics.get(topic, set()) if topic is not None else self.connections.values()
+        if not recipients:
+            return 0
+
+        payload = json.dumps(message, default=str)  # Serialize once for everyone
+        queued = 0
+        for connection in list(recipients):
+            if self._enqueue(connection, payload):
+                queued += 1
+        return queued
+
+    def _enqueue(self, connection: ClientConnection, payload: str) -> bool:
+        if connection.closed:
+            return False
+
+        if connection.queue.full():
+            if self.overflow_policy == "disconnect":
+                self.disconnect(connection)
+                asyncio.create_task(self._close(connection, SLOW_CLIENT_CLOSE_CODE))
+                return False
+            connection.queue.get_nowait()
+            connection.dropped_messages += 1
+
+        connection.queue.put_nowait(payload)
+        return True
+
+    async def _write_loop(self, connection: ClientConnection):
+        try:
+            while True:
+                payload = await connection.queue.get()
+                await connection.websocket.send_text(payload)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # Dead socket - prune it so broadcasts stop targeting it
+            self.disconnect(connection)
+
+    @staticmethod
+    async def _close(connection: ClientConnection, code: int):
+        try:
+            await connection.websocket.close(code=code)
+        except Exception:
+            pass
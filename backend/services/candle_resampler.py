@@ -0,0 +1,80 @@
+"""
+Candle Resampler
+Builds higher-timeframe candles from lower-timeframe history
+"""
+import ccxt
+import numpy as np
+import pandas as pd
+
+
+class CandleResampler:
+    """Vectorized OHLCV aggregation into exchange-aligned (UTC epoch) buckets"""
+
+    @staticmethod
+    def timeframe_ms(timeframe: str) -> int:
+        """Duration of a ccxt timeframe string in milliseconds"""
+        return int(ccxt.Exchange.parse_timeframe(timeframe) * 1000)
+
+    @staticmethod
+    def can_resample(source_timeframe: str, target_timeframe: str) -> bool:
+        """True if target candles are a whole number of source candles"""
+        source_ms = CandleResampler.timeframe_ms(source_timeframe)
+        target_ms = CandleResampler.timeframe_ms(target_timeframe)
+        return target_ms > source_ms and target_ms % source_ms == 0
+
+    @staticmethod
+    def expected_candles(source_candles: int, source_timeframe: str, target_timeframe: str) -> int:
+        """Number of complete-history target candles a source window can produce"""
+        ratio = CandleResampler.timeframe_ms(target_timeframe) // CandleResampler.timeframe_ms(source_timeframe)
+        # A leading partial bucket is dropped, so count one less in the worst case
+        return max(source_candles // ratio - 1, 0)
+
+    @staticmethod
+    def resample(df: pd.DataFrame, source_timeframe: str, target_timeframe: str) -> pd.DataFrame:
+        """
+        Aggregate OHLCV candles into a higher timeframe
+
+        Buckets are aligned to the UTC epoch like exchange candles (4h starts at
+        00/04/08 UTC, 1d at midnight UTC). A leading bucket that starts before the
+        available history is dropped; the trailing bucket is kept even if it is
+        still forming, matching what the exchange returns for the live candle.
+        """
+        if not CandleResampler.can_resample(source_timeframe, target_timeframe):
+            raise ValueError(f"Cannot resample {source_timeframe} into {target_timeframe}")
+
+        empty = df.iloc[0:0]
+        if df.empty:
+            return empty
+
+        target_ms = CandleResampler.timeframe_ms(target_timeframe)
+        timestamps = df.index.values.astype('datetime64[ms]').astype(np.int64)
+        buckets = timestamps // target_ms
+
+        # First row of every bucket
+        starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+        ends = np.r_[starts[1:], len(df)] - 1
+
+        opens = df['open'].to_numpy()[starts]
+        highs = np.maximum.reduceat(df['high'].to_numpy(), starts)
+        lows = np.minimum.reduceat(df['low'].to_numpy(), starts)
+        closes = df['close'].to_numpy()[ends]
+        volumes = np.add.reduceat(df['volume'].to_numpy(), starts)
+        bucket_open_ms = buckets[starts] * target_ms
+
+        # Drop the first bucket if history starts part-way through it
+        first = 1 if timestamps[0] != bucket_open_ms[0] else 0
+        if first >= len(starts):
+            return empty
+
+        resampled = pd.DataFrame(
+            {
+                'open': opens[first:],
+                'high': highs[first:],
+                'low': lows[first:],
+                'close': closes[first:],
+                'volume': volumes[first:],
+            },
+            index=pd.to_datetime(bucket_open_ms[first:], unit='ms')
+        )
+        resampled.index.name = 'timestamp'
+        return resampled
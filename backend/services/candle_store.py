@@ -0,0 +1,106 @@
+"""
+Candle Store
+Local OHLCV history so price requests only pull candles that changed
+"""
+import time
+import pandas as pd
+from typing import Dict, List, Optional, Tuple
+
+OHLCV_COLUMNS = ['timestamp', 'open', 'high', 'low', 'close', 'volume']
+
+StoreKey = Tuple[str, str, str]
+
+
+def ohlcv_to_df(ohlcv: List) -> pd.DataFrame:
+    """Convert raw ccxt OHLCV rows into a timestamp-indexed DataFrame"""
+    df = pd.DataFrame(ohlcv, columns=OHLCV_COLUMNS)
+    df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
+    df.set_index('timestamp', inplace=True)
+    return df
+
+
+class CandleStore:
+    """
+    In-memory candle history keyed by (exchange, symbol, timeframe)
+
+    Each key holds a contiguous, timestamp-sorted DataFrame. New rows are
+    merged on top of the stored history, replacing any candle with the same
+    open time (the still-forming candle gets refreshed on every sync).
+    """
+
+    def __init__(self, max_candles: int = 1000):
+        self.max_candles = max_candles
+        self._frames: Dict[StoreKey, pd.DataFrame] = {}
+        self._synced_at: Dict[StoreKey, float] = {}
+
+    def get(self, exchange_id: str, symbol: str, timeframe: str) -> Optional[pd.DataFrame]:
+        """Return the stored history for a key (not a copy - do not mutate)"""
+        return self._frames.get((exchange_id, symbol, timeframe))
+
+    def last_timestamp_ms(self, exchange_id: str, symbol: str, timeframe: str) -> Optional[int]:
+        """Open time of the newest stored candle in milliseconds"""
+        df = self.get(exchange_id, symbol, timeframe)
+        if df is None or df.empty:
+            return None
+        return int(df.index[-1].timestamp() * 1000)
+
+    def synced_at(self, exchange_id: str, symbol: str, timeframe: str) -> Optional[float]:
+        """Monotonic time of the last successful sync for a key"""
+        return self._synced_at.get((exchange_id, symbol, timeframe))
+
+    def merge(
+        self,
+        exchange_id: str,
+        symbol: str,
+        timeframe: str,
+        ohlcv: List,
+        replace: bool = False,
+        keep: int = None
+    ) -> pd.DataFrame:
+        """
+        Merge raw OHLCV rows into the stored history
+
+        Args:
+            ohlcv: Raw ccxt rows [timestamp_ms, open, high, low, close, volume]
+            replace: Drop the existing history instead of merging
+            keep: Minimum number of candles to retain (defaults to max_candles)
+        """
+        key = (exchange_id, symbol, timeframe)
+        new_df = ohlcv_to_df(ohlcv)
+        stored = self._frames.get(key)
+
+        if replace or stored is None or stored.empty or new_df.empty:
+            merged = new_df if (replace or stored is None or stored.empty) else stored
+        else:
+            # Everything from the first fetched candle onwards is authoritative
+            merged = pd.concat([stored[stored.index < new_df.index[0]], new_df])
+
+        merged = merged[~merged.index.duplicated(keep='last')].sort_index()
+        merged = merged.tail(max(self.max_candles, keep or 0))
+
+        self._frames[key] = merged
+        self._synced_at[key] = time.monotonic()
+        return merged
+
+    def timeframes(self, exchange_id: str, symbol: str) -> List[str]:
+        """Timeframes with stored history for a symbol"""
+        return [key[2] for key in self._frames if key[0] == exchange_id and key[1] == symbol]
+
+    def window(self, exchange_id: str, symbol: str, timeframe: str, limit: int) -> Optional[pd.DataFrame]:
+        """Return a copy of the most recent `limit` candles"""
+        df = self.get(exchange_id, symbol, timeframe)
+        if df is None:
+            return None
+        return df.tail(limit).copy()
+
+    def clear(self, exchange_id: str = None, symbol: str = None, timeframe: str = None):
+        """Forget stored history (optionally only for matching keys)"""
+        for key in list(self._frames.keys()):
+            if exchange_id and key[0] != exchange_id:
+                continue
+            if symbol and key[1] != symbol:
+                continue
+            if timeframe and key[2] != timeframe:
+                continue
+            self._frames.pop(key, None)
+            self._synced_at.pop(key, None)
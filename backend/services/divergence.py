@@ -0,0 +1,133 @@
+"""
+Divergence Detection
+Pivot-aligned regular and hidden divergences between price and an oscillator
+"""
+from typing import Dict, List
+import numpy as np
+import pandas as pd
+from services import indicator_kernels
+from services.swing_index import pivot_mask
+
+DIVERGENCE_TYPES = ('regular_bullish', 'hidden_bullish', 'regular_bearish', 'hidden_bearish')
+
+# Fewest candles AdvancedStrategies.detect_divergence looks at. Oscillator
+# values are NaN until warmed up (RSI 14, MACD 26 + 9 candles) and pivots on
+# them are skipped, so short frames simply find fewer divergences
+MIN_DIVERGENCE_CANDLES = 20
+# scan_divergences drops shorter frames: every symbol is cut to the shortest
+# frame, so one short history would shrink the whole block
+SCAN_MIN_CANDLES = 50
+
+
+def find_divergences(
+    low: np.ndarray,
+    high: np.ndarray,
+    oscillator: np.ndarray,
+    order: int = 2,
+    min_gap: int = 5,
+    max_gap: int = 60
+) -> Dict[str, np.ndarray]:
+    """
+    Every divergence between consecutive price pivots in one vectorized pass
+
+    Inputs are 1-D (one series) or 2-D (series x candles). Oscillator values are
+    read at the price pivot candles. Pivot pairs closer than `min_gap` or
+    further apart than `max_gap` candles are ignored.
+
+        regular_bullish: lower low in price, higher low in the oscillator
+        hidden_bullish:  higher low in price, lower low in the oscillator
+        regular_bearish: higher high in price, lower high in the oscillator
+        hidden_bearish:  lower high in price, higher high in the oscillator
+
+    Returns columns (row, start, end, kind, price_start, price_end, osc_start,
+    osc_end) sorted by row then end candle; `kind` indexes DIVERGENCE_TYPES.
+    """
+    low, high, oscillator = (np.atleast_2d(np.asarray(a, dtype=np.float64)) for a in (low, high, oscillator))
+    parts = []
+
+    for price, bullish in ((low, True), (high, False)):
+        rows, cols = np.nonzero(pivot_mask(price, order, high=not bullish))
+        same_row = rows[1:] == rows[:-1]
+        row = rows[1:][same_row]
+        start = cols[:-1][same_row]
+        end = cols[1:][same_row]
+
+        gap = end - start
+        price_start, price_end = price[row, start], price[row, end]
+        osc_start, osc_end = oscillator[row, start], oscillator[row, end]
+        valid = (gap >= min_gap) & (gap <= max_gap) & np.isfinite(osc_start) & np.isfinite(osc_end)
+
+        price_up, osc_up = price_end > price_start, osc_end > osc_start
+        price_down, osc_down = price_end < price_start, osc_end < osc_start
+        if bullish:
+            kinds = ((0, price_down & osc_up), (1, price_up & osc_down))
+        else:
+            kinds = ((2, price_up & osc_down), (3, price_down & osc_up))
+
+        for kind, hit in kinds:
+            hit = hit & valid
+            parts.append((
+                row[hit], start[hit], end[hit], np.full(hit.sum(), kind),
+                price_start[hit], price_end[hit], osc_start[hit], osc_end[hit]
+            ))
+
+    columns = ('row', 'start', 'end', 'kind', 'price_start', 'price_end', 'osc_start', 'osc_end')
+    result = {name: np.concatenate([part[i] for part in parts]) for i, name in enumerate(columns)}
+    order_by = np.lexsort((result['end'], result['row']))
+    return {name: values[order_by] for name, values in result.items()}
+
+
+def recent_divergence_flags(result: Dict[str, np.ndarray], length: int, lookback: int = 10, row: int = 0) -> Dict[str, bool]:
+    """Which divergence types end within the last `lookback` candles of one series"""
+    recent = (result['row'] == row) & (result['end'] >= length - lookback)
+    kinds = set(result['kind'][recent].tolist())
+    return {name: i in kinds for i, name in enumerate(DIVERGENCE_TYPES)}
+
+
+def scan_divergences(
+    frames: Dict[str, pd.DataFrame],
+    lookback: int = 10,
+    order: int = 2
+) -> Dict[str, List[Dict]]:
+    """
+    Recent RSI and MACD divergences for many symbols at once
+
+    Frames are aligned on the length of the shortest one and processed as a
+    single (symbols x candles) block. Module-level so it can run in a worker
+    process.
+    """
+    frames = {symbol: df for symbol, df in frames.items() if len(df) >= SCAN_MIN_CANDLES}
+    if not frames:
+        return {}
+
+    length = min(len(df) for df in frames.values())
+    symbols = list(frames)
+    block = {
+        column: np.vstack([df[column].to_numpy(dtype=np.float64)[-length:] for df in frames.values()])
+        for column in ('high', 'low', 'close')
+    }
+    timestamps = {symbol: df.index[-length:] for symbol, df in frames.items()}
+    oscillators = {
+        'rsi': indicator_kernels.rsi(block['close'], 14),
+        'macd': indicator_kernels.macd(block['close'])[0],
+    }
+
+    scan = {symbol: [] for symbol in symbols}
+    for name, values in oscillators.items():
+        result = find_divergences(block['low'], block['high'], values, order=order)
+        recent = result['end'] >= length - lookback
+        for i in np.flatnonzero(recent):
+            symbol = symbols[result['row'][i]]
+            start, end = result['start'][i], result['end'][i]
+            scan[symbol].append({
+                'indicator': name,
+                'type': DIVERGENCE_TYPES[result['kind'][i]],
+                'start_time': timestamps[symbol][start].isoformat(),
+                'end_time': timestamps[symbol][end].isoformat(),
+                'price_start': float(result['price_start'][i]),
+                'price_end': float(result['price_end'][i]),
+                'indicator_start': float(result['osc_start'][i]),
+                'indicator_end': float(result['osc_end'][i]),
+            })
+
+    return scan
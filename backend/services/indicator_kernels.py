@@ -0,0 +1,240 @@
+"""
+Indicator Kernels
+Pure-NumPy indicator math on float64 arrays
+
+Every kernel works along the last axis, so a 1-D array is one candle series and
+a 2-D (series x candles) block computes many series in one pass. Warm-up
+positions are NaN. Results match the `ta` indicators used by TechnicalIndicators
+to float precision.
+"""
+from typing import Dict
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Largest factor the blocked EMA lets its running weights grow to
+_EMA_MAX_SCALE = 1e200
+
+
+def ema(x: np.ndarray, span: int = None, alpha: float = None, min_periods: int = None) -> np.ndarray:
+    """
+    Exponential moving average, pandas ewm(adjust=False) semantics
+
+    The recursion y[t] = y[t-1] + alpha * (x[t] - y[t-1]) is evaluated in closed
+    form with a cumulative sum per block; blocks are sized so the growing
+    weights (1 - alpha)^-k cannot overflow.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    if alpha is None:
+        alpha = 2.0 / (span + 1)
+    if min_periods is None:
+        min_periods = span or 1
+
+    n = x.shape[-1]
+    out = np.empty_like(x)
+    if n == 0:
+        return out
+
+    # Work relative to the first value: keeps the sums small and flat input exact
+    base = x[..., :1]
+    x = x - base
+
+    decay = 1.0 - alpha
+    if decay <= 0:
+        out[...] = x
+    else:
+        block = max(1, min(n, int(np.log(_EMA_MAX_SCALE) / -np.log(decay))))
+        powers = decay ** np.arange(block)
+        carry = x[..., 0]
+        start = 0
+        while start < n:
+            stop = min(start + block, n)
+            k = stop - start
+            p = powers[:k]
+            # y[s+j] = decay^(j+1) * carry + alpha * decay^j * sum_i x[s+i] / decay^i
+            scaled = np.cumsum(x[..., start:stop] / p, axis=-1)
+            if start == 0:
+                # Seed with the first value: y[0] = x[0]
+                scaled = scaled + (carry / alpha - carry)[..., None]
+                out[..., start:stop] = alpha * p * scaled
+            else:
+                out[..., start:stop] = decay * p * carry[..., None] + alpha * p * scaled
+            carry = out[..., stop - 1]
+            start = stop
+
+    out += base
+    out[..., :min(min_periods - 1, n)] = np.nan
+    return out
+
+
+def _seeded_wilder(x: np.ndarray, seed_end: int, window: int) -> np.ndarray:
+    """
+    Wilder smoothing seeded with the mean of x[seed_end - window:seed_end]
+
+    Output is defined from index seed_end - 1 onwards, NaN before.
+    """
+    n = x.shape[-1]
+    out = np.full_like(x, np.nan)
+    if n < seed_end:
+        return out
+
+    seq = x[..., seed_end - 1:].copy()
+    seq[..., 0] = x[..., seed_end - window:seed_end].mean(axis=-1)
+    out[..., seed_end - 1:] = ema(seq, alpha=1.0 / window, min_periods=1)
+    return out
+
+
+def rolling_mean(x: np.ndarray, window: int) -> np.ndarray:
+    out = np.full_like(x, np.nan, dtype=np.float64)
+    if x.shape[-1] >= window:
+        out[..., window - 1:] = sliding_window_view(x, window, axis=-1).mean(axis=-1)
+    return out
+
+
+def rolling_std(x: np.ndarray, window: int) -> np.ndarray:
+    """Population standard deviation (ddof=0) over a trailing window"""
+    out = np.full_like(x, np.nan, dtype=np.float64)
+    if x.shape[-1] >= window:
+        out[..., window - 1:] = sliding_window_view(x, window, axis=-1).std(axis=-1)
+    return out
+
+
+def rolling_max(x: np.ndarray, window: int) -> np.ndarray:
+    out = np.full_like(x, np.nan, dtype=np.float64)
+    if x.shape[-1] >= window:
+        out[..., window - 1:] = sliding_window_view(x, window, axis=-1).max(axis=-1)
+    return out
+
+
+def rolling_min(x: np.ndarray, window: int) -> np.ndarray:
+    out = np.full_like(x, np.nan, dtype=np.float64)
+    if x.shape[-1] >= window:
+        out[..., window - 1:] = sliding_window_view(x, window, axis=-1).min(axis=-1)
+    return out
+
+
+def true_range(high: np.ndarray, low: np.ndarray, close: np.ndarray) -> np.ndarray:
+    """True range; the first candle has no previous close and uses high - low"""
+    tr = high - low
+    prev_close = close[..., :-1]
+    tr[..., 1:] = np.maximum(
+        tr[..., 1:],
+        np.maximum(np.abs(high[..., 1:] - prev_close), np.abs(low[..., 1:] - prev_close))
+    )
+    return tr
+
+
+def rsi(close: np.ndarray, window: int = 14) -> np.ndarray:
+    diff = np.zeros_like(close)
+    diff[..., 1:] = np.diff(close, axis=-1)  # ta counts the first change as zero
+    up = ema(np.maximum(diff, 0.0), alpha=1.0 / window, min_periods=window)
+    down = ema(np.maximum(-diff, 0.0), alpha=1.0 / window, min_periods=window)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(down == 0, 100.0, 100 - (100 / (1 + up / down)))
+
+
+def macd(close: np.ndarray, fast: int = 12, slow: int = 26, signal: int = 9):
+    """Returns (macd, signal, histogram)"""
+    line = ema(close, span=fast) - ema(close, span=slow)
+    signal_line = np.full_like(line, np.nan)
+    if close.shape[-1] >= slow:
+        # The signal EMA starts at the first defined MACD value
+        signal_line[..., slow - 1:] = ema(line[..., slow - 1:], span=signal)
+    return line, signal_line, line - signal_line
+
+
+def bollinger(close: np.ndarray, window: int = 20, window_dev: float = 2):
+    """Returns (upper, middle, lower, width %)"""
+    middle = rolling_mean(close, window)
+    std = rolling_std(close, window)
+    upper = middle + window_dev * std
+    lower = middle - window_dev * std
+    with np.errstate(divide='ignore', invalid='ignore'):
+        width = (upper - lower) / middle * 100
+    return upper, middle, lower, width
+
+
+def stochastic(close: np.ndarray, highest: np.ndarray, lowest: np.ndarray, smooth_window: int = 3):
+    """%K / %D from precomputed rolling high/low"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        stoch_k = 100 * (close - lowest) / (highest - lowest)
+    return stoch_k, rolling_mean(stoch_k, smooth_window)
+
+
+def atr(tr: np.ndarray, window: int = 14) -> np.ndarray:
+    return _seeded_wilder(tr, window, window)
+
+
+def adx(high: np.ndarray, low: np.ndarray, tr: np.ndarray, window: int = 14):
+    """
+    Returns (adx, +DI, -DI), following ta.trend.ADXIndicator
+
+    Directional movement starts at the second candle, so the smoothed sums are
+    seeded with candles 1..window and ADX with the first `window` DX values.
+    """
+    n = high.shape[-1]
+    nan = np.full_like(high, np.nan)
+    if n < 2 * window:
+        return nan, nan.copy(), nan.copy()
+
+    up = np.zeros_like(high)
+    down = np.zeros_like(high)
+    up[..., 1:] = high[..., 1:] - high[..., :-1]
+    down[..., 1:] = low[..., :-1] - low[..., 1:]
+    pos = np.where((up > down) & (up > 0), up, 0.0)
+    neg = np.where((down > up) & (down > 0), down, 0.0)
+
+    # Wilder sums (scaled by 1/window - the ratios below don't care)
+    trs = _seeded_wilder(tr, window + 1, window)
+    dip = _seeded_wilder(pos, window + 1, window)
+    din = _seeded_wilder(neg, window + 1, window)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        di_pos = np.where(trs != 0, 100 * dip / trs, 0.0)
+        di_neg = np.where(trs != 0, 100 * din / trs, 0.0)
+        di_sum = di_pos + di_neg
+        dx = np.where(di_sum != 0, 100 * np.abs((di_pos - di_neg) / di_sum), 0.0)
+    di_pos[..., :window] = np.nan
+    di_neg[..., :window] = np.nan
+
+    adx_line = _seeded_wilder(dx, 2 * window, window)
+    return adx_line, di_pos, di_neg
+
+
+def compute_all(
+    open_: np.ndarray,
+    high: np.ndarray,
+    low: np.ndarray,
+    close: np.ndarray,
+    volume: np.ndarray
+) -> Dict[str, np.ndarray]:
+    """
+    Full series for every TechnicalIndicators value, keyed like calculate_all
+
+    Shared intermediates (true range, 14-candle rolling high/low) are computed
+    once and included in the result for other consumers.
+    """
+    arrays = [np.ascontiguousarray(a, dtype=np.float64) for a in (open_, high, low, close, volume)]
+    open_, high, low, close, volume = arrays
+
+    tr = true_range(high, low, close)
+    highest_14 = rolling_max(high, 14)
+    lowest_14 = rolling_min(low, 14)
+
+    series = {
+        'ema_9': ema(close, span=9),
+        'ema_21': ema(close, span=21),
+        'ema_50': ema(close, span=50),
+        'ema_200': ema(close, span=200),
+        'rsi': rsi(close, 14),
+    }
+    series['macd'], series['macd_signal'], series['macd_diff'] = macd(close)
+    series['bb_upper'], series['bb_middle'], series['bb_lower'], series['bb_width'] = bollinger(close)
+    series['stoch_k'], series['stoch_d'] = stochastic(close, highest_14, lowest_14)
+    series['adx'], series['adx_pos'], series['adx_neg'] = adx(high, low, tr, 14)
+    series['atr'] = atr(tr, 14)
+
+    series['avg_volume_20'] = rolling_mean(volume, 20)
+    series['true_range'] = tr
+    series['highest_14'] = highest_14
+    series['lowest_14'] = lowest_14
+    return series
@@ -4,52 +4,192 @@ from ta.trend import EMAIndicator, MACD, ADXIndicator
 from ta.momentum import RSIIndicator, StochasticOscillator
 from ta.volatility import BollingerBands, AverageTrueRange
 from ta.volume import VolumeWeightedAveragePrice
-from typing import Dict
+from collections.abc import Mapping
+from typing import Callable, Dict, Iterator, List
+from services import indicator_kernels
 
-class TechnicalIndicators:
-    """Calculate various technical indicators for trading signals"""
+# Indicators produced by one computation, in calculate_all output order
+INDICATOR_GROUPS = (
+    ('ema_9',),
+    ('ema_21',),
+    ('ema_50',),
+    ('ema_200',),
+    ('rsi',),
+    ('macd', 'macd_signal', 'macd_diff'),
+    ('bb_upper', 'bb_middle', 'bb_lower', 'bb_width'),
+    ('stoch_k', 'stoch_d'),
+    ('adx', 'adx_pos', 'adx_neg'),
+    ('atr',),
+    ('current_price', 'price_above_ema21', 'price_above_ema50'),
+    ('volume', 'avg_volume_20', 'volume_ratio'),
+)
+GROUP_OF = {key: group for group in INDICATOR_GROUPS for key in group}
+
+
+def requires_indicators(*keys: str) -> Callable:
+    """Declare which indicators a strategy function reads"""
+    unknown = set(keys) - set(GROUP_OF)
+    if unknown:
+        raise ValueError(f"Unknown indicators: {sorted(unknown)}")
     
-    @staticmethod
-    def calculate_all(df: pd.DataFrame) -> Dict[str, float]:
-        """Calculate all technical indicators and return as dictionary"""
+    def decorate(fn: Callable) -> Callable:
+        fn.required_indicators = keys
+        return fn
+    return decorate
+
+
+class LazyIndicators(Mapping):
+    """
+    calculate_all result that is computed on demand
+    
+    Reading a key computes only that indicator's group (e.g. all three MACD
+    values) and memoizes it, so a caller that only looks at EMAs and ADX never
+    pays for MACD or Stochastic. Behaves like the calculate_all dict for
+    `get`, `in` and `[]`; use to_dict() for the fully materialized dict.
+    """
+    
+    def __init__(self, df: pd.DataFrame, backend: str = None):
+        self.df = df
+        self.backend = backend or TechnicalIndicators.backend
+        self._values: Dict[str, float] = {}
+        self._done = set()
+        self._arrays: Dict[str, np.ndarray] = {}
+        if len(df) < 50:
+            self._keys = []  # Not enough data, like calculate_all
+        else:
+            self._keys = [
+                key for group in INDICATOR_GROUPS for key in group
+                if key != 'ema_200' or len(df) >= 200
+            ]
+    
+    def __getitem__(self, key: str) -> float:
+        if key not in self._values:
+            if key not in self._keys:
+                raise KeyError(key)
+            self._compute(GROUP_OF[key])
+            if key not in self._values:
+                raise KeyError(key)  # Its group failed to compute
+        return self._values[key]
+    
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._keys)
+    
+    def __len__(self) -> int:
+        return len(self._keys)
+    
+    def require(self, *consumers):
+        """Compute up front what the given keys or @requires_indicators functions read"""
+        for consumer in consumers:
+            keys = (consumer,) if isinstance(consumer, str) else getattr(consumer, 'required_indicators', ())
+            for key in keys:
+                if key in self._keys:
+                    self._compute(GROUP_OF[key])
+        return self
+    
+    def series(self, key: str) -> np.ndarray:
+        """
+        Full history of an indicator, one value per candle (NaN during warm-up)
         
+        Always computed with the NumPy kernels, which match ta to float precision.
+        """
+        name = f'series:{key}'
+        if name not in self._arrays:
+            close = self._array('close')
+            if key == 'rsi':
+                computed = {'rsi': indicator_kernels.rsi(close, 14)}
+            elif key in ('macd', 'macd_signal', 'macd_diff'):
+                computed = dict(zip(('macd', 'macd_signal', 'macd_diff'), indicator_kernels.macd(close)))
+            elif key.startswith('ema_') and key[4:].isdigit():
+                computed = {key: indicator_kernels.ema(close, span=int(key[4:]))}
+            else:
+                computed = indicator_kernels.compute_all(
+                    self._array('open'), self._array('high'), self._array('low'),
+                    close, self._array('volume')
+                )
+            self._arrays.update({f'series:{k}': v for k, v in computed.items()})
+            if name not in self._arrays:
+                raise KeyError(key)
+        return self._arrays[name]
+    
+    def to_dict(self) -> Dict[str, float]:
+        """Every indicator, stopping at the first failing group like calculate_all did"""
         indicators = {}
+        for key in self._keys:
+            self._compute(GROUP_OF[key])
+            if key not in self._values:
+                break
+            indicators[key] = self._values[key]
+        return indicators
+    
+    def _compute(self, group: tuple):
+        if group in self._done:
+            return
+        self._done.add(group)
+        try:
+            self._values.update(self._calculate(group[0]))
+        except Exception as e:
+            print(f"Error calculating indicators: {str(e)}")
+    
+    def _array(self, name: str) -> np.ndarray:
+        if name not in self._arrays:
+            if name == 'true_range':
+                value = indicator_kernels.true_range(self._array('high'), self._array('low'), self._array('close'))
+            else:
+                value = self.df[name].to_numpy(dtype=np.float64)
+            self._arrays[name] = value
+        return self._arrays[name]
+    
+    def _calculate(self, first_key: str) -> Dict[str, float]:
+        df = self.df
+        use_numpy = self.backend == "numpy"
         
-        # Ensure we have enough data
-        if len(df) < 50:
-            return indicators
+        # Moving Averages
+        if first_key.startswith('ema_'):
+            window = int(first_key[4:])
+            if use_numpy:
+                return {first_key: indicator_kernels.ema(self._array('close'), span=window)[-1]}
+            return {first_key: EMAIndicator(close=df['close'], window=window).ema_indicator().iloc[-1]}
         
-        try:
-            # Moving Averages
-            ema_9 = EMAIndicator(close=df['close'], window=9)
-            ema_21 = EMAIndicator(close=df['close'], window=21)
-            ema_50 = EMAIndicator(close=df['close'], window=50)
-            ema_200 = EMAIndicator(close=df['close'], window=200) if len(df) >= 200 else None
-            
-            indicators['ema_9'] = ema_9.ema_indicator().iloc[-1]
-            indicators['ema_21'] = ema_21.ema_indicator().iloc[-1]
-            indicators['ema_50'] = ema_50.ema_indicator().iloc[-1]
-            if ema_200:
-                indicators['ema_200'] = ema_200.ema_indicator().iloc[-1]
-            
-            # RSI
-            rsi = RSIIndicator(close=df['close'], window=14)
-            indicators['rsi'] = rsi.rsi().iloc[-1]
-            
-            # MACD
+        # RSI
+        if first_key == 'rsi':
+            if use_numpy:
+                return {'rsi': indicator_kernels.rsi(self._array('close'), 14)[-1]}
+            return {'rsi': RSIIndicator(close=df['close'], window=14).rsi().iloc[-1]}
+        
+        # MACD
+        if first_key == 'macd':
+            if use_numpy:
+                line, signal, diff = indicator_kernels.macd(self._array('close'))
+                return {'macd': line[-1], 'macd_signal': signal[-1], 'macd_diff': diff[-1]}
             macd = MACD(close=df['close'])
-            indicators['macd'] = macd.macd().iloc[-1]
-            indicators['macd_signal'] = macd.macd_signal().iloc[-1]
-            indicators['macd_diff'] = macd.macd_diff().iloc[-1]
-            
-            # Bollinger Bands
+            return {
+                'macd': macd.macd().iloc[-1],
+                'macd_signal': macd.macd_signal().iloc[-1],
+                'macd_diff': macd.macd_diff().iloc[-1],
+            }
+        
+        # Bollinger Bands
+        if first_key == 'bb_upper':
+            if use_numpy:
+                upper, middle, lower, width = indicator_kernels.bollinger(self._array('close'), 20, 2)
+                return {'bb_upper': upper[-1], 'bb_middle': middle[-1], 'bb_lower': lower[-1], 'bb_width': width[-1]}
             bb = BollingerBands(close=df['close'], window=20, window_dev=2)
-            indicators['bb_upper'] = bb.bollinger_hband().iloc[-1]
-            indicators['bb_middle'] = bb.bollinger_mavg().iloc[-1]
-            indicators['bb_lower'] = bb.bollinger_lband().iloc[-1]
-            indicators['bb_width'] = bb.bollinger_wband().iloc[-1]
-            
-            # Stochastic
+            return {
+                'bb_upper': bb.bollinger_hband().iloc[-1],
+                'bb_middle': bb.bollinger_mavg().iloc[-1],
+                'bb_lower': bb.bollinger_lband().iloc[-1],
+                'bb_width': bb.bollinger_wband().iloc[-1],
+            }
+        
+        # Stochastic
+        if first_key == 'stoch_k':
+            if use_numpy:
+                stoch_k, stoch_d = indicator_kernels.stochastic(
+                    self._array('close'),
+                    indicator_kernels.rolling_max(self._array('high'), 14),
+                    indicator_kernels.rolling_min(self._array('low'), 14)
+                )
+                return {'stoch_k': stoch_k[-1], 'stoch_d': stoch_d[-1]}
             stoch = StochasticOscillator(
                 high=df['high'],
                 low=df['low'],
@@ -57,38 +197,134 @@ class TechnicalIndicators:
                 window=14,
                 smooth_window=3
             )
-            indicators['stoch_k'] = stoch.stoch().iloc[-1]
-            indicators['stoch_d'] = stoch.stoch_signal().iloc[-1]
-            
-            # ADX (Trend Strength)
+            return {'stoch_k': stoch.stoch().iloc[-1], 'stoch_d': stoch.stoch_signal().iloc[-1]}
+        
+        # ADX (Trend Strength)
+        if first_key == 'adx':
+            if use_numpy:
+                adx, adx_pos, adx_neg = indicator_kernels.adx(
+                    self._array('high'), self._array('low'), self._array('true_range'), 14
+                )
+                return {'adx': adx[-1], 'adx_pos': adx_pos[-1], 'adx_neg': adx_neg[-1]}
             adx = ADXIndicator(high=df['high'], low=df['low'], close=df['close'], window=14)
-            indicators['adx'] = adx.adx().iloc[-1]
-            indicators['adx_pos'] = adx.adx_pos().iloc[-1]
-            indicators['adx_neg'] = adx.adx_neg().iloc[-1]
-            
-            # ATR (Volatility)
+            return {'adx': adx.adx().iloc[-1], 'adx_pos': adx.adx_pos().iloc[-1], 'adx_neg': adx.adx_neg().iloc[-1]}
+        
+        # ATR (Volatility)
+        if first_key == 'atr':
+            if use_numpy:
+                return {'atr': indicator_kernels.atr(self._array('true_range'), 14)[-1]}
             atr = AverageTrueRange(high=df['high'], low=df['low'], close=df['close'], window=14)
-            indicators['atr'] = atr.average_true_range().iloc[-1]
-            
-            # Current price
-            indicators['current_price'] = df['close'].iloc[-1]
-            
-            # Price position relative to EMAs
+            return {'atr': atr.average_true_range().iloc[-1]}
+        
+        # Current price and position relative to EMAs
+        if first_key == 'current_price':
             current_price = df['close'].iloc[-1]
-            indicators['price_above_ema21'] = 1 if current_price > indicators['ema_21'] else 0
-            indicators['price_above_ema50'] = 1 if current_price > indicators['ema_50'] else 0
-            
-            # Volume analysis
-            indicators['volume'] = df['volume'].iloc[-1]
-            indicators['avg_volume_20'] = df['volume'].tail(20).mean()
-            indicators['volume_ratio'] = indicators['volume'] / indicators['avg_volume_20']
-            
-        except Exception as e:
-            print(f"Error calculating indicators: {str(e)}")
+            return {
+                'current_price': current_price,
+                'price_above_ema21': 1 if current_price > self['ema_21'] else 0,
+                'price_above_ema50': 1 if current_price > self['ema_50'] else 0,
+            }
         
-        return indicators
+        # Volume analysis
+        volume = df['volume'].iloc[-1]
+        avg_volume_20 = df['volume'].tail(20).mean()
+        return {'volume': volume, 'avg_volume_20': avg_volume_20, 'volume_ratio': volume / avg_volume_20}
+
+
+class TechnicalIndicators:
+    """Calculate various technical indicators for trading signals"""
+    
+    # "ta" (ta library objects) or "numpy" (services.indicator_kernels)
+    backend = "ta"
+    BACKENDS = ("ta", "numpy")
+    
+    @staticmethod
+    def set_backend(backend: str):
+        """Choose the default calculate_all backend"""
+        if backend not in TechnicalIndicators.BACKENDS:
+            raise ValueError(f"Unknown indicator backend: {backend}")
+        TechnicalIndicators.backend = backend
+    
+    @staticmethod
+    def calculate_all(df: pd.DataFrame, backend: str = None) -> Dict[str, float]:
+        """Calculate all technical indicators and return as dictionary"""
+        return LazyIndicators(df, backend).to_dict()
+    
+    @staticmethod
+    def lazy(df: pd.DataFrame, *consumers, backend: str = None) -> LazyIndicators:
+        """
+        Indicators computed on first access
+        
+        `consumers` are indicator keys or @requires_indicators functions whose
+        needs are computed up front; anything else is computed when read.
+        """
+        return LazyIndicators(df, backend).require(*consumers)
+    
+    @staticmethod
+    def calculate_batch(frames: Dict[str, pd.DataFrame], limit: int = None) -> pd.DataFrame:
+        """
+        calculate_all for many symbols in one vectorized pass
+        
+        Frames are aligned on their last `limit` candles (default: the length of
+        the shortest frame) and stacked into a (symbols x candles) block. Symbols
+        with fewer than 50 candles are left out, as calculate_all would.
+        
+        Returns one row per symbol, one column per indicator.
+        """
+        frames = {symbol: df for symbol, df in frames.items() if len(df) >= 50}
+        if not frames:
+            return pd.DataFrame()
+        
+        length = min(len(df) for df in frames.values())
+        if limit:
+            length = min(length, limit)
+        
+        columns = ('open', 'high', 'low', 'close', 'volume')
+        block = {
+            column: np.vstack([df[column].to_numpy(dtype=np.float64)[-length:] for df in frames.values()])
+            for column in columns
+        }
+        return TechnicalIndicators.calculate_block(list(frames), *(block[c] for c in columns))
+    
+    @staticmethod
+    def calculate_block(
+        symbols: List[str],
+        open_: np.ndarray,
+        high: np.ndarray,
+        low: np.ndarray,
+        close: np.ndarray,
+        volume: np.ndarray
+    ) -> pd.DataFrame:
+        """Indicator table for a (symbols x candles) OHLCV block, same columns as calculate_all"""
+        length = close.shape[-1]
+        if length < 50:
+            return pd.DataFrame(index=pd.Index(symbols, name='symbol'))
+        
+        series = indicator_kernels.compute_all(open_, high, low, close, volume)
+        
+        keys = ['ema_9', 'ema_21', 'ema_50']
+        if length >= 200:
+            keys.append('ema_200')
+        keys += [
+            'rsi', 'macd', 'macd_signal', 'macd_diff',
+            'bb_upper', 'bb_middle', 'bb_lower', 'bb_width',
+            'stoch_k', 'stoch_d', 'adx', 'adx_pos', 'adx_neg', 'atr'
+        ]
+        table = {key: series[key][:, -1] for key in keys}
+        
+        current_price = close[:, -1]
+        table['current_price'] = current_price
+        table['price_above_ema21'] = (current_price > table['ema_21']).astype(int)
+        table['price_above_ema50'] = (current_price > table['ema_50']).astype(int)
+        
+        table['volume'] = volume[:, -1]
+        table['avg_volume_20'] = series['avg_volume_20'][:, -1]
+        table['volume_ratio'] = table['volume'] / table['avg_volume_20']
+        
+        return pd.DataFrame(table, index=pd.Index(symbols, name='symbol'))
     
     @staticmethod
+    @requires_indicators('ema_9', 'ema_21', 'ema_50', 'adx')
     def detect_trend(df: pd.DataFrame, indicators: Dict[str, float]) -> str:
         """Detect overall market trend"""
         
@@ -116,6 +352,7 @@ class TechnicalIndicators:
             return "NEUTRAL"
     
     @staticmethod
+    @requires_indicators('bb_width', 'atr', 'current_price')
     def detect_volatility(indicators: Dict[str, float]) -> str:
         """Detect market volatility level"""
         
@@ -0,0 +1,98 @@
+"""
+Key Level Index
+Price bands around ICT key levels, indexed for point and nearest-level lookups
+"""
+from typing import Dict, List, Optional, Tuple, Union
+import numpy as np
+from services.zones import ZoneSet, KEY_LEVEL
+
+
+def as_key_levels(levels: Union[ZoneSet, List[Dict]]) -> ZoneSet:
+    """KEY_LEVEL ZoneSet of `levels`, converting a list of level dicts"""
+    if isinstance(levels, ZoneSet):
+        return levels
+    return ZoneSet.from_dicts(KEY_LEVEL, levels)
+
+
+def level_bands(levels: Union[ZoneSet, List[Dict]], tolerance_pct: float = 0.3) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    (lower, upper) band edges of key levels: [low - tolerance, high + tolerance]
+
+    `high`/`low` default to `price`; the tolerance is a percentage of `price`.
+    """
+    levels = as_key_levels(levels)
+    price = levels['price']
+    high = np.where(np.isnan(levels['high']), price, levels['high'])
+    low = np.where(np.isnan(levels['low']), price, levels['low'])
+    tolerance = price * (tolerance_pct / 100)
+    return low - tolerance, high + tolerance
+
+
+class KeyLevelIndex:
+    """
+    Tolerance bands of key levels, built once and queried per price
+
+    Each level (a KEY_LEVEL row, or a {"price", optional "high"/"low",
+    "confluence"} dict) covers its level_bands band. Lookups return levels
+    as plain dicts.
+
+    Bands are kept sorted by their lower edge. A lookup binary-searches the
+    levels whose band starts within one band width below the price, checks
+    their upper edges and ranks the matches by confluence, highest first,
+    insertion order on ties.
+    """
+
+    def __init__(self, levels: Union[ZoneSet, List[Dict]], tolerance_pct: float = 0.3):
+        self.levels = as_key_levels(levels)
+        self.tolerance_pct = tolerance_pct
+        count = len(self.levels)
+
+        self.lower, self.upper = level_bands(self.levels, tolerance_pct)
+        self.confluence = self.levels['confluence'].astype(np.float64)
+        order = np.arange(count)
+
+        # Candidates for a price: lower edge in [price - widest band, price]
+        # (widened a hair so float rounding can't drop a band ending at price)
+        self._by_lower = np.argsort(self.lower, kind='stable')
+        self._sorted_lower = self.lower[self._by_lower]
+        self._max_width = float(np.max(self.upper - self.lower)) * (1 + 1e-9) if count else 0.0
+
+        # Nearest band above (by lower edge) / below (by upper edge); the
+        # higher-confluence level wins a tie on the edge
+        self._above = np.lexsort((order, -self.confluence, self.lower))
+        self._below = np.lexsort((-order, self.confluence, self.upper))
+        self._above_edges = self.lower[self._above]
+        self._below_edges = self.upper[self._below]
+
+    def __len__(self) -> int:
+        return len(self.levels)
+
+    def containing(self, price: float) -> List[Dict]:
+        """Every level whose band contains `price`, highest confluence first"""
+        return self.levels[self._containing(price)].to_list()
+
+    def best(self, price: float) -> Optional[Dict]:
+        """Highest-confluence level whose band contains `price`, or None"""
+        matches = self._containing(price)
+        return self._level(matches[0]) if len(matches) else None
+
+    def nearest_above(self, price: float) -> Optional[Dict]:
+        """Level with the closest band entirely above `price`, or None"""
+        j = int(np.searchsorted(self._above_edges, price, side='right'))
+        return self._level(self._above[j]) if j < len(self.levels) else None
+
+    def nearest_below(self, price: float) -> Optional[Dict]:
+        """Level with the closest band entirely below `price`, or None"""
+        j = int(np.searchsorted(self._below_edges, price, side='left')) - 1
+        return self._level(self._below[j]) if j >= 0 else None
+
+    def _level(self, i: int) -> Dict:
+        return self.levels[i:i + 1].to_list()[0]
+
+    def _containing(self, price: float) -> np.ndarray:
+        first = np.searchsorted(self._sorted_lower, price - self._max_width, side='left')
+        last = np.searchsorted(self._sorted_lower, price, side='right')
+        candidates = self._by_lower[first:last]
+        matches = candidates[self.upper[candidates] >= price]
+        # Highest confluence first, insertion order on ties
+        return matches[np.lexsort((matches, -self.confluence[matches]))]
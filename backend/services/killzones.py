@@ -0,0 +1,115 @@
+"""
+Killzones
+ICT killzone labels for single timestamps and whole candle indexes
+"""
+from functools import lru_cache
+from typing import Dict, Tuple
+import numpy as np
+import pandas as pd
+import pytz
+
+EASTERN = pytz.timezone('US/Eastern')
+
+# (name, start hour, end hour (exclusive), multiplier, description), in US/Eastern.
+# Earlier entries win where windows overlap (New York AM over London Close)
+KILLZONES = (
+    ("London Open", 2, 5, 1.3, "High probability setup window"),
+    ("New York AM", 8, 11, 1.5, "Highest probability setup window"),
+    ("London Close", 10, 12, 1.2, "Medium probability setup window"),
+)
+OUTSIDE_KILLZONE = (None, 1.0, "Outside killzone - lower probability")
+
+
+def _hour_codes() -> np.ndarray:
+    codes = np.zeros(24, dtype=np.int8)
+    # Fill later windows first so earlier ones take the overlap
+    for code in range(len(KILLZONES), 0, -1):
+        _, start, end, _, _ = KILLZONES[code - 1]
+        codes[start:end] = code
+    return codes
+
+
+# Killzone code per local hour: 0 is outside, k is KILLZONES[k - 1]
+HOUR_CODES = _hour_codes()
+
+NAMES = np.array([OUTSIDE_KILLZONE[0]] + [zone[0] for zone in KILLZONES], dtype=object)
+MULTIPLIERS = np.array([OUTSIDE_KILLZONE[1]] + [zone[3] for zone in KILLZONES])
+
+
+def killzone_for_hour(hour: int) -> Dict:
+    """is_in_killzone result for a US/Eastern hour"""
+    code = HOUR_CODES[hour]
+    if code == 0:
+        name, multiplier, description = OUTSIDE_KILLZONE
+    else:
+        name, _, _, multiplier, description = KILLZONES[code - 1]
+    return {
+        "in_killzone": bool(code),
+        "killzone_name": name,
+        "probability_multiplier": multiplier,
+        "description": description
+    }
+
+
+@lru_cache(maxsize=None)
+def utc_transitions(tz: pytz.BaseTzInfo = EASTERN) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    (UTC transition times in int64 seconds, UTC offsets in seconds) of a pytz zone
+
+    A time t has offset `offsets[searchsorted(transitions, t, side='right')]`,
+    the same lookup pytz does per datetime in `fromutc`. Fixed-offset zones
+    have no transitions and a single offset.
+    """
+    times = getattr(tz, '_utc_transition_times', None)
+    if not times:
+        return np.empty(0, dtype=np.int64), np.array([int(tz.utcoffset(None).total_seconds())])
+
+    # The first entry is pytz's datetime.min sentinel (offset before any transition)
+    transitions = np.array(times[1:], dtype='datetime64[s]').astype(np.int64)
+    offsets = np.array([int(info[0].total_seconds()) for info in tz._transition_info], dtype=np.int64)
+    return transitions, offsets
+
+
+def local_hours(index: pd.DatetimeIndex, tz: pytz.BaseTzInfo = EASTERN) -> np.ndarray:
+    """
+    Wall-clock hour in `tz` of every timestamp (naive timestamps are UTC)
+
+    Works on the index's raw integers in its own unit: the zone's few UTC
+    transitions are located once (a binary search per timestamp, or per
+    transition when the index is sorted) instead of a pytz conversion per row.
+    """
+    index = pd.DatetimeIndex(index)
+    if index.tz is not None:
+        index = index.tz_convert('UTC').tz_localize(None)
+
+    values = index.asi8
+    per_second = int(np.timedelta64(1, 's') // np.timedelta64(1, index.unit))
+    transitions, offsets = utc_transitions(tz)
+    transitions = transitions * per_second
+    offsets = offsets * per_second
+
+    if index.is_monotonic_increasing:
+        # Timestamps between consecutive transitions share one offset
+        cuts = np.searchsorted(values, transitions, side='left')
+        offset = np.repeat(offsets, np.diff(cuts, prepend=0, append=len(values)))
+    else:
+        offset = offsets[np.searchsorted(transitions, values, side='right')]
+    return (values + offset) // (3600 * per_second) % 24
+
+
+def label_killzones(index: pd.DatetimeIndex) -> pd.DataFrame:
+    """
+    Killzone of every candle in `index` (naive timestamps are UTC)
+
+    Columns in_killzone, killzone_name (categorical, missing outside
+    killzones) and probability_multiplier, as SMCStrategy.is_in_killzone
+    would give for each timestamp. NaT is outside every killzone.
+    """
+    index = pd.DatetimeIndex(index)
+    codes = HOUR_CODES[local_hours(index)]
+    codes[index.isna()] = 0
+    return pd.DataFrame({
+        'in_killzone': codes > 0,
+        'killzone_name': pd.Categorical.from_codes(codes - 1, categories=NAMES[1:]),
+        'probability_multiplier': MULTIPLIERS[codes],
+    }, index=index)
@@ -0,0 +1,122 @@
+"""
+Level Watch
+Pending-setup price bands for many streams, checked against batched ticker prices
+"""
+from typing import Dict, Hashable, List, Union
+import numpy as np
+from services.key_levels import level_bands
+from services.zones import ZoneSet
+
+
+class LevelWatchIndex:
+    """
+    Key-level bands of every pending setup, keyed by stream
+
+    A stream (e.g. (symbol, timeframe)) whose setup is waiting for price to
+    reach a level registers that level list with `watch`. `update` takes one
+    batch of ticker prices and returns the streams whose symbol price has
+    entered one of their bands since the last price seen, all in a single
+    vectorized pass over every band. Triggered streams are dropped from the
+    index; they are re-registered after their signal is recomputed.
+
+    Bands are level_bands of the levels, so "inside a band" means the same as
+    SMCStrategy.check_price_at_key_level finding a level.
+    """
+
+    def __init__(self, tolerance_pct: float = 0.3):
+        self.tolerance_pct = tolerance_pct
+        # stream -> (symbol, lower edges, upper edges, inside flags, owner)
+        self._watches: Dict[Hashable, tuple] = {}
+        self._columns = None  # Concatenated bands of every watch, rebuilt after changes
+
+    def __len__(self) -> int:
+        return len(self._watches)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._watches
+
+    def symbols(self) -> List[str]:
+        """Symbols with at least one watched stream"""
+        return list(dict.fromkeys(watch[0] for watch in self._watches.values()))
+
+    def watch(
+        self,
+        key: Hashable,
+        symbol: str,
+        levels: Union[ZoneSet, List[Dict]],
+        price: float = None,
+        owner: object = None
+    ):
+        """
+        Watch `levels` for one stream, replacing anything it watched before
+
+        `price` is the symbol price the levels were computed against: bands it
+        is already inside don't trigger until price leaves and comes back.
+        `owner` tags the watch so a stale owner's unwatch can't remove it.
+        """
+        if not levels:
+            self.unwatch(key)
+            return
+
+        lower, upper = level_bands(levels, self.tolerance_pct)
+        if price is None:
+            inside = np.zeros(len(lower), dtype=bool)
+        else:
+            inside = (lower <= price) & (price <= upper)
+        self._watches[key] = (symbol, lower, upper, inside, owner)
+        self._columns = None
+
+    def unwatch(self, key: Hashable, owner: object = None):
+        """Stop watching a stream; with `owner`, only if that owner registered the watch"""
+        watch = self._watches.get(key)
+        if watch is None or (owner is not None and watch[4] is not owner):
+            return
+        del self._watches[key]
+        self._columns = None
+
+    def update(self, prices: Dict[str, float]) -> List[Hashable]:
+        """Feed a batch of {symbol: price}; returns (and drops) the streams that triggered"""
+        if not self._watches:
+            return []
+
+        columns = self._build()
+        latest = np.array([prices.get(symbol, np.nan) for symbol in columns['symbols']], dtype=np.float64)
+
+        price = latest[columns['symbol_ids']]
+        seen = ~np.isnan(price)
+        inside = columns['inside']
+        now_inside = (columns['lower'] <= price) & (price <= columns['upper'])
+        entered = now_inside & ~inside & seen
+        inside[seen] = now_inside[seen]
+
+        triggered = [columns['keys'][i] for i in np.unique(columns['owners'][entered])]
+        for key in triggered:
+            self.unwatch(key)
+        return triggered
+
+    def _build(self) -> Dict:
+        if self._columns is not None:
+            return self._columns
+
+        keys = list(self._watches)
+        symbols = self.symbols()
+        symbol_index = {symbol: i for i, symbol in enumerate(symbols)}
+        watches = [self._watches[key] for key in keys]
+        sizes = [len(watch[1]) for watch in watches]
+        offsets = np.concatenate([[0], np.cumsum(sizes)]).astype(int)
+
+        self._columns = {
+            'keys': keys,
+            'symbols': symbols,
+            'symbol_ids': np.repeat([symbol_index[watch[0]] for watch in watches], sizes),
+            'owners': np.repeat(np.arange(len(keys)), sizes),
+            'lower': np.concatenate([watch[1] for watch in watches]),
+            'upper': np.concatenate([watch[2] for watch in watches]),
+            'inside': np.concatenate([watch[3] for watch in watches]),
+        }
+
+        # Each watch's inside flags become a view of the column, so updates
+        # to the column carry over when it is rebuilt
+        for key, watch, start, stop in zip(keys, watches, offsets[:-1], offsets[1:]):
+            self._watches[key] = watch[:3] + (self._columns['inside'][start:stop],) + watch[4:]
+        return self._columns
@@ -1,79 +1,300 @@
 import ccxt
 import pandas as pd
 from datetime import datetime
-from typing import List, Dict
+from typing import Iterable, List, Dict
 import asyncio
+import time
+from services.candle_store import CandleStore
+from services.candle_resampler import CandleResampler
+from services.request_coalescer import RequestCoalescer
+
+try:
+    import aiohttp
+    import ccxt.async_support as ccxt_async
+except ImportError:  # Async backend unavailable, thread backend still works
+    aiohttp = None
+    ccxt_async = None
+
+EXCHANGE_CONFIG = {
+    'enableRateLimit': True,
+    'options': {
+        'defaultType': 'future',  # Use perpetual futures
+    }
+}
 
 class PriceService:
-    def __init__(self, exchange_id: str = "binance"):
+    def __init__(
+        self,
+        exchange_id: str = "binance",
+        max_candles: int = 1000,
+        backend: str = "thread",
+        pool_size: int = 100,
+        cache_ttl: float = 2.0,
+        resample_targets: Iterable[str] = ()
+    ):
+        """
+        Args:
+            exchange_id: ccxt exchange id
+            max_candles: Candles of history kept per (symbol, timeframe)
+            backend: "thread" (sync ccxt in worker threads) or "async" (ccxt.async_support)
+            pool_size: Max open HTTP connections for the async backend
+            cache_ttl: Seconds an identical ticker/OHLCV result is reused
+            resample_targets: Timeframes callers resample to - lower timeframes
+                that can build them get `max_candles` of history on first fetch
+        """
+        if backend not in ("thread", "async"):
+            raise ValueError(f"Unknown exchange backend: {backend}")
+        if backend == "async" and ccxt_async is None:
+            raise ValueError("Async exchange backend requires aiohttp and ccxt.async_support")
+        
         self.exchange_id = exchange_id
-        self.exchange = getattr(ccxt, exchange_id)({
-            'enableRateLimit': True,
-            'options': {
-                'defaultType': 'future',  # Use perpetual futures
-            }
+        self.backend = backend
+        self.pool_size = pool_size
+        # Sync client: thread backend requests + timeframe/clock helpers for both backends
+        self.exchange = getattr(ccxt, exchange_id)(dict(EXCHANGE_CONFIG))
+        self.async_exchange = None
+        self._session = None
+        # Local candle history - only candles newer than the last stored one are fetched
+        self.candle_store = CandleStore(max_candles=max_candles)
+        # Identical concurrent requests share one exchange call
+        self.coalescer = RequestCoalescer(ttl=cache_ttl)
+        self.resample_targets = tuple(resample_targets)
+        # (symbol, timeframe) whose stored history is all the exchange has
+        self._complete_history = set()
+    
+    async def start(self):
+        """Open the pooled async exchange client (no-op for the thread backend)"""
+        if self.backend != "async" or self.async_exchange is not None:
+            return
+        
+        # One shared connection pool for every in-flight exchange request
+        connector = aiohttp.TCPConnector(
+            limit=self.pool_size,
+            limit_per_host=self.pool_size,
+            enable_cleanup_closed=True
+        )
+        self._session = aiohttp.ClientSession(connector=connector)
+        self.async_exchange = getattr(ccxt_async, self.exchange_id)({
+            **EXCHANGE_CONFIG,
+            'session': self._session,
         })
     
+    async def close(self):
+        """Close the async exchange client and its connection pool"""
+        if self.async_exchange is not None:
+            await self.async_exchange.close()
+            self.async_exchange = None
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+    
+    async def _fetch_ticker(self, symbol: str) -> Dict:
+        if self.backend == "async":
+            await self.start()
+            return await self.async_exchange.fetch_ticker(symbol)
+        return await asyncio.to_thread(self.exchange.fetch_ticker, symbol)
+    
+    async def _fetch_tickers(self, symbols: List[str]) -> Dict:
+        if self.backend == "async":
+            await self.start()
+            return await self.async_exchange.fetch_tickers(symbols)
+        return await asyncio.to_thread(self.exchange.fetch_tickers, symbols)
+    
+    async def _fetch_ohlcv(self, symbol: str, timeframe: str, since: int = None, limit: int = None) -> List:
+        if self.backend == "async":
+            await self.start()
+            return await self.async_exchange.fetch_ohlcv(symbol, timeframe, since=since, limit=limit)
+        return await asyncio.to_thread(
+            self.exchange.fetch_ohlcv,
+            symbol,
+            timeframe,
+            since=since,
+            limit=limit
+        )
+    
     async def get_current_price(self, symbol: str) -> Dict:
         """Fetch current price for a symbol"""
         try:
-            ticker = await asyncio.to_thread(self.exchange.fetch_ticker, symbol)
-            return {
-                "symbol": symbol,
-                "price": ticker['last'],
-                "timestamp": datetime.now().isoformat(),
-                "change_24h": ticker.get('percentage'),
-                "volume_24h": ticker.get('quoteVolume'),
-                "high_24h": ticker.get('high'),
-                "low_24h": ticker.get('low'),
-            }
+            ticker = await self.coalescer.run(
+                ("ticker", symbol),
+                lambda: self._fetch_ticker(symbol)
+            )
+            return self._format_ticker(symbol, ticker)
         except Exception as e:
             raise Exception(f"Error fetching price: {str(e)}")
     
-    async def get_ohlcv(self, symbol: str, timeframe: str = "15m", limit: int = 100) -> List:
-        """Fetch OHLCV (candlestick) data"""
+    async def get_current_prices(self, symbols: List[str]) -> Dict[str, Dict]:
+        """
+        Fetch current prices for several symbols with one fetch_tickers call
+        
+        Each ticker is also cached under its single-symbol key, so follow-up
+        get_current_price calls within the freshness window cost nothing.
+        """
         try:
-            ohlcv = await asyncio.to_thread(
-                self.exchange.fetch_ohlcv, 
-                symbol, 
-                timeframe, 
-                limit=limit
+            symbols = list(dict.fromkeys(symbols))
+            tickers = await self.coalescer.run(
+                ("tickers", tuple(sorted(symbols))),
+                lambda: self._fetch_tickers(symbols)
             )
             
-            # Convert to more readable format
-            formatted_data = []
-            for candle in ohlcv:
-                formatted_data.append({
-                    "timestamp": candle[0],
-                    "open": candle[1],
-                    "high": candle[2],
-                    "low": candle[3],
-                    "close": candle[4],
-                    "volume": candle[5]
-                })
+            prices = {}
+            for symbol in symbols:
+                ticker = tickers.get(symbol)
+                if ticker is None:
+                    continue
+                self.coalescer.prime(("ticker", symbol), ticker)
+                prices[symbol] = self._format_ticker(symbol, ticker)
             
-            return formatted_data
+            return prices
+        except Exception as e:
+            raise Exception(f"Error fetching prices: {str(e)}")
+    
+    @staticmethod
+    def _format_ticker(symbol: str, ticker: Dict) -> Dict:
+        return {
+            "symbol": symbol,
+            "price": ticker['last'],
+            "timestamp": datetime.now().isoformat(),
+            "change_24h": ticker.get('percentage'),
+            "volume_24h": ticker.get('quoteVolume'),
+            "high_24h": ticker.get('high'),
+            "low_24h": ticker.get('low'),
+        }
+    
+    async def get_ohlcv(self, symbol: str, timeframe: str = "15m", limit: int = 100) -> List:
+        """Fetch OHLCV (candlestick) data"""
+        try:
+            return await self.coalescer.run(
+                ("ohlcv", symbol, timeframe, limit),
+                lambda: self._load_ohlcv(symbol, timeframe, limit)
+            )
         except Exception as e:
             raise Exception(f"Error fetching OHLCV: {str(e)}")
     
     async def get_ohlcv_df(self, symbol: str, timeframe: str = "15m", limit: int = 200) -> pd.DataFrame:
         """Fetch OHLCV data as pandas DataFrame for technical analysis"""
         try:
-            ohlcv = await asyncio.to_thread(
-                self.exchange.fetch_ohlcv,
+            df = await self.coalescer.run(
+                ("ohlcv_df", symbol, timeframe, limit),
+                lambda: self._sync_ohlcv(symbol, timeframe, limit)
+            )
+            # Callers share the coalesced frame - hand each one its own copy
+            return df.copy()
+        except Exception as e:
+            raise Exception(f"Error fetching OHLCV DataFrame: {str(e)}")
+    
+    async def _load_ohlcv(self, symbol: str, timeframe: str, limit: int) -> List:
+        df = await self._sync_ohlcv(symbol, timeframe, limit)
+        
+        # Convert to more readable format
+        formatted_data = []
+        for timestamp, candle in zip(df.index, df.itertuples(index=False)):
+            formatted_data.append({
+                "timestamp": int(timestamp.timestamp() * 1000),
+                "open": float(candle.open),
+                "high": float(candle.high),
+                "low": float(candle.low),
+                "close": float(candle.close),
+                "volume": float(candle.volume)
+            })
+        
+        return formatted_data
+    
+    async def _sync_ohlcv(self, symbol: str, timeframe: str, limit: int) -> pd.DataFrame:
+        """
+        Bring the local candle store up to date and return the last `limit` candles
+        
+        The first request (or one that needs more history than is stored) does a
+        full fetch: up to `max_candles` if the timeframe is a resampling source
+        for one of `resample_targets`, otherwise just `limit`. After that only
+        candles from the newest stored open time onwards are requested via
+        `since`, which also refreshes the still-forming candle. A full fetch that
+        returns fewer candles than asked for holds the exchange's whole history,
+        so shorter stored history doesn't trigger another one.
+        """
+        store = self.candle_store
+        key = (symbol, timeframe)
+        stored = store.get(self.exchange_id, symbol, timeframe)
+        last_ts = store.last_timestamp_ms(self.exchange_id, symbol, timeframe)
+        
+        missing = None
+        if stored is not None and last_ts is not None and \
+                (len(stored) >= limit or key in self._complete_history):
+            timeframe_ms = self.exchange.parse_timeframe(timeframe) * 1000
+            missing = int((self.exchange.milliseconds() - last_ts) // timeframe_ms) + 1
+        
+        if missing is None or missing > limit:
+            # Nothing usable stored, or the gap is wider than the requested window
+            depth = max(limit, store.max_candles) if self._is_resample_source(timeframe) else limit
+            ohlcv = await self._fetch_ohlcv(symbol, timeframe, limit=depth)
+            store.merge(self.exchange_id, symbol, timeframe, ohlcv, replace=True, keep=limit)
+            if len(ohlcv) < depth:
+                self._complete_history.add(key)
+            else:
+                self._complete_history.discard(key)
+        else:
+            ohlcv = await self._fetch_ohlcv(
                 symbol,
                 timeframe,
-                limit=limit
+                since=last_ts,
+                limit=missing + 2  # Small margin for clock skew between us and the exchange
             )
+            store.merge(self.exchange_id, symbol, timeframe, ohlcv, keep=limit)
+        
+        return store.window(self.exchange_id, symbol, timeframe, limit)
+    
+    def _is_resample_source(self, timeframe: str) -> bool:
+        """True if some resample target can be built from `timeframe` candles"""
+        return any(CandleResampler.can_resample(timeframe, target) for target in self.resample_targets)
+    
+    async def get_resampled_ohlcv_df(
+        self,
+        symbol: str,
+        timeframe: str,
+        limit: int = 200,
+        min_candles: int = None,
+        max_age: float = 60.0
+    ) -> pd.DataFrame:
+        """
+        Build `timeframe` candles from lower-timeframe history already held locally
+        
+        Falls back to a normal exchange fetch when no recently synced lower timeframe
+        has enough history to produce `min_candles` (defaults to `limit`) candles.
+        """
+        df = self._resample_from_store(symbol, timeframe, limit, min_candles or limit, max_age)
+        if df is not None:
+            return df
+        return await self.get_ohlcv_df(symbol, timeframe, limit)
+    
+    def _resample_from_store(
+        self, symbol: str, timeframe: str, limit: int, min_candles: int, max_age: float
+    ) -> pd.DataFrame:
+        store = self.candle_store
+        now = time.monotonic()
+        best = None
+        best_span_ms = 0
+        
+        for source_tf in store.timeframes(self.exchange_id, symbol):
+            if not CandleResampler.can_resample(source_tf, timeframe):
+                continue
+            synced_at = store.synced_at(self.exchange_id, symbol, source_tf)
+            if synced_at is None or now - synced_at > max_age:
+                continue  # Stale source would hide the latest candles
             
-            df = pd.DataFrame(
-                ohlcv,
-                columns=['timestamp', 'open', 'high', 'low', 'close', 'volume']
-            )
-            df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
-            df.set_index('timestamp', inplace=True)
+            source = store.get(self.exchange_id, symbol, source_tf)
+            if CandleResampler.expected_candles(len(source), source_tf, timeframe) < min_candles:
+                continue
             
-            return df
-        except Exception as e:
-            raise Exception(f"Error fetching OHLCV DataFrame: {str(e)}")
-
+            # Prefer the source covering the longest stretch of history
+            span_ms = len(source) * CandleResampler.timeframe_ms(source_tf)
+            if span_ms > best_span_ms:
+                best, best_span_ms = (source_tf, source), span_ms
+        
+        if best is None:
+            return None
+        
+        source_tf, source = best
+        resampled = CandleResampler.resample(source, source_tf, timeframe)
+        if len(resampled) < min_candles:
+            return None
+        return resampled.tail(limit)
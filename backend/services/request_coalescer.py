@@ -0,0 +1,84 @@
+"""
+Request Coalescer
+Single-flight execution for identical exchange requests
+"""
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+
+class RequestCoalescer:
+    """
+    Share one in-flight request between concurrent callers with the same key
+
+    While a request for a key is running, every other caller awaits the same
+    future instead of issuing its own. Successful results are then reused for
+    `ttl` seconds. Errors are never cached - all waiters get the exception and
+    the next call retries.
+    """
+
+    def __init__(self, ttl: float = 2.0, max_entries: int = 1000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self._results: Dict[Hashable, Tuple[float, Any]] = {}
+
+    async def run(self, key: Hashable, factory: Callable[[], Awaitable], ttl: float = None) -> Any:
+        """
+        Return a fresh cached result, join an in-flight request, or start one
+
+        Args:
+            key: Identity of the request, e.g. ("ohlcv_df", symbol, timeframe, limit)
+            factory: Zero-argument coroutine function performing the request
+            ttl: Freshness window override in seconds (0 disables result reuse)
+        """
+        ttl = self.ttl if ttl is None else ttl
+
+        cached = self._results.get(key)
+        if cached is not None and time.monotonic() - cached[0] < ttl:
+            return cached[1]
+
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._execute(key, factory, ttl))
+            # Retrieve the exception even if every waiter was cancelled
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+            self._inflight[key] = task
+
+        # Shield so one cancelled waiter does not cancel the shared request
+        return await asyncio.shield(task)
+
+    async def _execute(self, key: Hashable, factory: Callable[[], Awaitable], ttl: float) -> Any:
+        try:
+            result = await factory()
+            if ttl > 0:
+                self.prime(key, result)
+            return result
+        finally:
+            self._inflight.pop(key, None)
+
+    def prime(self, key: Hashable, value: Any):
+        """Store a result obtained elsewhere (e.g. from a batched request)"""
+        self._results[key] = (time.monotonic(), value)
+        if len(self._results) > self.max_entries:
+            self._evict()
+
+    def invalidate(self, key: Hashable = None):
+        """Drop one cached result, or all of them"""
+        if key is None:
+            self._results.clear()
+        else:
+            self._results.pop(key, None)
+
+    def _evict(self):
+        """Drop expired results, then the oldest ones if still over capacity"""
+        now = time.monotonic()
+        for key, (stored_at, _) in list(self._results.items()):
+            if now - stored_at >= self.ttl:
+                del self._results[key]
+
+        overflow = len(self._results) - self.max_entries
+        if overflow > 0:
+            oldest = sorted(self._results.items(), key=lambda item: item[1][0])[:overflow]
+            for key, _ in oldest:
+                del self._results[key]
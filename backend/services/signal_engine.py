@@ -0,0 +1,183 @@
+"""
+Signal Engine
+Computes each subscribed (symbol, timeframe) stream once per tick and fans it out
+"""
+import asyncio
+import time
+from datetime import datetime
+from typing import Callable, Dict, Optional, Tuple
+from services.candle_resampler import CandleResampler
+from services.level_watch import LevelWatchIndex
+from services.zones import ZoneSet
+
+StreamKey = Tuple[str, str]
+
+
+class SignalStream:
+    """One (symbol, timeframe) stream and its subscriber count"""
+
+    def __init__(self, symbol: str, timeframe: str):
+        self.symbol = symbol
+        self.timeframe = timeframe
+        self.subscribers = 0
+        self.task: Optional[asyncio.Task] = None
+        self.last_message: Optional[Dict] = None
+        self.wake = asyncio.Event()  # Set when price reaches a pending setup's level
+
+
+class SignalEngine:
+    """
+    Background signal computation shared by all websocket clients
+
+    Subscriptions are reference counted per (symbol, timeframe): the first
+    subscriber starts a loop that generates the signal every `interval`
+    seconds, the last one to leave stops it. Compute cost therefore grows with
+    the number of distinct streams, not the number of connected clients.
+
+    Each result is handed once to `publish(stream_key, message)`, which owns
+    delivery to the individual clients (see BroadcastHub).
+
+    While a stream's setup is pending (price not at a key level yet) it is not
+    recomputed on the interval. Its key levels and limit-order prices go into
+    a LevelWatchIndex instead, which one ticker poll every `watch_interval`
+    seconds checks for all streams at once. The stream is recomputed when
+    price enters one of those bands, when its candle closes (the levels
+    change), or after `watch_max_age` seconds at most. `watch_interval=0`
+    turns this off.
+    """
+
+    def __init__(
+        self,
+        signal_service,
+        publish: Callable[[StreamKey, Dict], None],
+        interval: float = 30.0,
+        watch_interval: float = 2.0,
+        watch_max_age: float = 300.0
+    ):
+        self.signal_service = signal_service
+        self.publish = publish
+        self.interval = interval
+        self.watch_interval = watch_interval
+        self.watch_max_age = watch_max_age
+        self.watch = LevelWatchIndex()
+        self._streams: Dict[StreamKey, SignalStream] = {}
+        self._watch_task: Optional[asyncio.Task] = None
+
+    def subscribe(self, symbol: str, timeframe: str):
+        """Register interest in a stream, starting it if needed"""
+        key = (symbol, timeframe)
+        stream = self._streams.get(key)
+        if stream is None:
+            stream = SignalStream(symbol, timeframe)
+            stream.task = asyncio.create_task(self._run_stream(stream))
+            self._streams[key] = stream
+        stream.subscribers += 1
+
+    def unsubscribe(self, symbol: str, timeframe: str):
+        """Drop a subscriber; stops the stream when nobody is left"""
+        key = (symbol, timeframe)
+        stream = self._streams.get(key)
+        if stream is None:
+            return
+
+        stream.subscribers -= 1
+        if stream.subscribers <= 0:
+            stream.task.cancel()
+            del self._streams[key]
+
+    def latest(self, symbol: str, timeframe: str) -> Optional[Dict]:
+        """Last message published on a stream, for late joiners"""
+        stream = self._streams.get((symbol, timeframe))
+        return stream.last_message if stream else None
+
+    def stream_counts(self) -> Dict[str, int]:
+        """Subscriber count per active stream (for monitoring)"""
+        return {
+            f"{stream.symbol}@{stream.timeframe}": stream.subscribers
+            for stream in self._streams.values()
+        }
+
+    async def stop(self):
+        """Cancel every stream loop"""
+        tasks = [stream.task for stream in self._streams.values()]
+        if self._watch_task is not None:
+            tasks.append(self._watch_task)
+            self._watch_task = None
+        self._streams.clear()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _run_stream(self, stream: SignalStream):
+        while True:
+            message = await self._compute(stream)
+            stream.last_message = message
+            self.publish((stream.symbol, stream.timeframe), message)
+            await self._wait_for_next(stream, message)
+
+    async def _wait_for_next(self, stream: SignalStream, message: Dict):
+        """Sleep `interval`, or while a setup is pending, until it may have changed"""
+        key = (stream.symbol, stream.timeframe)
+        levels = self._pending_levels(stream, message) if self.watch_interval > 0 else None
+        if not levels:
+            await asyncio.sleep(self.interval)
+            return
+
+        stream.wake.clear()
+        self.watch.watch(key, stream.symbol, levels, message['data'].get('current_price'), owner=stream)
+        if self._watch_task is None or self._watch_task.done():
+            self._watch_task = asyncio.create_task(self._run_watch())
+
+        # Candle close (plus a second for the exchange to publish it) or max age
+        timeframe_ms = CandleResampler.timeframe_ms(stream.timeframe)
+        now_ms = time.time() * 1000
+        until_close = (timeframe_ms - now_ms % timeframe_ms) / 1000 + 1
+        try:
+            await asyncio.wait_for(stream.wake.wait(), timeout=min(until_close, self.watch_max_age))
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            # A re-subscribed stream may already have its own watch on this key
+            self.watch.unwatch(key, owner=stream)
+
+    def _pending_levels(self, stream: SignalStream, message: Dict) -> Optional[ZoneSet]:
+        if message.get("type") != "signal_update" or message["data"].get("setup_state") != "PENDING":
+            return None
+        return self.signal_service.watch_levels(stream.symbol, stream.timeframe)
+
+    async def _run_watch(self):
+        """Poll one batched ticker request for every watched symbol and wake triggered streams"""
+        while True:
+            await asyncio.sleep(self.watch_interval)
+            symbols = self.watch.symbols()
+            if not symbols:
+                continue
+
+            try:
+                tickers = await self.signal_service.price_service.get_current_prices(symbols)
+            except Exception as e:
+                # Watched streams still refresh on candle close / max age
+                print(f"Level watch ticker error: {str(e)}")
+                continue
+
+            prices = {symbol: ticker['price'] for symbol, ticker in tickers.items()}
+            for key in self.watch.update(prices):
+                stream = self._streams.get(key)
+                if stream is not None:
+                    stream.wake.set()
+
+    async def _compute(self, stream: SignalStream) -> Dict:
+        try:
+            signal = await self.signal_service.generate_signal(stream.symbol, stream.timeframe)
+            return {
+                "type": "signal_update",
+                "data": signal.model_dump(),
+                "timestamp": datetime.now().isoformat()
+            }
+        except Exception as e:
+            print(f"Signal stream error ({stream.symbol} {stream.timeframe}): {str(e)}")
+            return {
+                "type": "error",
+                "message": str(e)
+            }
+
@@ -3,7 +3,7 @@ from typing import List, Dict, Tuple, Any
 import numpy as np
 from models.signal import SignalResponse
 from services.price_service import PriceService
-from services.indicators import TechnicalIndicators
+from services.indicators import TechnicalIndicators, requires_indicators
 from services.advanced_strategies import AdvancedStrategies
 from services.signal_stability import SignalStabilityManager, MultiTimeframeAnalyzer
 from services.smc_strategy import SMCStrategy
@@ -170,6 +170,10 @@ class SignalService:
             strategy_used=strategy
         )
     
+    @requires_indicators(
+        'rsi', 'macd', 'macd_signal', 'macd_diff', 'ema_9', 'ema_21', 'ema_50', 'current_price',
+        'bb_upper', 'bb_lower', 'bb_middle', 'stoch_k', 'stoch_d', 'adx', 'volume_ratio'
+    )
     def _analyze_confluences(
         self, 
         indicators: Dict[str, float], 
@@ -312,6 +316,12 @@ class SignalService:
         if divergences.get('macd_bearish'):
             confluences.append("📉 MACD Bearish Divergence - Momentum shift")
             bearish_score += 1.5
+        if divergences.get('rsi_hidden_bullish') or divergences.get('macd_hidden_bullish'):
+            confluences.append("🔁 Hidden Bullish Divergence - Uptrend continuation")
+            bullish_score += 1
+        if divergences.get('rsi_hidden_bearish') or divergences.get('macd_hidden_bearish'):
+            confluences.append("🔁 Hidden Bearish Divergence - Downtrend continuation")
+            bearish_score += 1
         
         # 10. Market Regime Filter (NEW)
         if market_regime:
@@ -501,12 +511,17 @@ class SignalService:
             
             # Analyze each timeframe
             mtf_signals = {}
+            mtf_frames = {}
             
             for tf in timeframes:
                 try:
-                    # Fetch data for this timeframe
-                    df = await self.price_service.get_ohlcv_df(symbol, tf, limit=200)
-                    indicators = self.indicators_calc.calculate_all(df)
+                    # Fetch data for this timeframe (resampled from held candles when possible)
+                    df = await self.price_service.get_resampled_ohlcv_df(symbol, tf, limit=200)
+                    mtf_frames[tf] = df
+                    # Lazy: the SMC branch only reads what trend/volatility need
+                    indicators = self.indicators_calc.lazy(
+                        df, TechnicalIndicators.detect_trend, TechnicalIndicators.detect_volatility
+                    )
                     trend = self.indicators_calc.detect_trend(df, indicators)
                     volatility = self.indicators_calc.detect_volatility(indicators)
                     
@@ -568,8 +583,9 @@ class SignalService:
             if len(timeframes) >= 2:
                 higher_tf = timeframes[1]
                 if higher_tf in mtf_signals:
-                    df_higher = await self.price_service.get_ohlcv_df(symbol, higher_tf, limit=100)
-                    indicators_higher = self.indicators_calc.calculate_all(df_higher)
+                    # Reuse the candles already loaded for the MTF pass
+                    df_higher = mtf_frames[higher_tf].tail(100)
+                    indicators_higher = self.indicators_calc.lazy(df_higher, TechnicalIndicators.detect_trend)
                     trend_higher = self.indicators_calc.detect_trend(df_higher, indicators_higher)
                     
                     is_aligned, alignment_reason = self.mtf_analyzer.check_trend_alignment(
@@ -1,6 +1,9 @@
 from datetime import datetime
 from typing import List, Dict, Tuple, Any
+import asyncio
+import time
 import numpy as np
+import pandas as pd
 from models.signal import SignalResponse, LimitOrderLevel, LeverageSuggestion
 from services.price_service import PriceService
 from services.indicators import TechnicalIndicators
@@ -8,14 +11,29 @@ from services.advanced_strategies import AdvancedStrategies
 from services.signal_stability import SignalStabilityManager, MultiTimeframeAnalyzer
 from services.smc_strategy import SMCStrategy
 from services.leverage_calculator import LeverageCalculator
+from services.candle_resampler import CandleResampler
+from services.streaming_indicators import StreamingIndicatorEngine
+from services.smc_stream import StreamingSMCEngine
+from services.key_levels import KeyLevelIndex
+from services.zones import ZoneSet, KEY_LEVEL
+from services.analysis_executor import (
+    AnalysisExecutor, frame_to_payload, run_candle_analysis, run_smc_signal
+)
+
+# Closed candles used for the heavy ICT analysis
+ANALYSIS_CANDLES = 200
+# Candles (forming one included) analysed per MTF timeframe
+MTF_CANDLES = 200
 
 
 def convert_numpy_types(obj: Any) -> Any:
     """
     Recursively convert numpy types to Python native types for JSON serialization.
-    Handles numpy.bool_, numpy.int64, numpy.float64, etc.
+    Handles numpy.bool_, numpy.int64, numpy.float64, etc. ZoneSets become lists of dicts.
     """
-    if isinstance(obj, dict):
+    if isinstance(obj, ZoneSet):
+        return obj.to_list()
+    elif isinstance(obj, dict):
         return {key: convert_numpy_types(value) for key, value in obj.items()}
     elif isinstance(obj, list):
         return [convert_numpy_types(item) for item in obj]
@@ -39,13 +57,35 @@ class ICTSignalService:
     Pure Inner Circle Trader / Smart Money Concepts approach
     """
     
-    def __init__(self, price_service: PriceService):
+    def __init__(
+        self,
+        price_service: PriceService,
+        mtf_deadline: float = 5.0,
+        executor: AnalysisExecutor = None
+    ):
+        """
+        Args:
+            price_service: Market data source
+            mtf_deadline: Seconds to wait for higher timeframes before scoring MTF
+                with whatever timeframes have finished
+            executor: Where CPU-bound analysis runs (defaults to a worker thread)
+        """
         self.price_service = price_service
+        self.mtf_deadline = mtf_deadline
+        self.executor = executor or AnalysisExecutor()
         self.indicators_calc = TechnicalIndicators()  # Still used for volatility/ATR
+        # Incremental indicator state - O(1) per closed candle instead of O(window)
+        self.indicator_streams = StreamingIndicatorEngine()
+        # Incremental SMC state (order blocks, FVGs, swings, liquidity) per stream
+        self.smc_streams = StreamingSMCEngine()
         self.advanced_strategies = AdvancedStrategies()  # For S/R levels
         self.smc_strategy = SMCStrategy()
         self.stability_manager = SignalStabilityManager()
         self.mtf_analyzer = MultiTimeframeAnalyzer()
+        # (symbol, timeframe) -> ((last closed candle, killzone), analysis)
+        self._analysis_cache: Dict[Tuple[str, str], Tuple[Tuple, Dict]] = {}
+        # Serializes streaming-engine access per (symbol, timeframe); syncs run in a thread
+        self._stream_locks: Dict[Tuple[str, str], asyncio.Lock] = {}
     
     async def generate_signal(self, symbol: str, timeframe: str = "15m") -> SignalResponse:
         """
@@ -59,24 +99,26 @@ class ICTSignalService:
         Otherwise returns SETUP_PENDING or AWAITING_CONFIRMATION
         """
         
-        # Fetch price data
-        df = await self.price_service.get_ohlcv_df(symbol, timeframe, limit=200)
+        # Fetch price data (one extra candle for the still-forming one)
+        df = await self.price_service.get_ohlcv_df(symbol, timeframe, limit=ANALYSIS_CANDLES + 1)
         current_price_data = await self.price_service.get_current_price(symbol)
         current_price = current_price_data['price']
         
-        # Calculate basic indicators (for volatility, ATR, trend context)
-        indicators = self.indicators_calc.calculate_all(df)
-        trend = self.indicators_calc.detect_trend(df, indicators)
-        volatility = self.indicators_calc.detect_volatility(indicators)
+        # Indicators, trend, volatility and ICT analysis only change when a candle closes
+        analysis = await self._get_candle_analysis(symbol, timeframe, df)
+        # Displayed indicators and ATR levels follow the still-forming candle
+        async with self._stream_lock(symbol, timeframe):
+            live_indicators = self._live_indicators(symbol, timeframe, df)
+        indicators = live_indicators or analysis['indicators']
+        trend = analysis['trend']
+        volatility = analysis['volatility']
         
-        # Generate ICT analysis
         (signal, strength, confluences, confidence, key_levels, 
-         killzone_data, ote_zones, limit_orders) = self.smc_strategy.generate_smc_signal(
-            df, datetime.now()
-        )
+         killzone_data, ote_zones, limit_orders) = analysis['smc']
+        confluences = list(confluences)  # Cached list - prepend to a copy
         
-        # Check if price is AT a key level (not just near)
-        at_level = self.smc_strategy.check_price_at_key_level(current_price, key_levels, tolerance_pct=0.3)
+        # Check if price is AT a key level (not just near) - highest confluence wins
+        at_level = analysis['key_level_index'].best(current_price)
         
         setup_state = "ACTIVE"
         
@@ -86,7 +128,7 @@ class ICTSignalService:
             signal_to_show = "SETUP_PENDING"
             
             # Sort key levels by confluence
-            sorted_levels = sorted(key_levels, key=lambda x: x.get('confluence', 0), reverse=True)[:3]
+            sorted_levels = key_levels[np.argsort(-key_levels['confluence'], kind='stable')[:3]]
             
             confluences.insert(0, f"⏸️ Setup pending - Price not at key level. Nearest: {sorted_levels[0]['type'] if sorted_levels else 'None'}")
             
@@ -116,7 +158,7 @@ class ICTSignalService:
         confluences.insert(0, "🎯 Strategy: ICT / Smart Money Concepts")
         
         # Calculate entry, stop loss, and take profit levels
-        support_levels, resistance_levels = self.advanced_strategies.detect_support_resistance(df, indicators)
+        support_levels, resistance_levels = analysis['support_resistance']
         entry_price, stop_loss, tp1, tp2, tp3, risk_reward = self._calculate_levels(
             signal, current_price, indicators, volatility, support_levels, resistance_levels, ote_zones, key_levels
         )
@@ -143,7 +185,7 @@ class ICTSignalService:
         # Convert limit orders to proper model
         limit_order_models = []
         if limit_orders:
-            for order in limit_orders[:3]:  # Top 3 only
+            for order in convert_numpy_types(limit_orders[:3]):  # Top 3 only
                 # Calculate SL/TP for each limit order
                 if signal == "LONG":
                     order_sl = order['price'] * 0.98  # 2% below entry
@@ -176,8 +218,12 @@ class ICTSignalService:
         previous_signal_value = None
         
         try:
-            # Get multi-timeframe confirmation
-            mtf_result = await self._get_mtf_confirmation(symbol, timeframe, signal, confidence, strength, trend)
+            # Get multi-timeframe confirmation (once per closed candle)
+            if 'mtf' not in analysis:
+                analysis['mtf'] = await self._get_mtf_confirmation(
+                    symbol, timeframe, signal, confidence, strength, trend, df
+                )
+            mtf_result = analysis['mtf']
             if mtf_result:
                 mtf_analysis_data = mtf_result
                 
@@ -249,6 +295,82 @@ class ICTSignalService:
             ote_data=ote_zones
         )
     
+    async def _get_candle_analysis(self, symbol: str, timeframe: str, df: pd.DataFrame) -> Dict:
+        """
+        Heavy, candle-dependent part of the signal, cached per closed candle
+        
+        Indicators, SMC analysis and S/R are computed on closed candles only (in
+        the analysis executor) and reused until the next candle closes, or the
+        killzone changes since it feeds into the ICT score. Live-price checks are
+        left to the caller.
+        """
+        now = datetime.now()
+        closed_df = self._closed_candles(df, timeframe)
+        killzone_name = self.smc_strategy.is_in_killzone(now).get('killzone_name')
+        cache_key = (closed_df.index[-1] if len(closed_df) else None, killzone_name)
+        
+        async with self._stream_lock(symbol, timeframe):
+            cached = self._analysis_cache.get((symbol, timeframe))
+            if cached and cached[0] == cache_key:
+                return cached[1]
+            
+            # Seeding a stream replays the whole window in Python - keep it off the loop
+            indicators, smc = await self.executor.run_local(
+                self._sync_streams, symbol, timeframe, closed_df, now
+            )
+            analysis = await self.executor.run(
+                run_candle_analysis, frame_to_payload(closed_df), now, indicators, smc
+            )
+            
+            # Live price checks against this candle's key levels (0.3% tolerance)
+            analysis['key_level_index'] = KeyLevelIndex(analysis['smc'][4], tolerance_pct=0.3)
+            
+            self._analysis_cache[(symbol, timeframe)] = (cache_key, analysis)
+            return analysis
+    
+    def _sync_streams(self, symbol: str, timeframe: str, closed_df: pd.DataFrame, now: datetime) -> Tuple:
+        """Bring the indicator and SMC streams up to `closed_df` (seeding them if needed)"""
+        indicators = self.indicator_streams.sync(symbol, timeframe, closed_df)
+        smc = self.smc_streams.sync(symbol, timeframe, closed_df, now)
+        return indicators, smc
+    
+    def _stream_lock(self, symbol: str, timeframe: str) -> asyncio.Lock:
+        return self._stream_locks.setdefault((symbol, timeframe), asyncio.Lock())
+    
+    def watch_levels(self, symbol: str, timeframe: str) -> ZoneSet:
+        """
+        Key levels and limit-order prices of the latest analysis - the levels a
+        pending setup is waiting for price to reach
+        """
+        cached = self._analysis_cache.get((symbol, timeframe))
+        if cached is None:
+            return ZoneSet.empty(KEY_LEVEL)
+        smc = cached[1]['smc']
+        return ZoneSet.concat([smc[4], smc[7]])
+    
+    def _live_indicators(self, symbol: str, timeframe: str, df: pd.DataFrame) -> Dict:
+        """What-if update of the streaming indicators with the forming candle"""
+        closed_df = self._closed_candles(df, timeframe)
+        if len(closed_df) == 0 or closed_df.index[-1] == df.index[-1]:
+            return {}
+        
+        forming = df.iloc[-1]
+        return self.indicator_streams.peek(
+            symbol, timeframe,
+            (forming['open'], forming['high'], forming['low'], forming['close'], forming['volume'])
+        )
+    
+    @staticmethod
+    def _closed_candles(df: pd.DataFrame, timeframe: str) -> pd.DataFrame:
+        """Drop the still-forming last candle, if there is one"""
+        if df.empty:
+            return df
+        
+        last_open_ms = df.index[-1].timestamp() * 1000
+        if last_open_ms + CandleResampler.timeframe_ms(timeframe) > time.time() * 1000:
+            return df.iloc[:-1]
+        return df.tail(ANALYSIS_CANDLES)
+    
     async def _build_pending_response(
         self, symbol, timeframe, current_price, signal, strength, confluences, 
         confidence, indicators, trend, volatility, pending_levels, killzone_data, ote_zones, limit_orders
@@ -261,8 +383,7 @@ class ICTSignalService:
             ote_zones = convert_numpy_types(ote_zones)
         if killzone_data:
             killzone_data = convert_numpy_types(killzone_data)
-        if pending_levels:
-            pending_levels = convert_numpy_types(pending_levels)
+        pending_levels = convert_numpy_types(pending_levels)
         
         return SignalResponse(
             symbol=symbol,
@@ -285,7 +406,7 @@ class ICTSignalService:
             volatility=volatility,
             setup_state="PENDING",
             pending_levels=pending_levels,
-            limit_orders=[LimitOrderLevel(**order) for order in limit_orders[:3]] if limit_orders else None,
+            limit_orders=[LimitOrderLevel(**order) for order in convert_numpy_types(limit_orders[:3])] if limit_orders else None,
             killzone_active=killzone_data.get('in_killzone', False),
             killzone_name=killzone_data.get('killzone_name'),
             ote_data=ote_zones
@@ -327,7 +448,7 @@ class ICTSignalService:
             volatility=volatility,
             setup_state="AWAITING_CONFIRMATION",
             pending_levels=[at_level],
-            limit_orders=[LimitOrderLevel(**order) for order in limit_orders[:3]] if limit_orders else None,
+            limit_orders=[LimitOrderLevel(**order) for order in convert_numpy_types(limit_orders[:3])] if limit_orders else None,
             killzone_active=killzone_data.get('in_killzone', False),
             killzone_name=killzone_data.get('killzone_name'),
             ote_data=ote_zones
@@ -342,7 +463,7 @@ class ICTSignalService:
         support_levels: List[float],
         resistance_levels: List[float],
         ote_zones: Dict,
-        key_levels: List[Dict]
+        key_levels: ZoneSet
     ) -> Tuple[float, float, float, float, float, float]:
         """Calculate ICT-based entry, SL, and TP levels"""
         
@@ -370,9 +491,9 @@ class ICTSignalService:
                 entry_price = ote_zones.get('ote_0.705', current_price)
             
             # Place SL below nearest Order Block or support
-            ob_levels = [lvl.get('low') for lvl in key_levels if lvl.get('type') == 'ORDER_BLOCK' and lvl.get('low', 0) < entry_price]
-            if ob_levels:
-                stop_loss = max(ob_levels) * 0.995  # Just below OB
+            ob_levels = key_levels['low'][(key_levels['type'] == 'ORDER_BLOCK') & (key_levels['low'] < entry_price)]
+            if len(ob_levels):
+                stop_loss = ob_levels.max() * 0.995  # Just below OB
             else:
                 stop_loss = entry_price - (atr * sl_multiplier)
             
@@ -393,9 +514,9 @@ class ICTSignalService:
                 entry_price = ote_zones.get('ote_0.705', current_price)
             
             # Place SL above nearest Order Block or resistance
-            ob_levels = [lvl.get('high') for lvl in key_levels if lvl.get('type') == 'ORDER_BLOCK' and lvl.get('high', float('inf')) > entry_price]
-            if ob_levels:
-                stop_loss = min(ob_levels) * 1.005  # Just above OB
+            ob_levels = key_levels['high'][(key_levels['type'] == 'ORDER_BLOCK') & (key_levels['high'] > entry_price)]
+            if len(ob_levels):
+                stop_loss = ob_levels.min() * 1.005  # Just above OB
             else:
                 stop_loss = entry_price + (atr * sl_multiplier)
             
@@ -447,23 +568,38 @@ class ICTSignalService:
         base_signal: str,
         base_confidence: float,
         base_strength: str,
-        base_trend: str
+        base_trend: str,
+        base_df: pd.DataFrame = None
     ) -> Dict:
-        """Multi-timeframe confirmation using ICT analysis"""
+        """
+        Multi-timeframe confirmation using ICT analysis
+        
+        `base_df` is the frame already fetched for `base_timeframe`; it is
+        reused for that leg instead of fetching the same candles again.
+        """
         try:
             timeframes = self.mtf_analyzer.get_confirmation_timeframes(base_timeframe)
             mtf_signals = {}
             
-            for tf in timeframes:
+            # Fetch and analyse every timeframe concurrently
+            tasks = {
+                tf: asyncio.create_task(self._analyze_mtf_timeframe(
+                    symbol, tf, base_df if tf == base_timeframe else None
+                ))
+                for tf in timeframes
+            }
+            done, pending = await asyncio.wait(tasks.values(), timeout=self.mtf_deadline)
+            
+            # Partial-result policy: score with the timeframes that made the deadline
+            for task in pending:
+                task.cancel()
+            
+            for tf, task in tasks.items():
+                if task not in done:
+                    print(f"Timeframe {tf} missed the {self.mtf_deadline}s MTF deadline")
+                    continue
                 try:
-                    df = await self.price_service.get_ohlcv_df(symbol, tf, limit=200)
-                    
-                    # Use ICT analysis for MTF
-                    (signal, strength, confluences, confidence, key_levels, 
-                     killzone_data, ote_zones, limit_orders) = self.smc_strategy.generate_smc_signal(df)
-                    
-                    mtf_signals[tf] = (signal, confidence, strength)
-                    
+                    mtf_signals[tf] = task.result()
                 except Exception as e:
                     print(f"Error analyzing timeframe {tf}: {str(e)}")
                     continue
@@ -496,4 +632,21 @@ class ICTSignalService:
         except Exception as e:
             print(f"MTF confirmation error: {str(e)}")
             return None
-
+    
+    async def _analyze_mtf_timeframe(
+        self, symbol: str, timeframe: str, df: pd.DataFrame = None
+    ) -> Tuple[str, float, str]:
+        """Load one MTF timeframe (unless `df` is given) and run ICT analysis on it in the analysis executor"""
+        if df is None:
+            # Higher timeframes are resampled from held candles when possible
+            df = await self.price_service.get_resampled_ohlcv_df(symbol, timeframe, limit=MTF_CANDLES)
+        else:
+            df = df.tail(MTF_CANDLES)
+        
+        # Use ICT analysis for MTF
+        (signal, strength, confluences, confidence, key_levels,
+         killzone_data, ote_zones, limit_orders) = await self.executor.run(
+            run_smc_signal, frame_to_payload(df)
+        )
+        
+        return signal, confidence, strength
@@ -8,6 +8,13 @@ import numpy as np
 from typing import Dict, List, Tuple, Optional
 from datetime import datetime
 import pytz
+from services.swing_index import SwingIndex
+from services.analysis_pipeline import AnalysisContext, Pipeline, Stage
+from services.killzones import EASTERN, killzone_for_hour, label_killzones
+from services.key_levels import KeyLevelIndex
+from services.zones import (
+    ZoneSet, ORDER_BLOCK, FAIR_VALUE_GAP, BREAKER_BLOCK, LIQUIDITY_POOL, KEY_LEVEL, key_level
+)
 
 
 class SMCStrategy:
@@ -17,37 +24,31 @@ class SMCStrategy:
     """
     
     @staticmethod
-    def detect_market_structure(df: pd.DataFrame) -> Dict[str, any]:
+    def detect_market_structure(df: pd.DataFrame, lookback: int = 20) -> Dict[str, any]:
         """
         Detect market structure (Higher Highs/Lows or Lower Highs/Lows)
         """
         if len(df) < 20:
             return {"trend": "RANGING", "structure": "UNCLEAR"}
         
-        highs = df['high'].tail(20).values
-        lows = df['low'].tail(20).values
-        
-        # Find swing highs and lows
-        swing_highs = []
-        swing_lows = []
-        
-        for i in range(2, len(highs) - 2):
-            # Swing high
-            if highs[i] > highs[i-1] and highs[i] > highs[i-2] and \
-               highs[i] > highs[i+1] and highs[i] > highs[i+2]:
-                swing_highs.append((i, highs[i]))
-            
-            # Swing low
-            if lows[i] < lows[i-1] and lows[i] < lows[i-2] and \
-               lows[i] < lows[i+1] and lows[i] < lows[i+2]:
-                swing_lows.append((i, lows[i]))
-        
+        return SMCStrategy._structure_from_swings(SwingIndex.for_frame(df), lookback)
+    
+    @staticmethod
+    def _structure_from_swings(swings: SwingIndex, lookback: int = 20) -> Dict[str, any]:
+        # Swing highs and lows within the lookback window
+        _, swing_highs = swings.swing_highs(lookback)
+        _, swing_lows = swings.swing_lows(lookback)
+        return SMCStrategy._classify_structure(swing_highs, swing_lows)
+    
+    @staticmethod
+    def _classify_structure(swing_highs, swing_lows) -> Dict[str, any]:
+        """Trend from the last two swing highs and lows (oldest first)"""
         if len(swing_highs) < 2 or len(swing_lows) < 2:
             return {"trend": "RANGING", "structure": "INSUFFICIENT_DATA"}
         
         # Check for Higher Highs and Higher Lows (bullish structure)
-        recent_highs = [h[1] for h in swing_highs[-2:]]
-        recent_lows = [l[1] for l in swing_lows[-2:]]
+        recent_highs = list(swing_highs[-2:])
+        recent_lows = list(swing_lows[-2:])
         
         higher_highs = recent_highs[-1] > recent_highs[-2]
         higher_lows = recent_lows[-1] > recent_lows[-2]
@@ -78,114 +79,106 @@ class SMCStrategy:
             }
     
     @staticmethod
-    def detect_order_blocks(df: pd.DataFrame, structure: Dict) -> Dict[str, List[Dict]]:
+    def detect_order_blocks(df: pd.DataFrame, structure: Dict) -> Dict[str, ZoneSet]:
         """
         Detect bullish and bearish order blocks
         Order Block = Last opposite candle before significant move
         """
         if len(df) < 10:
-            return {"bullish_ob": [], "bearish_ob": []}
-        
-        bullish_obs = []
-        bearish_obs = []
+            return {"bullish_ob": ZoneSet.empty(ORDER_BLOCK), "bearish_ob": ZoneSet.empty(ORDER_BLOCK)}
         
-        # Look for order blocks in recent candles
-        for i in range(3, len(df) - 1):
-            curr = df.iloc[i]
-            next_candle = df.iloc[i + 1]
-            
-            # Bearish Order Block (before bullish move)
-            # Last red candle before strong green candle
-            if curr['close'] < curr['open'] and next_candle['close'] > next_candle['open']:
-                move_size = next_candle['close'] - next_candle['open']
-                body_size = curr['open'] - curr['close']
-                
-                # Strong bullish move after bearish candle
-                if move_size > body_size * 2:
-                    bearish_obs.append({
-                        'index': i,
-                        'high': curr['high'],
-                        'low': curr['low'],
-                        'open': curr['open'],
-                        'close': curr['close'],
-                        'strength': min(move_size / body_size, 10)
-                    })
-            
-            # Bullish Order Block (before bearish move)
-            # Last green candle before strong red candle
-            if curr['close'] > curr['open'] and next_candle['close'] < next_candle['open']:
-                move_size = next_candle['open'] - next_candle['close']
-                body_size = curr['close'] - curr['open']
-                
-                # Strong bearish move after bullish candle
-                if move_size > body_size * 2:
-                    bullish_obs.append({
-                        'index': i,
-                        'high': curr['high'],
-                        'low': curr['low'],
-                        'open': curr['open'],
-                        'close': curr['close'],
-                        'strength': min(move_size / body_size, 10)
-                    })
-        
-        # Keep only most recent and strongest
-        bullish_obs = sorted(bullish_obs, key=lambda x: (x['index'], x['strength']), reverse=True)[:3]
-        bearish_obs = sorted(bearish_obs, key=lambda x: (x['index'], x['strength']), reverse=True)[:3]
+        return SMCStrategy._order_blocks(
+            *(df[field].to_numpy(dtype=np.float64) for field in ('open', 'high', 'low', 'close'))
+        )
+    
+    @staticmethod
+    def _order_blocks(open_: np.ndarray, high: np.ndarray, low: np.ndarray, close: np.ndarray) -> Dict[str, ZoneSet]:
+        # Candle i (from 3) against candle i + 1, for every i at once
+        curr_open, curr_close = open_[3:-1], close[3:-1]
+        next_open, next_close = open_[4:], close[4:]
+        
+        # Bearish Order Block (before bullish move)
+        # Last red candle before strong green candle
+        bearish_move = next_close - next_open
+        bearish_body = curr_open - curr_close
+        bearish_mask = (curr_close < curr_open) & (next_close > next_open) & (bearish_move > bearish_body * 2)
+        
+        # Bullish Order Block (before bearish move)
+        # Last green candle before strong red candle
+        bullish_move = next_open - next_close
+        bullish_body = curr_close - curr_open
+        bullish_mask = (curr_close > curr_open) & (next_close < next_open) & (bullish_move > bullish_body * 2)
+        
+        def order_blocks(mask, move, body):
+            # Sorting by (index, strength) descending: indices are unique, so the
+            # three most recent matches, newest first
+            j = np.flatnonzero(mask)[::-1][:3]
+            i = j + 3
+            blocks = np.empty(len(j), dtype=ORDER_BLOCK)
+            blocks['index'] = i
+            blocks['high'], blocks['low'] = high[i], low[i]
+            blocks['open'], blocks['close'] = open_[i], close[i]
+            blocks['strength'] = np.minimum(move[j] / body[j], 10)
+            return ZoneSet(blocks)
+        
+        bullish_obs = order_blocks(bullish_mask, bullish_move, bullish_body)
+        bearish_obs = order_blocks(bearish_mask, bearish_move, bearish_body)
         
         return {"bullish_ob": bullish_obs, "bearish_ob": bearish_obs}
     
     @staticmethod
-    def detect_fair_value_gaps(df: pd.DataFrame) -> Dict[str, List[Dict]]:
+    def detect_fair_value_gaps(df: pd.DataFrame) -> Dict[str, ZoneSet]:
         """
         Detect Fair Value Gaps (FVG) - price imbalances
         Bullish FVG: Gap between candle[i-1].high and candle[i+1].low
         Bearish FVG: Gap between candle[i-1].low and candle[i+1].high
+        
+        Fill state comes from the price action after the gap formed: a bullish
+        gap is filled once a later low trades down to its bottom, a bearish gap
+        once a later high reaches its top. Filled gaps are dropped; `fill_pct`
+        is how much of each remaining gap has been traded into (0-1).
         """
         if len(df) < 3:
-            return {"bullish_fvg": [], "bearish_fvg": []}
-        
-        bullish_fvgs = []
-        bearish_fvgs = []
+            return {"bullish_fvg": ZoneSet.empty(FAIR_VALUE_GAP), "bearish_fvg": ZoneSet.empty(FAIR_VALUE_GAP)}
         
-        for i in range(1, len(df) - 1):
-            prev = df.iloc[i - 1]
-            curr = df.iloc[i]
-            next_candle = df.iloc[i + 1]
-            
-            # Bullish FVG (gap up)
-            if prev['high'] < next_candle['low']:
-                gap_size = next_candle['low'] - prev['high']
-                bullish_fvgs.append({
-                    'index': i,
-                    'top': next_candle['low'],
-                    'bottom': prev['high'],
-                    'size': gap_size,
-                    'filled': False
-                })
+        return SMCStrategy._fair_value_gaps(
+            df['high'].to_numpy(dtype=np.float64), df['low'].to_numpy(dtype=np.float64)
+        )
+    
+    @staticmethod
+    def _fair_value_gaps(high: np.ndarray, low: np.ndarray) -> Dict[str, ZoneSet]:
+        # Candle i - 1 against candle i + 1, for i = 1 .. n - 2
+        prev_high, prev_low = high[:-2], low[:-2]
+        next_high, next_low = high[2:], low[2:]
+        
+        # Lowest low / highest high from candle i + 2 onwards (none after the last gap)
+        lowest_after = np.append(np.minimum.accumulate(low[::-1])[::-1][3:], np.inf)
+        highest_after = np.append(np.maximum.accumulate(high[::-1])[::-1][3:], -np.inf)
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            # Bullish FVG (gap up) - filled from the top down
+            bullish_mask = prev_high < next_low
+            bullish_fill = np.clip((next_low - lowest_after) / (next_low - prev_high), 0, 1)
             
-            # Bearish FVG (gap down)
-            if prev['low'] > next_candle['high']:
-                gap_size = prev['low'] - next_candle['high']
-                bearish_fvgs.append({
-                    'index': i,
-                    'top': prev['low'],
-                    'bottom': next_candle['high'],
-                    'size': gap_size,
-                    'filled': False
-                })
-        
-        # Keep only unfilled gaps (price hasn't returned)
-        current_price = df['close'].iloc[-1]
-        
-        bullish_fvgs = [
-            fvg for fvg in bullish_fvgs 
-            if current_price < fvg['top']  # Not filled yet
-        ][-5:]  # Keep last 5
-        
-        bearish_fvgs = [
-            fvg for fvg in bearish_fvgs 
-            if current_price > fvg['bottom']  # Not filled yet
-        ][-5:]  # Keep last 5
+            # Bearish FVG (gap down) - filled from the bottom up
+            bearish_mask = prev_low > next_high
+            bearish_fill = np.clip((highest_after - next_high) / (prev_low - next_high), 0, 1)
+        
+        def gaps(j, top, bottom, fill):
+            fvgs = np.empty(len(j), dtype=FAIR_VALUE_GAP)
+            fvgs['index'] = j + 1
+            fvgs['top'], fvgs['bottom'] = top[j], bottom[j]
+            fvgs['size'] = top[j] - bottom[j]
+            fvgs['fill_pct'] = fill[j]
+            return ZoneSet(fvgs)
+        
+        # Keep only unfilled gaps (price hasn't traded all the way through), last 5
+        bullish_fvgs = gaps(
+            np.flatnonzero(bullish_mask & (lowest_after > prev_high))[-5:], next_low, prev_high, bullish_fill
+        )
+        bearish_fvgs = gaps(
+            np.flatnonzero(bearish_mask & (highest_after < prev_low))[-5:], prev_low, next_high, bearish_fill
+        )
         
         return {"bullish_fvg": bullish_fvgs, "bearish_fvg": bearish_fvgs}
     
@@ -194,11 +187,15 @@ class SMCStrategy:
         """
         Detect Break of Structure (BOS) - confirms trend continuation
         """
-        if len(df) < 10 or structure['structure'] == "UNCLEAR":
+        if len(df) < 10:
             return {"bullish_bos": False, "bearish_bos": False}
         
-        recent_candles = df.tail(5)
-        current_price = df['close'].iloc[-1]
+        return SMCStrategy._break_of_structure(df['close'].iloc[-1], structure)
+    
+    @staticmethod
+    def _break_of_structure(current_price: float, structure: Dict) -> Dict[str, bool]:
+        if structure['structure'] == "UNCLEAR":
+            return {"bullish_bos": False, "bearish_bos": False}
         
         bullish_bos = False
         bearish_bos = False
@@ -220,10 +217,15 @@ class SMCStrategy:
         """
         Detect Change of Character (ChoCh) - potential trend reversal
         """
-        if len(df) < 10 or structure['structure'] == "UNCLEAR":
+        if len(df) < 10:
             return {"bullish_choch": False, "bearish_choch": False}
         
-        current_price = df['close'].iloc[-1]
+        return SMCStrategy._change_of_character(df['close'].iloc[-1], structure)
+    
+    @staticmethod
+    def _change_of_character(current_price: float, structure: Dict) -> Dict[str, bool]:
+        if structure['structure'] == "UNCLEAR":
+            return {"bullish_choch": False, "bearish_choch": False}
         
         bullish_choch = False
         bearish_choch = False
@@ -249,10 +251,11 @@ class SMCStrategy:
         if len(df) < 20:
             return {}
         
-        recent_data = df.tail(50)
-        swing_high = recent_data['high'].max()
-        swing_low = recent_data['low'].min()
-        
+        _, swing_high, _, swing_low = SwingIndex.for_frame(df).range_extremes(50)
+        return SMCStrategy._premium_discount(swing_high, swing_low, df['close'].iloc[-1])
+    
+    @staticmethod
+    def _premium_discount(swing_high: float, swing_low: float, current_price: float) -> Dict[str, float]:
         range_size = swing_high - swing_low
         equilibrium = (swing_high + swing_low) / 2
         
@@ -264,8 +267,6 @@ class SMCStrategy:
         discount_start = swing_low
         discount_end = equilibrium
         
-        current_price = df['close'].iloc[-1]
-        
         # Determine if price is in premium or discount
         if current_price > equilibrium:
             zone = "PREMIUM"
@@ -285,43 +286,129 @@ class SMCStrategy:
         }
     
     @staticmethod
-    def detect_liquidity_zones(df: pd.DataFrame) -> Dict[str, List[float]]:
+    def detect_liquidity_zones(
+        df: pd.DataFrame,
+        lookback: int = 50,
+        max_pools: int = 3
+    ) -> Dict[str, List[float]]:
         """
         Detect liquidity zones (equal highs/lows where stops cluster)
+        
+        Every 5-candle run whose highs (or lows) sit within 0.2% of each other
+        marks a level; nearby levels are merged into one pool. Pools are ranked by
+        how many runs touched them, then by how recently, and the top `max_pools`
+        are returned (buy-side highest first, sell-side lowest first). The ranked
+        pool details are included under `*_pools`.
         """
         if len(df) < 20:
             return {"buy_side_liquidity": [], "sell_side_liquidity": []}
         
-        recent_data = df.tail(50)
+        return SMCStrategy._liquidity_zones(
+            df['high'].to_numpy(dtype=np.float64), df['low'].to_numpy(dtype=np.float64), lookback, max_pools
+        )
+    
+    @staticmethod
+    def _liquidity_zones(high: np.ndarray, low: np.ndarray, lookback: int = 50, max_pools: int = 3) -> Dict:
+        recent_high, recent_low = high[-lookback:], low[-lookback:]
+        offset = len(high) - len(recent_high)
         
         # Buy-side liquidity = equal highs (stop losses for shorts)
-        highs = recent_data['high'].values
-        equal_highs = []
-        
-        for i in range(len(highs) - 5):
-            # Find clusters of similar highs
-            cluster = highs[i:i+5]
-            if np.std(cluster) < np.mean(cluster) * 0.002:  # Within 0.2%
-                equal_highs.append(np.mean(cluster))
+        buy_pools = SMCStrategy._liquidity_pools(recent_high, offset=offset)[:max_pools]
         
         # Sell-side liquidity = equal lows (stop losses for longs)
-        lows = recent_data['low'].values
-        equal_lows = []
-        
-        for i in range(len(lows) - 5):
-            cluster = lows[i:i+5]
-            if np.std(cluster) < np.mean(cluster) * 0.002:
-                equal_lows.append(np.mean(cluster))
-        
-        # Remove duplicates and keep unique levels
-        buy_side_liquidity = list(set([round(h, 2) for h in equal_highs]))[-3:]
-        sell_side_liquidity = list(set([round(l, 2) for l in equal_lows]))[-3:]
+        sell_pools = SMCStrategy._liquidity_pools(recent_low, offset=offset)[:max_pools]
         
+        return SMCStrategy._liquidity_result(buy_pools, sell_pools)
+    
+    @staticmethod
+    def _liquidity_result(buy_pools: ZoneSet, sell_pools: ZoneSet) -> Dict:
         return {
-            "buy_side_liquidity": sorted(buy_side_liquidity, reverse=True),
-            "sell_side_liquidity": sorted(sell_side_liquidity)
+            "buy_side_liquidity": sorted(buy_pools['price'].tolist(), reverse=True),
+            "sell_side_liquidity": sorted(sell_pools['price'].tolist()),
+            "buy_side_pools": buy_pools,
+            "sell_side_pools": sell_pools
         }
     
+    @staticmethod
+    def _liquidity_pools(
+        values: np.ndarray,
+        window: int = 5,
+        equal_pct: float = 0.2,
+        cluster_pct: float = 0.1,
+        offset: int = 0
+    ) -> ZoneSet:
+        """
+        Equal-level runs clustered into ranked pools (most touches, then most recent)
+        
+        `last_index` is the last candle of the most recent run, shifted by `offset`.
+        """
+        levels, last_seen = SMCStrategy._equal_level_runs(values, window, equal_pct)
+        return SMCStrategy._cluster_pools(levels, last_seen + offset, cluster_pct)
+    
+    @staticmethod
+    def _equal_level_runs(
+        values: np.ndarray,
+        window: int = 5,
+        equal_pct: float = 0.2
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """(mean level, last candle) of every `window`-candle run within equal_pct"""
+        if len(values) < window:
+            return np.empty(0), np.empty(0, dtype=np.int64)
+        
+        # Rolling mean/std of every `window`-candle run at once, from shifted slices
+        runs = len(values) - window + 1
+        means, stds = SMCStrategy._run_moments([values[k:k + runs] for k in range(window)])
+        equal = stds < means * (equal_pct / 100)
+        return means[equal], np.flatnonzero(equal) + window - 1
+    
+    @staticmethod
+    def _run_moments(columns: List) -> Tuple:
+        """
+        Mean and population std across `columns`, summed left to right
+        
+        Columns are arrays or plain floats; the fixed operation order gives
+        bit-identical results either way (SMCState relies on this).
+        """
+        total = columns[0]
+        for column in columns[1:]:
+            total = total + column
+        mean = total / len(columns)
+        
+        squares = 0.0
+        for column in columns:
+            deviation = column - mean
+            squares = squares + deviation * deviation
+        return mean, np.sqrt(squares / len(columns))
+    
+    @staticmethod
+    def _cluster_pools(levels: np.ndarray, last_seen: np.ndarray, cluster_pct: float = 0.1) -> ZoneSet:
+        """Merge equal-level runs (oldest first) into pools ranked by touches, then recency"""
+        if len(levels) == 0:
+            return ZoneSet.empty(LIQUIDITY_POOL)
+        
+        # Cluster: each pool spans at most cluster_pct above its lowest level
+        # (anchored, so a slow drift can't chain everything into one pool)
+        by_level = np.argsort(levels, kind='stable')
+        levels, last_seen = levels[by_level], last_seen[by_level]
+        starts = [0]
+        while True:
+            next_start = int(np.searchsorted(levels, levels[starts[-1]] * (1 + cluster_pct / 100), side='right'))
+            if next_start >= len(levels):
+                break
+            starts.append(next_start)
+        starts = np.array(starts)
+        
+        touches = np.diff(np.append(starts, len(levels)))
+        prices = np.add.reduceat(levels, starts) / touches
+        latest = np.maximum.reduceat(last_seen, starts)
+        
+        # Rank by touches, then recency (lexsort: last key is primary)
+        ranked = np.lexsort((-latest, -touches))
+        pools = np.empty(len(ranked), dtype=LIQUIDITY_POOL)
+        pools['price'] = np.round(prices[ranked], 2)
+        pools['touches'], pools['last_index'] = touches[ranked], latest[ranked]
+        return ZoneSet(pools)
+    
     @staticmethod
     def is_in_killzone(timestamp: datetime = None) -> Dict:
         """
@@ -334,38 +421,18 @@ class SMCStrategy:
             timestamp = datetime.now(pytz.UTC)
         
         # Convert to EST
-        est = pytz.timezone('US/Eastern')
-        est_time = timestamp.astimezone(est)
-        hour = est_time.hour
+        est_time = timestamp.astimezone(EASTERN)
+        return killzone_for_hour(est_time.hour)
+    
+    @staticmethod
+    def label_killzones(index: pd.DatetimeIndex) -> pd.DataFrame:
+        """
+        Killzone of every candle at once (naive timestamps are UTC)
         
-        if 2 <= hour < 5:
-            return {
-                "in_killzone": True,
-                "killzone_name": "London Open",
-                "probability_multiplier": 1.3,
-                "description": "High probability setup window"
-            }
-        elif 8 <= hour < 11:
-            return {
-                "in_killzone": True,
-                "killzone_name": "New York AM",
-                "probability_multiplier": 1.5,
-                "description": "Highest probability setup window"
-            }
-        elif 10 <= hour < 12:
-            return {
-                "in_killzone": True,
-                "killzone_name": "London Close",
-                "probability_multiplier": 1.2,
-                "description": "Medium probability setup window"
-            }
-        else:
-            return {
-                "in_killzone": False,
-                "killzone_name": None,
-                "probability_multiplier": 1.0,
-                "description": "Outside killzone - lower probability"
-            }
+        Returns a frame on `index` with in_killzone, killzone_name and
+        probability_multiplier - what is_in_killzone gives per timestamp.
+        """
+        return label_killzones(index)
     
     @staticmethod
     def calculate_ote_zones(df: pd.DataFrame, structure: Dict) -> Dict:
@@ -376,15 +443,12 @@ class SMCStrategy:
         if len(df) < 20 or structure.get('structure') == "UNCLEAR":
             return {}
         
-        # Find last significant impulse move
-        recent_data = df.tail(50)
-        swing_high = recent_data['high'].max()
-        swing_low = recent_data['low'].min()
-        
-        # Find where these swings occurred
-        high_idx = recent_data['high'].idxmax()
-        low_idx = recent_data['low'].idxmin()
-        
+        # Find last significant impulse move, and where its extremes occurred
+        high_idx, swing_high, low_idx, swing_low = SwingIndex.for_frame(df).range_extremes(50)
+        return SMCStrategy._ote_zones(high_idx, swing_high, low_idx, swing_low, df['close'].iloc[-1])
+    
+    @staticmethod
+    def _ote_zones(high_idx: int, swing_high: float, low_idx: int, swing_low: float, current_price: float) -> Dict:
         # Determine direction of last impulse
         if high_idx > low_idx:
             # Bullish impulse (from low to high)
@@ -411,14 +475,16 @@ class SMCStrategy:
             ote_705 = impulse_end + (impulse_range * 0.705)
             ote_79 = impulse_end + (impulse_range * 0.79)
         
-        current_price = df['close'].iloc[-1]
-        
         # Check if price is in OTE zone
         if direction == "BULLISH":
             in_ote = ote_79 <= current_price <= ote_62
         else:
             in_ote = ote_62 <= current_price <= ote_79
         
+        # Round as Python floats: np.float64 rounds halfway cases differently,
+        # and SMCState passes plain floats where the batch path has NumPy ones
+        ote_62, ote_705, ote_79 = float(ote_62), float(ote_705), float(ote_79)
+        
         return {
             "direction": direction,
             "ote_0.62": round(ote_62, 2),
@@ -440,10 +506,11 @@ class SMCStrategy:
         if len(df) < 5:
             return {"bullish_sweep": False, "bearish_sweep": False}
         
-        recent_candles = df.tail(3)
-        last_candle = df.iloc[-1]
-        prev_candle = df.iloc[-2]
-        
+        return SMCStrategy._liquidity_sweeps(df.iloc[-1], liquidity_zones)
+    
+    @staticmethod
+    def _liquidity_sweeps(last_candle, liquidity_zones: Dict) -> Dict:
+        """Sweep check against one candle (anything indexable by open/high/low/close)"""
         bullish_sweep = False
         bearish_sweep = False
         swept_level = None
@@ -493,40 +560,28 @@ class SMCStrategy:
         When price breaks through OB without respect, it becomes a Breaker
         """
         if len(df) < 10:
-            return {"bullish_breaker": [], "bearish_breaker": []}
-        
-        current_price = df['close'].iloc[-1]
-        recent_high = df.tail(5)['high'].max()
-        recent_low = df.tail(5)['low'].min()
-        
-        bullish_breakers = []
-        bearish_breakers = []
-        
-        # Check bullish OBs that got broken (become bearish breakers)
-        for ob in order_blocks.get('bullish_ob', []):
-            # If price broke significantly below a bullish OB, it becomes a bearish breaker
-            if current_price < ob['low'] * 0.995:
-                bearish_breakers.append({
-                    'high': ob['high'],
-                    'low': ob['low'],
-                    'strength': ob['strength'] * 0.8,  # Breakers slightly less reliable
-                    'type': 'FAILED_BULLISH_OB'
-                })
-        
-        # Check bearish OBs that got broken (become bullish breakers)
-        for ob in order_blocks.get('bearish_ob', []):
-            # If price broke significantly above a bearish OB, it becomes a bullish breaker
-            if current_price > ob['high'] * 1.005:
-                bullish_breakers.append({
-                    'high': ob['high'],
-                    'low': ob['low'],
-                    'strength': ob['strength'] * 0.8,
-                    'type': 'FAILED_BEARISH_OB'
-                })
+            return {"bullish_breaker": ZoneSet.empty(BREAKER_BLOCK), "bearish_breaker": ZoneSet.empty(BREAKER_BLOCK)}
+        
+        return SMCStrategy._breaker_blocks(df['close'].iloc[-1], order_blocks)
+    
+    @staticmethod
+    def _breaker_blocks(current_price: float, order_blocks: Dict) -> Dict[str, ZoneSet]:
+        def breakers(obs, broken, kind):
+            obs = obs[broken][:2]  # Keep top 2
+            blocks = np.empty(len(obs), dtype=BREAKER_BLOCK)
+            blocks['high'], blocks['low'] = obs['high'], obs['low']
+            blocks['strength'] = obs['strength'] * 0.8  # Breakers slightly less reliable
+            blocks['type'] = kind
+            return ZoneSet(blocks)
+        
+        bullish_obs = order_blocks.get('bullish_ob', ZoneSet.empty(ORDER_BLOCK))
+        bearish_obs = order_blocks.get('bearish_ob', ZoneSet.empty(ORDER_BLOCK))
         
         return {
-            "bullish_breaker": bullish_breakers[:2],  # Keep top 2
-            "bearish_breaker": bearish_breakers[:2]
+            # Bullish OBs price broke significantly below become bearish breakers
+            "bearish_breaker": breakers(bullish_obs, current_price < bullish_obs['low'] * 0.995, 'FAILED_BULLISH_OB'),
+            # Bearish OBs price broke significantly above become bullish breakers
+            "bullish_breaker": breakers(bearish_obs, current_price > bearish_obs['high'] * 1.005, 'FAILED_BEARISH_OB'),
         }
     
     @staticmethod
@@ -545,21 +600,11 @@ class SMCStrategy:
             ...
         ]
         
-        Returns the key level dict if price is within tolerance, else None
+        Returns the highest-confluence key level dict whose range (widened by
+        the tolerance) contains the price, else None. Build a KeyLevelIndex
+        directly to check many prices against the same levels.
         """
-        for level in key_levels:
-            level_price = level.get('price', 0)
-            level_high = level.get('high', level_price)
-            level_low = level.get('low', level_price)
-            
-            # Calculate tolerance
-            tolerance = level_price * (tolerance_pct / 100)
-            
-            # Check if price is within tolerance of the level
-            if level_low - tolerance <= current_price <= level_high + tolerance:
-                return level
-        
-        return None
+        return KeyLevelIndex(key_levels, tolerance_pct).best(current_price)
     
     @staticmethod
     def wait_for_confirmation(df: pd.DataFrame, signal_direction: str, key_level: Dict) -> bool:
@@ -626,40 +671,36 @@ class SMCStrategy:
         ote_zones: Dict,
         zones: Dict,
         breakers: Dict
-    ) -> List[Dict]:
+    ) -> ZoneSet:
         """
         Calculate optimal limit order entry levels with confluence ranking
         
-        Returns list of entry levels sorted by confluence (best first)
+        Returns KEY_LEVEL entries sorted by confluence (best first)
         """
-        limit_levels = []
+        limit_levels = []  # KEY_LEVEL rows
         
         if signal == "LONG":
             # Order Block lows (demand zones)
-            for ob in order_blocks.get('bullish_ob', [])[:3]:
+            for ob in order_blocks['bullish_ob'][:3]:
                 if ob['low'] < current_price:
                     confluence = 3  # Base confluence
                     confluence += min(int(ob['strength']), 3)  # Add strength
                     
-                    limit_levels.append({
-                        "price": ob['low'],
-                        "type": "ORDER_BLOCK_LOW",
-                        "confluence": confluence,
-                        "description": f"Bullish Order Block (Strength: {ob['strength']:.1f})"
-                    })
+                    limit_levels.append(key_level(
+                        "ORDER_BLOCK_LOW", ob['low'], confluence,
+                        description=f"Bullish Order Block (Strength: {ob['strength']:.1f})"
+                    ))
             
             # FVG midpoints
-            for fvg in fvgs.get('bullish_fvg', [])[:2]:
+            for fvg in fvgs['bullish_fvg'][:2]:
                 if fvg['bottom'] < current_price:
                     midpoint = (fvg['top'] + fvg['bottom']) / 2
                     confluence = 2
                     
-                    limit_levels.append({
-                        "price": midpoint,
-                        "type": "FVG_MIDPOINT",
-                        "confluence": confluence,
-                        "description": f"FVG 50% Fill (${fvg['bottom']:.2f}-${fvg['top']:.2f})"
-                    })
+                    limit_levels.append(key_level(
+                        "FVG_MIDPOINT", midpoint, confluence,
+                        description=f"FVG 50% Fill (${fvg['bottom']:.2f}-${fvg['top']:.2f})"
+                    ))
             
             # OTE levels
             if ote_zones and ote_zones.get('direction') == "BULLISH":
@@ -668,60 +709,50 @@ class SMCStrategy:
                     if price and price < current_price:
                         confluence = 4 if '705' in fib_level else 3
                         
-                        limit_levels.append({
-                            "price": price,
-                            "type": f"OTE_{fib_level.split('_')[1]}",
-                            "confluence": confluence,
-                            "description": f"Optimal Trade Entry {fib_level.split('_')[1]}"
-                        })
+                        limit_levels.append(key_level(
+                            f"OTE_{fib_level.split('_')[1]}", price, confluence,
+                            description=f"Optimal Trade Entry {fib_level.split('_')[1]}"
+                        ))
             
             # Discount zone levels
             if zones and zones.get('current_zone') == "DISCOUNT":
                 equilibrium = zones.get('equilibrium')
                 if equilibrium and equilibrium < current_price:
-                    limit_levels.append({
-                        "price": equilibrium,
-                        "type": "EQUILIBRIUM",
-                        "confluence": 2,
-                        "description": "50% Equilibrium Level"
-                    })
+                    limit_levels.append(key_level(
+                        "EQUILIBRIUM", equilibrium, 2,
+                        description="50% Equilibrium Level"
+                    ))
             
             # Breaker blocks
-            for breaker in breakers.get('bullish_breaker', []):
+            for breaker in breakers['bullish_breaker']:
                 if breaker['low'] < current_price:
-                    limit_levels.append({
-                        "price": breaker['low'],
-                        "type": "BREAKER_BLOCK",
-                        "confluence": 3,
-                        "description": "Bullish Breaker Block"
-                    })
+                    limit_levels.append(key_level(
+                        "BREAKER_BLOCK", breaker['low'], 3,
+                        description="Bullish Breaker Block"
+                    ))
         
         elif signal == "SHORT":
             # Order Block highs (supply zones)
-            for ob in order_blocks.get('bearish_ob', [])[:3]:
+            for ob in order_blocks['bearish_ob'][:3]:
                 if ob['high'] > current_price:
                     confluence = 3
                     confluence += min(int(ob['strength']), 3)
                     
-                    limit_levels.append({
-                        "price": ob['high'],
-                        "type": "ORDER_BLOCK_HIGH",
-                        "confluence": confluence,
-                        "description": f"Bearish Order Block (Strength: {ob['strength']:.1f})"
-                    })
+                    limit_levels.append(key_level(
+                        "ORDER_BLOCK_HIGH", ob['high'], confluence,
+                        description=f"Bearish Order Block (Strength: {ob['strength']:.1f})"
+                    ))
             
             # FVG midpoints
-            for fvg in fvgs.get('bearish_fvg', [])[:2]:
+            for fvg in fvgs['bearish_fvg'][:2]:
                 if fvg['top'] > current_price:
                     midpoint = (fvg['top'] + fvg['bottom']) / 2
                     confluence = 2
                     
-                    limit_levels.append({
-                        "price": midpoint,
-                        "type": "FVG_MIDPOINT",
-                        "confluence": confluence,
-                        "description": f"FVG 50% Fill (${fvg['bottom']:.2f}-${fvg['top']:.2f})"
-                    })
+                    limit_levels.append(key_level(
+                        "FVG_MIDPOINT", midpoint, confluence,
+                        description=f"FVG 50% Fill (${fvg['bottom']:.2f}-${fvg['top']:.2f})"
+                    ))
             
             # OTE levels
             if ote_zones and ote_zones.get('direction') == "BEARISH":
@@ -730,37 +761,31 @@ class SMCStrategy:
                     if price and price > current_price:
                         confluence = 4 if '705' in fib_level else 3
                         
-                        limit_levels.append({
-                            "price": price,
-                            "type": f"OTE_{fib_level.split('_')[1]}",
-                            "confluence": confluence,
-                            "description": f"Optimal Trade Entry {fib_level.split('_')[1]}"
-                        })
+                        limit_levels.append(key_level(
+                            f"OTE_{fib_level.split('_')[1]}", price, confluence,
+                            description=f"Optimal Trade Entry {fib_level.split('_')[1]}"
+                        ))
             
             # Premium zone levels
             if zones and zones.get('current_zone') == "PREMIUM":
                 equilibrium = zones.get('equilibrium')
                 if equilibrium and equilibrium > current_price:
-                    limit_levels.append({
-                        "price": equilibrium,
-                        "type": "EQUILIBRIUM",
-                        "confluence": 2,
-                        "description": "50% Equilibrium Level"
-                    })
+                    limit_levels.append(key_level(
+                        "EQUILIBRIUM", equilibrium, 2,
+                        description="50% Equilibrium Level"
+                    ))
             
             # Breaker blocks
-            for breaker in breakers.get('bearish_breaker', []):
+            for breaker in breakers['bearish_breaker']:
                 if breaker['high'] > current_price:
-                    limit_levels.append({
-                        "price": breaker['high'],
-                        "type": "BREAKER_BLOCK",
-                        "confluence": 3,
-                        "description": "Bearish Breaker Block"
-                    })
+                    limit_levels.append(key_level(
+                        "BREAKER_BLOCK", breaker['high'], 3,
+                        description="Bearish Breaker Block"
+                    ))
         
         # Sort by confluence (highest first) and return top 5
-        limit_levels.sort(key=lambda x: x['confluence'], reverse=True)
-        return limit_levels[:5]
+        limit_levels = ZoneSet.from_rows(KEY_LEVEL, limit_levels)
+        return limit_levels[np.argsort(-limit_levels['confluence'], kind='stable')[:5]]
     
     @staticmethod
     def generate_smc_signal(df: pd.DataFrame, current_time: datetime = None) -> Tuple:
@@ -773,20 +798,58 @@ class SMCStrategy:
         5. Multi-level confluence scoring
         
         Returns: (signal, strength, confluences, confidence, key_levels, killzone_data, ote_zones, limit_orders)
+        
+        Runs the "smc" stage of SMC_PIPELINE, so every detector reads the same
+        extracted arrays and swing index.
         """
-        if len(df) < 20:
-            return "HOLD", "WEAK", ["Insufficient data for ICT analysis"], 30, [], {}, {}, []
+        return SMC_PIPELINE.run(AnalysisContext(df, current_time), 'smc')['smc']
+    
+    @staticmethod
+    def _insufficient_data_signal() -> Tuple:
+        return "HOLD", "WEAK", ["Insufficient data for ICT analysis"], 30, ZoneSet.empty(KEY_LEVEL), {}, {}, ZoneSet.empty(KEY_LEVEL)
+    
+    @staticmethod
+    def analyze_components(df: pd.DataFrame) -> Dict:
+        """
+        Candle-derived SMC state that generate_smc_signal scores
         
+        Keys: structure, order_blocks, fair_value_gaps, premium_discount,
+        liquidity, ote_zones, last_candle (open/high/low/close),
+        liquidity_sweeps and breaker_blocks. Needs at least 20 candles.
+        SMCState builds the same dict incrementally.
+        """
+        return SMC_PIPELINE.run(AnalysisContext(df), 'components')['components']
+    
+    @staticmethod
+    def _components(structure, order_blocks, fair_value_gaps, premium_discount,
+                    liquidity, ote_zones, last_candle, liquidity_sweeps, breaker_blocks) -> Dict:
+        return {
+            "structure": structure,
+            "order_blocks": order_blocks,
+            "fair_value_gaps": fair_value_gaps,
+            "premium_discount": premium_discount,
+            "liquidity": liquidity,
+            "ote_zones": ote_zones,
+            "last_candle": last_candle,
+            "liquidity_sweeps": liquidity_sweeps,
+            "breaker_blocks": breaker_blocks
+        }
+    
+    @staticmethod
+    def score_components(components: Dict, current_time: datetime = None) -> Tuple:
+        """Score analyze_components output into the generate_smc_signal tuple"""
         if current_time is None:
             current_time = datetime.now(pytz.UTC)
         
         confluences = []
         bullish_score = 0
         bearish_score = 0
-        key_levels = []  # Track all key levels for confirmation
+        key_levels = []  # KEY_LEVEL rows of all key levels, for confirmation
+        last_candle = components['last_candle']
+        current_price = last_candle['close']
         
         # 1. Market Structure
-        structure = SMCStrategy.detect_market_structure(df)
+        structure = components['structure']
         confluences.append(f"📊 Market Structure: {structure['structure']}")
         
         if structure['trend'] == "BULLISH":
@@ -795,21 +858,17 @@ class SMCStrategy:
             bearish_score += 2
         
         # 2. Order Blocks
-        order_blocks = SMCStrategy.detect_order_blocks(df, structure)
-        current_price = df['close'].iloc[-1]
+        order_blocks = components['order_blocks']
         
         # Check if price near bullish OB
         for ob in order_blocks['bullish_ob']:
             if ob['low'] <= current_price <= ob['high']:
                 confluences.append(f"🟢 Price at Bullish Order Block (Strength: {ob['strength']:.1f})")
                 bullish_score += 2.5
-                key_levels.append({
-                    "type": "ORDER_BLOCK",
-                    "price": ob['low'],
-                    "high": ob['high'],
-                    "low": ob['low'],
-                    "confluence": min(int(ob['strength']) + 3, 6)
-                })
+                key_levels.append(key_level(
+                    "ORDER_BLOCK", ob['low'], min(int(ob['strength']) + 3, 6),
+                    high=ob['high'], low=ob['low']
+                ))
                 break
         
         # Check if price near bearish OB
@@ -817,17 +876,14 @@ class SMCStrategy:
             if ob['low'] <= current_price <= ob['high']:
                 confluences.append(f"🔴 Price at Bearish Order Block (Strength: {ob['strength']:.1f})")
                 bearish_score += 2.5
-                key_levels.append({
-                    "type": "ORDER_BLOCK",
-                    "price": ob['high'],
-                    "high": ob['high'],
-                    "low": ob['low'],
-                    "confluence": min(int(ob['strength']) + 3, 6)
-                })
+                key_levels.append(key_level(
+                    "ORDER_BLOCK", ob['high'], min(int(ob['strength']) + 3, 6),
+                    high=ob['high'], low=ob['low']
+                ))
                 break
         
         # 3. Fair Value Gaps
-        fvgs = SMCStrategy.detect_fair_value_gaps(df)
+        fvgs = components['fair_value_gaps']
         
         # Bullish FVG below price (potential support)
         for fvg in fvgs['bullish_fvg']:
@@ -835,13 +891,10 @@ class SMCStrategy:
                 confluences.append(f"📈 Bullish FVG nearby (${fvg['bottom']:.2f}-${fvg['top']:.2f})")
                 bullish_score += 1.5
                 midpoint = (fvg['top'] + fvg['bottom']) / 2
-                key_levels.append({
-                    "type": "FVG_MIDPOINT",
-                    "price": midpoint,
-                    "high": fvg['top'],
-                    "low": fvg['bottom'],
-                    "confluence": 3
-                })
+                key_levels.append(key_level(
+                    "FVG_MIDPOINT", midpoint, 3,
+                    high=fvg['top'], low=fvg['bottom']
+                ))
                 break
         
         # Bearish FVG above price (potential resistance)
@@ -850,17 +903,14 @@ class SMCStrategy:
                 confluences.append(f"📉 Bearish FVG nearby (${fvg['bottom']:.2f}-${fvg['top']:.2f})")
                 bearish_score += 1.5
                 midpoint = (fvg['top'] + fvg['bottom']) / 2
-                key_levels.append({
-                    "type": "FVG_MIDPOINT",
-                    "price": midpoint,
-                    "high": fvg['top'],
-                    "low": fvg['bottom'],
-                    "confluence": 3
-                })
+                key_levels.append(key_level(
+                    "FVG_MIDPOINT", midpoint, 3,
+                    high=fvg['top'], low=fvg['bottom']
+                ))
                 break
         
         # 4. Break of Structure
-        bos = SMCStrategy.detect_break_of_structure(df, structure)
+        bos = SMCStrategy._break_of_structure(current_price, structure)
         if bos['bullish_bos']:
             confluences.append("💥 Bullish Break of Structure - Trend continuation confirmed")
             bullish_score += 3
@@ -869,7 +919,7 @@ class SMCStrategy:
             bearish_score += 3
         
         # 5. Change of Character
-        choch = SMCStrategy.detect_change_of_character(df, structure)
+        choch = SMCStrategy._change_of_character(current_price, structure)
         if choch['bullish_choch']:
             confluences.append("🔄 Bullish Change of Character - Potential reversal")
             bullish_score += 2.5
@@ -878,7 +928,7 @@ class SMCStrategy:
             bearish_score += 2.5
         
         # 6. Premium/Discount Zones
-        zones = SMCStrategy.calculate_premium_discount_zones(df)
+        zones = components['premium_discount']
         if zones:
             zone_info = f"{zones['current_zone']} ({zones['zone_depth_pct']:.1f}% depth)"
             confluences.append(f"💰 Price in {zone_info}")
@@ -892,7 +942,7 @@ class SMCStrategy:
                 bearish_score += 1.5
         
         # 7. Liquidity Zones
-        liquidity = SMCStrategy.detect_liquidity_zones(df)
+        liquidity = components['liquidity']
         if liquidity['buy_side_liquidity']:
             confluences.append(f"💧 Buy-side liquidity: ${liquidity['buy_side_liquidity'][0]:,.2f}")
         if liquidity['sell_side_liquidity']:
@@ -909,29 +959,25 @@ class SMCStrategy:
                 bearish_score *= killzone_data['probability_multiplier']
         
         # 9. OTE Zones (NEW)
-        ote_zones = SMCStrategy.calculate_ote_zones(df, structure)
+        ote_zones = components['ote_zones']
         if ote_zones and ote_zones.get('in_ote_zone'):
             confluences.append(f"🎯 Price in OTE Zone ({ote_zones['direction']}) - Optimal entry range")
             if ote_zones['direction'] == "BULLISH":
                 bullish_score += 2
                 # Add OTE levels to key levels
-                key_levels.append({
-                    "type": "OTE_0.705",
-                    "price": ote_zones['ote_0.705'],
-                    "confluence": 4,
-                    "description": "Optimal Trade Entry (Golden Pocket)"
-                })
+                key_levels.append(key_level(
+                    "OTE_0.705", ote_zones['ote_0.705'], 4,
+                    description="Optimal Trade Entry (Golden Pocket)"
+                ))
             else:
                 bearish_score += 2
-                key_levels.append({
-                    "type": "OTE_0.705",
-                    "price": ote_zones['ote_0.705'],
-                    "confluence": 4,
-                    "description": "Optimal Trade Entry (Golden Pocket)"
-                })
+                key_levels.append(key_level(
+                    "OTE_0.705", ote_zones['ote_0.705'], 4,
+                    description="Optimal Trade Entry (Golden Pocket)"
+                ))
         
         # 10. Liquidity Sweeps (NEW)
-        sweeps = SMCStrategy.detect_liquidity_sweeps(df, liquidity)
+        sweeps = components['liquidity_sweeps']
         if sweeps['bullish_sweep']:
             confluences.append(f"🌊 Bullish Liquidity Sweep @ ${sweeps['swept_level']:,.2f} - Stops taken, reversal likely")
             bullish_score += 3
@@ -940,38 +986,33 @@ class SMCStrategy:
             bearish_score += 3
         
         # 11. Breaker Blocks (NEW)
-        breakers = SMCStrategy.detect_breaker_blocks(df, order_blocks, structure)
-        current_price = df['close'].iloc[-1]
+        breakers = components['breaker_blocks']
         
         for breaker in breakers['bullish_breaker']:
             if breaker['low'] <= current_price <= breaker['high']:
                 confluences.append(f"⚡ Price at Bullish Breaker Block - Failed resistance becomes support")
                 bullish_score += 2
-                key_levels.append({
-                    "type": "BREAKER_BLOCK",
-                    "price": breaker['low'],
-                    "high": breaker['high'],
-                    "low": breaker['low'],
-                    "confluence": 3
-                })
+                key_levels.append(key_level(
+                    "BREAKER_BLOCK", breaker['low'], 3,
+                    high=breaker['high'], low=breaker['low']
+                ))
         
         for breaker in breakers['bearish_breaker']:
             if breaker['low'] <= current_price <= breaker['high']:
                 confluences.append(f"⚡ Price at Bearish Breaker Block - Failed support becomes resistance")
                 bearish_score += 2
-                key_levels.append({
-                    "type": "BREAKER_BLOCK",
-                    "price": breaker['high'],
-                    "high": breaker['high'],
-                    "low": breaker['low'],
-                    "confluence": 3
-                })
+                key_levels.append(key_level(
+                    "BREAKER_BLOCK", breaker['high'], 3,
+                    high=breaker['high'], low=breaker['low']
+                ))
+        
+        key_levels = ZoneSet.from_rows(KEY_LEVEL, key_levels)
         
         # Determine final signal
         total_score = bullish_score + bearish_score
         
         if total_score == 0:
-            return "HOLD", "WEAK", confluences, 30, key_levels, killzone_data, ote_zones, []
+            return "HOLD", "WEAK", confluences, 30, key_levels, killzone_data, ote_zones, ZoneSet.empty(KEY_LEVEL)
         
         if bullish_score > bearish_score:
             signal = "LONG"
@@ -997,10 +1038,49 @@ class SMCStrategy:
             confidence = 50
         
         # Calculate limit orders for best entry points
-        zones = SMCStrategy.calculate_premium_discount_zones(df)
         limit_orders = SMCStrategy.calculate_limit_orders(
             signal, current_price, order_blocks, fvgs, ote_zones, zones, breakers
         )
         
         return signal, strength, confluences, round(confidence, 2), key_levels, killzone_data, ote_zones, limit_orders
 
+
+def _last_candle(open_: np.ndarray, high: np.ndarray, low: np.ndarray, close: np.ndarray) -> Dict:
+    return {'open': open_[-1], 'high': high[-1], 'low': low[-1], 'close': close[-1]}
+
+
+def _ote_stage(extremes: Tuple, structure: Dict, price: float) -> Dict:
+    if structure.get('structure') == "UNCLEAR":
+        return {}
+    return SMCStrategy._ote_zones(*extremes, price)
+
+
+# generate_smc_signal as named stages over one AnalysisContext; thresholds and
+# fallbacks match the detect_* methods' own "not enough data" guards
+SMC_STAGES = [
+    Stage('swings', ('df',), SwingIndex.for_frame),
+    Stage('structure', ('swings',), SMCStrategy._structure_from_swings,
+          20, lambda: {"trend": "RANGING", "structure": "UNCLEAR"}),
+    Stage('range_extremes', ('swings',), lambda swings: swings.range_extremes(50), 1, lambda: None),
+    Stage('order_blocks', ('open', 'high', 'low', 'close'), SMCStrategy._order_blocks,
+          10, lambda: {"bullish_ob": ZoneSet.empty(ORDER_BLOCK), "bearish_ob": ZoneSet.empty(ORDER_BLOCK)}),
+    Stage('fair_value_gaps', ('high', 'low'), SMCStrategy._fair_value_gaps,
+          3, lambda: {"bullish_fvg": ZoneSet.empty(FAIR_VALUE_GAP), "bearish_fvg": ZoneSet.empty(FAIR_VALUE_GAP)}),
+    Stage('premium_discount', ('range_extremes', 'price'),
+          lambda extremes, price: SMCStrategy._premium_discount(extremes[1], extremes[3], price), 20, dict),
+    Stage('liquidity', ('high', 'low'), SMCStrategy._liquidity_zones,
+          20, lambda: {"buy_side_liquidity": [], "sell_side_liquidity": []}),
+    Stage('ote_zones', ('range_extremes', 'structure', 'price'), _ote_stage, 20, dict),
+    Stage('last_candle', ('open', 'high', 'low', 'close'), _last_candle, 1, lambda: None),
+    Stage('liquidity_sweeps', ('last_candle', 'liquidity'), SMCStrategy._liquidity_sweeps,
+          5, lambda: {"bullish_sweep": False, "bearish_sweep": False}),
+    Stage('breaker_blocks', ('price', 'order_blocks'), SMCStrategy._breaker_blocks,
+          10, lambda: {"bullish_breaker": ZoneSet.empty(BREAKER_BLOCK), "bearish_breaker": ZoneSet.empty(BREAKER_BLOCK)}),
+    Stage('components', (
+        'structure', 'order_blocks', 'fair_value_gaps', 'premium_discount', 'liquidity',
+        'ote_zones', 'last_candle', 'liquidity_sweeps', 'breaker_blocks'
+    ), SMCStrategy._components),
+    Stage('smc', ('components', 'current_time'), SMCStrategy.score_components,
+          20, SMCStrategy._insufficient_data_signal),
+]
+SMC_PIPELINE = Pipeline(SMC_STAGES)
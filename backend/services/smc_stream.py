@@ -0,0 +1,384 @@
+"""
+Streaming SMC
+Incremental Smart Money Concepts state with amortized O(1) updates per closed candle
+"""
+from bisect import bisect_left
+from collections import deque
+from datetime import datetime
+from itertools import islice
+from typing import Dict, List, Optional, Tuple
+import heapq
+import numpy as np
+import pandas as pd
+from services.smc_strategy import SMCStrategy
+from services.zones import ZoneSet, ORDER_BLOCK, FAIR_VALUE_GAP, LIQUIDITY_POOL
+
+OHLC = Tuple[float, float, float, float]  # open, high, low, close
+
+# Windows used by the SMCStrategy detectors (their defaults)
+STRUCTURE_LOOKBACK = 20   # detect_market_structure
+SWING_ORDER = 2           # SwingIndex
+RANGE_LOOKBACK = 50       # premium/discount and OTE range
+LIQUIDITY_LOOKBACK = 50   # detect_liquidity_zones
+LIQUIDITY_RUN = 5         # candles per equal-high/low run
+LIQUIDITY_EQUAL_PCT = 0.2 # max run std, % of its mean
+MAX_ORDER_BLOCKS = 3
+MAX_FVGS = 5
+MAX_POOLS = 3
+MIN_CANDLES = 20          # generate_smc_signal warm-up
+
+# Drop stale heap / stack entries once this many have piled up
+COMPACT_AFTER = 256
+
+
+class _RangeExtreme:
+    """Rolling max (or min) with the position of its first occurrence (np.argmax semantics)"""
+
+    def __init__(self, use_max: bool = True):
+        self.sign = 1 if use_max else -1
+        self.items = deque()  # (position, signed value), signed values strictly decreasing
+
+    def push(self, position: int, value: float):
+        signed = self.sign * value
+        # Strict: an equal earlier value stays in front, so ties keep the first one
+        while self.items and self.items[-1][1] < signed:
+            self.items.pop()
+        self.items.append((position, signed))
+
+    def evict(self, first_kept: int):
+        while self.items and self.items[0][0] < first_kept:
+            self.items.popleft()
+
+    def best(self) -> Tuple[int, float]:
+        position, signed = self.items[0]
+        return position, self.sign * signed
+
+
+class _SuffixExtreme:
+    """
+    Lowest (or highest) value from any position up to the latest candle
+
+    A monotonic stack: each query is a binary search for the first surviving
+    position at or after the one asked for.
+    """
+
+    def __init__(self, use_max: bool = False):
+        self.sign = -1 if use_max else 1
+        self.positions: List[int] = []
+        self.values: List[float] = []  # signed, strictly increasing
+
+    def push(self, position: int, value: float):
+        signed = self.sign * value
+        while self.values and self.values[-1] >= signed:
+            self.values.pop()
+            self.positions.pop()
+        self.positions.append(position)
+        self.values.append(signed)
+
+    def since(self, position: int) -> Optional[float]:
+        """Extreme over [position, latest], None if nothing has traded since"""
+        i = bisect_left(self.positions, position)
+        if i == len(self.positions):
+            return None
+        return self.sign * self.values[i]
+
+    def evict(self, first_kept: int):
+        stale = bisect_left(self.positions, first_kept)
+        if stale > COMPACT_AFTER:
+            del self.positions[:stale]
+            del self.values[:stale]
+
+
+class _GapBook:
+    """
+    Unfilled fair value gaps of one direction
+
+    A bullish gap is retired once a later low trades down to its bottom, a
+    bearish gap once a later high reaches its top (detect_fair_value_gaps
+    keeps exactly the gaps that haven't). A heap keyed on that trigger price
+    retires every gap a candle fills without scanning the rest.
+    """
+
+    def __init__(self, bullish: bool):
+        self.bullish = bullish
+        self.open: Dict[int, Tuple[float, float]] = {}  # middle candle -> (top, bottom), oldest first
+        self.triggers: List[Tuple[float, int]] = []
+        # Price action since each gap: lows for bullish gaps, highs for bearish
+        self.after = _SuffixExtreme(use_max=not bullish)
+
+    def trade(self, position: int, high: float, low: float):
+        """Retire gaps filled by this candle and record it for fill_pct"""
+        if self.bullish:
+            while self.triggers and -self.triggers[0][0] >= low:
+                self.open.pop(heapq.heappop(self.triggers)[1], None)
+            self.after.push(position, low)
+        else:
+            while self.triggers and self.triggers[0][0] <= high:
+                self.open.pop(heapq.heappop(self.triggers)[1], None)
+            self.after.push(position, high)
+
+    def add(self, middle: int, top: float, bottom: float):
+        self.open[middle] = (top, bottom)
+        heapq.heappush(self.triggers, (-bottom, middle) if self.bullish else (top, middle))
+
+    def evict(self, first_middle: int):
+        while self.open:
+            middle = next(iter(self.open))
+            if middle >= first_middle:
+                break
+            del self.open[middle]
+        self.after.evict(first_middle)
+
+        if len(self.triggers) > 2 * len(self.open) + COMPACT_AFTER:
+            self.triggers = [entry for entry in self.triggers if entry[1] in self.open]
+            heapq.heapify(self.triggers)
+
+    def latest(self, start: int, limit: int = MAX_FVGS) -> ZoneSet:
+        """The newest `limit` open gaps, oldest first, in detect_fair_value_gaps format"""
+        gaps = []
+        for middle in reversed(list(islice(reversed(self.open), limit))):
+            top, bottom = self.open[middle]
+            extreme = self.after.since(middle + 2)
+            if self.bullish:
+                traded = top - (np.inf if extreme is None else extreme)
+            else:
+                traded = (-np.inf if extreme is None else extreme) - bottom
+            gaps.append((
+                middle - start, top, bottom, top - bottom,
+                min(max(traded / (top - bottom), 0.0), 1.0)
+            ))
+        return ZoneSet.from_rows(FAIR_VALUE_GAP, gaps)
+
+
+class SMCState:
+    """
+    Running SMC state for one candle stream
+
+    Tracks swing structure, order blocks, open FVGs, the 50-candle range and
+    equal-high/low runs as closed candles arrive. `signal` returns the same
+    tuple as SMCStrategy.generate_smc_signal over the last `window` candles;
+    candle positions in the output (`index`, `last_index`) are relative to that
+    window, as they would be in the batch frame.
+    """
+
+    def __init__(self, window: int = None):
+        self.window = window  # None: every candle ingested so far
+        self.count = 0
+        self.last_timestamp = None
+        self.recent = deque(maxlen=LIQUIDITY_RUN)  # Last few (open, high, low, close)
+
+        self.swing_highs = deque()  # (position, high)
+        self.swing_lows = deque()   # (position, low)
+        self.order_blocks = {'bullish_ob': deque(), 'bearish_ob': deque()}
+        self.gaps = {'bullish_fvg': _GapBook(bullish=True), 'bearish_fvg': _GapBook(bullish=False)}
+        self.range_high = _RangeExtreme(use_max=True)
+        self.range_low = _RangeExtreme(use_max=False)
+        self.equal_highs = deque()  # (last candle of the run, mean level)
+        self.equal_lows = deque()
+
+    @property
+    def start(self) -> int:
+        """Position of the first candle in the window"""
+        return 0 if self.window is None else max(0, self.count - self.window)
+
+    def update(self, candle: OHLC, timestamp=None):
+        """Ingest one closed candle"""
+        open_, high, low, close = candle
+        position = self.count
+        self.recent.append(candle)
+        self.count += 1
+        self.last_timestamp = timestamp
+
+        self._update_swings(position)
+        self._update_order_blocks(position)
+        self._update_gaps(position, high, low)
+        self.range_high.push(position, high)
+        self.range_low.push(position, low)
+        self._update_equal_levels(position)
+        self._evict()
+
+    def components(self) -> Dict:
+        """Same dict as SMCStrategy.analyze_components over the current window"""
+        start = self.start
+        structure = SMCStrategy._classify_structure(
+            [value for _, value in self.swing_highs],
+            [value for _, value in self.swing_lows]
+        )
+
+        high_pos, swing_high = self.range_high.best()
+        low_pos, swing_low = self.range_low.best()
+        open_, high, low, close = self.recent[-1]
+        last_candle = {'open': open_, 'high': high, 'low': low, 'close': close}
+
+        order_blocks = {
+            name: ZoneSet.from_rows(ORDER_BLOCK, (
+                (i - start, h, l, o, c, strength)
+                # Newest first, like detect_order_blocks
+                for i, h, l, o, c, strength in islice(reversed(blocks), MAX_ORDER_BLOCKS)
+            ))
+            for name, blocks in self.order_blocks.items()
+        }
+        liquidity = SMCStrategy._liquidity_result(
+            self._pools(self.equal_highs, start),
+            self._pools(self.equal_lows, start)
+        )
+
+        return {
+            "structure": structure,
+            "order_blocks": order_blocks,
+            "fair_value_gaps": {name: book.latest(start) for name, book in self.gaps.items()},
+            "premium_discount": SMCStrategy._premium_discount(swing_high, swing_low, close),
+            "liquidity": liquidity,
+            "ote_zones": SMCStrategy._ote_zones(high_pos, swing_high, low_pos, swing_low, close),
+            "last_candle": last_candle,
+            "liquidity_sweeps": SMCStrategy._liquidity_sweeps(last_candle, liquidity),
+            "breaker_blocks": SMCStrategy._breaker_blocks(close, order_blocks)
+        }
+
+    def signal(self, current_time: datetime = None) -> Tuple:
+        """generate_smc_signal tuple for the current window"""
+        if self.count - self.start < MIN_CANDLES:
+            return SMCStrategy._insufficient_data_signal()
+        return SMCStrategy.score_components(self.components(), current_time)
+
+    def _update_swings(self, position: int):
+        # The candle SWING_ORDER back now has both neighbours closed
+        if len(self.recent) < 2 * SWING_ORDER + 1:
+            return
+        pivot = position - SWING_ORDER
+        highs = [candle[1] for candle in self.recent]
+        lows = [candle[2] for candle in self.recent]
+        neighbours = slice(None, SWING_ORDER), slice(SWING_ORDER + 1, None)
+
+        if highs[SWING_ORDER] > max(highs[neighbours[0]] + highs[neighbours[1]]):
+            self.swing_highs.append((pivot, highs[SWING_ORDER]))
+        if lows[SWING_ORDER] < min(lows[neighbours[0]] + lows[neighbours[1]]):
+            self.swing_lows.append((pivot, lows[SWING_ORDER]))
+
+    def _update_order_blocks(self, position: int):
+        # Previous candle against this one, as in detect_order_blocks
+        if len(self.recent) < 2:
+            return
+        curr_open, curr_high, curr_low, curr_close = self.recent[-2]
+        next_open, _, _, next_close = self.recent[-1]
+
+        # Last red candle before a strong green one
+        move, body = next_close - next_open, curr_open - curr_close
+        if curr_close < curr_open and next_close > next_open and move > body * 2:
+            self.order_blocks['bearish_ob'].append(
+                (position - 1, curr_high, curr_low, curr_open, curr_close, min(move / body, 10))
+            )
+
+        # Last green candle before a strong red one
+        move, body = next_open - next_close, curr_close - curr_open
+        if curr_close > curr_open and next_close < next_open and move > body * 2:
+            self.order_blocks['bullish_ob'].append(
+                (position - 1, curr_high, curr_low, curr_open, curr_close, min(move / body, 10))
+            )
+
+    def _update_gaps(self, position: int, high: float, low: float):
+        for book in self.gaps.values():
+            book.trade(position, high, low)
+
+        if len(self.recent) < 3:
+            return
+        _, prev_high, prev_low, _ = self.recent[-3]
+        if prev_high < low:
+            self.gaps['bullish_fvg'].add(position - 1, low, prev_high)
+        if prev_low > high:
+            self.gaps['bearish_fvg'].add(position - 1, prev_low, high)
+
+    def _update_equal_levels(self, position: int):
+        if len(self.recent) < LIQUIDITY_RUN:
+            return
+        # Same arithmetic as SMCStrategy._equal_level_runs, on plain floats
+        for runs, field in ((self.equal_highs, 1), (self.equal_lows, 2)):
+            mean, std = SMCStrategy._run_moments([candle[field] for candle in self.recent])
+            if std < mean * (LIQUIDITY_EQUAL_PCT / 100):
+                runs.append((position, mean))
+
+    def _evict(self):
+        start, count = self.start, self.count
+
+        first_swing = max(start, count - STRUCTURE_LOOKBACK) + SWING_ORDER
+        for swings in (self.swing_highs, self.swing_lows):
+            while swings and swings[0][0] < first_swing:
+                swings.popleft()
+
+        # detect_order_blocks starts at the 4th candle of the frame
+        for blocks in self.order_blocks.values():
+            while blocks and blocks[0][0] < start + 3:
+                blocks.popleft()
+
+        # A gap needs the candle before its middle one inside the window
+        for book in self.gaps.values():
+            book.evict(start + 1)
+
+        first_in_range = max(start, count - RANGE_LOOKBACK)
+        self.range_high.evict(first_in_range)
+        self.range_low.evict(first_in_range)
+
+        # Whole runs must fit inside the liquidity lookback
+        first_run_end = max(start, count - LIQUIDITY_LOOKBACK) + LIQUIDITY_RUN - 1
+        for runs in (self.equal_highs, self.equal_lows):
+            while runs and runs[0][0] < first_run_end:
+                runs.popleft()
+
+    @staticmethod
+    def _pools(runs: deque, start: int) -> ZoneSet:
+        if not runs:
+            return ZoneSet.empty(LIQUIDITY_POOL)
+        ends, levels = zip(*runs)
+        return SMCStrategy._cluster_pools(
+            np.array(levels), np.array(ends) - start
+        )[:MAX_POOLS]
+
+
+class StreamingSMCEngine:
+    """
+    Incremental SMC state per (symbol, timeframe)
+
+    `sync` ingests only the closed candles newer than the last one seen, so a
+    candle close costs a handful of deque/heap operations instead of
+    re-running every detector over the window. The returned tuple matches
+    SMCStrategy.generate_smc_signal on the same `closed_df`.
+    """
+
+    def __init__(self):
+        self._states: Dict[Tuple[str, str], SMCState] = {}
+
+    def sync(
+        self,
+        symbol: str,
+        timeframe: str,
+        closed_df: pd.DataFrame,
+        current_time: datetime = None
+    ) -> Tuple:
+        """Ingest new closed candles and score the window ending at the last one"""
+        if closed_df.empty:
+            return SMCStrategy._insufficient_data_signal()
+
+        key = (symbol, timeframe)
+        state = self._states.get(key)
+        first_ts, last_ts = closed_df.index[0], closed_df.index[-1]
+        if state is None or state.window != len(closed_df) or state.last_timestamp is None or \
+                state.last_timestamp < first_ts or state.last_timestamp > last_ts:
+            # Unknown stream, history gap or different window - seed from the whole frame
+            state = SMCState(window=len(closed_df))
+            self._states[key] = state
+            new_candles = closed_df
+        else:
+            new_candles = closed_df[closed_df.index > state.last_timestamp]
+
+        columns = [new_candles[c].to_numpy() for c in ('open', 'high', 'low', 'close')]
+        for timestamp, *candle in zip(new_candles.index, *columns):
+            state.update(tuple(float(v) for v in candle), timestamp)
+
+        return state.signal(current_time)
+
+    def reset(self, symbol: str = None, timeframe: str = None):
+        """Drop state for one stream, or all of them"""
+        if symbol is None:
+            self._states.clear()
+            return
+        self._states.pop((symbol, timeframe), None)
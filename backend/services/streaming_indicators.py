@@ -0,0 +1,393 @@
+"""
+Streaming Indicators
+Incremental versions of the TechnicalIndicators set with O(1) updates per candle
+"""
+from collections import deque
+from itertools import islice
+from typing import Dict, Optional, Tuple
+import math
+import pandas as pd
+
+Candle = Tuple[float, float, float, float, float]  # open, high, low, close, volume
+
+# Rebuild running sums from the window this often to stop float drift
+RESYNC_EVERY = 1000
+
+
+class StreamingEMA:
+    """Exponential moving average (pandas ewm, adjust=False)"""
+
+    def __init__(self, span: int = None, alpha: float = None, min_periods: int = None):
+        self.alpha = alpha if alpha is not None else 2 / (span + 1)
+        self.min_periods = min_periods if min_periods is not None else (span or 1)
+        self.value = None
+        self.count = 0
+
+    def update(self, x: float, commit: bool = True) -> Optional[float]:
+        value = x if self.value is None else self.value + self.alpha * (x - self.value)
+        count = self.count + 1
+        if commit:
+            self.value, self.count = value, count
+        return value if count >= self.min_periods else None
+
+
+class StreamingRollingStats:
+    """Rolling mean and population standard deviation over a fixed window"""
+
+    def __init__(self, window: int):
+        self.window = window
+        self.values = deque()
+        self.shift = None  # Values are stored relative to this to limit cancellation
+        self.total = 0.0
+        self.total_sq = 0.0
+        self.updates = 0
+
+    def update(self, x: float, commit: bool = True) -> Optional[Tuple[float, float]]:
+        shift = x if self.shift is None else self.shift
+        d = x - shift
+        total = self.total + d
+        total_sq = self.total_sq + d * d
+        n = len(self.values) + 1
+        if n > self.window:
+            old = self.values[0]
+            total -= old
+            total_sq -= old * old
+            n -= 1
+
+        if commit:
+            self.shift = shift
+            self.values.append(d)
+            if len(self.values) > self.window:
+                self.values.popleft()
+            self.total, self.total_sq = total, total_sq
+            self.updates += 1
+            if self.updates % RESYNC_EVERY == 0:
+                self.total = sum(self.values)
+                self.total_sq = sum(v * v for v in self.values)
+
+        if n < self.window:
+            return None
+        mean = total / n
+        variance = max(total_sq / n - mean * mean, 0.0)
+        return shift + mean, math.sqrt(variance)
+
+
+class StreamingRollingExtreme:
+    """Rolling max (or min) over a fixed window using a monotonic deque"""
+
+    def __init__(self, window: int, use_max: bool = True):
+        self.window = window
+        self.sign = 1 if use_max else -1
+        self.items = deque()  # (index, signed value), signed values decreasing
+        self.count = 0
+
+    def update(self, x: float, commit: bool = True) -> Optional[float]:
+        signed = self.sign * x
+        first_kept = self.count - self.window + 1  # Oldest index still in the window
+
+        if commit:
+            while self.items and self.items[-1][1] <= signed:
+                self.items.pop()
+            self.items.append((self.count, signed))
+            while self.items[0][0] < first_kept:
+                self.items.popleft()
+            self.count += 1
+            best = self.items[0][1]
+        else:
+            # At most one stored item drops out of the window per step
+            best = signed
+            for index, value in islice(self.items, 2):
+                if index >= first_kept:
+                    best = max(best, value)
+                    break
+
+        if self.count + (0 if commit else 1) < self.window:
+            return None
+        return self.sign * best
+
+
+class StreamingRSI:
+    """RSI with Wilder smoothing, matching ta.momentum.RSIIndicator"""
+
+    def __init__(self, window: int = 14):
+        self.prev_close = None
+        self.up = StreamingEMA(alpha=1 / window, min_periods=window)
+        self.down = StreamingEMA(alpha=1 / window, min_periods=window)
+
+    def update(self, close: float, commit: bool = True) -> Optional[float]:
+        # ta treats the undefined first change as zero movement
+        diff = 0.0 if self.prev_close is None else close - self.prev_close
+        up = self.up.update(max(diff, 0.0), commit)
+        down = self.down.update(max(-diff, 0.0), commit)
+        if commit:
+            self.prev_close = close
+
+        if up is None or down is None:
+            return None
+        if down == 0:
+            return 100.0
+        return 100 - (100 / (1 + up / down))
+
+
+class StreamingMACD:
+    """MACD line, signal and histogram (12/26/9)"""
+
+    def __init__(self, fast: int = 12, slow: int = 26, signal: int = 9):
+        self.fast = StreamingEMA(span=fast)
+        self.slow = StreamingEMA(span=slow)
+        self.signal = StreamingEMA(span=signal)
+
+    def update(self, close: float, commit: bool = True) -> Optional[Tuple[float, Optional[float], Optional[float]]]:
+        fast = self.fast.update(close, commit)
+        slow = self.slow.update(close, commit)
+        if fast is None or slow is None:
+            return None
+
+        macd = fast - slow
+        signal = self.signal.update(macd, commit)
+        if signal is None:
+            return macd, None, None
+        return macd, signal, macd - signal
+
+
+class StreamingATR:
+    """Average True Range, matching ta.volatility.AverageTrueRange"""
+
+    def __init__(self, window: int = 14):
+        self.window = window
+        self.prev_close = None
+        self.count = 0
+        self.tr_sum = 0.0
+        self.value = None
+
+    def update(self, high: float, low: float, close: float, commit: bool = True) -> Optional[float]:
+        tr = high - low
+        if self.prev_close is not None:
+            tr = max(tr, abs(high - self.prev_close), abs(low - self.prev_close))
+
+        count = self.count + 1
+        tr_sum = self.tr_sum
+        if count <= self.window:
+            tr_sum += tr
+            value = tr_sum / self.window if count == self.window else None
+        else:
+            value = (self.value * (self.window - 1) + tr) / self.window
+
+        if commit:
+            self.prev_close, self.count, self.tr_sum, self.value = close, count, tr_sum, value
+        return value
+
+
+class StreamingADX:
+    """ADX / +DI / -DI, matching ta.trend.ADXIndicator"""
+
+    def __init__(self, window: int = 14):
+        self.window = window
+        self.prev = None  # (high, low, close)
+        self.count = 0  # Candles seen
+        self.trs = self.dip = self.din = 0.0
+        self.dx_warmup = []
+        self.value = None
+
+    def update(self, high: float, low: float, close: float, commit: bool = True) -> Optional[Tuple]:
+        w = self.window
+        count = self.count + 1
+        t = count - 1  # Index of this candle
+        trs, dip, din = self.trs, self.dip, self.din
+        dx_warmup = self.dx_warmup
+        value = self.value
+        result = None
+
+        if self.prev is not None:
+            prev_high, prev_low, prev_close = self.prev
+            tr = max(high, prev_close) - min(low, prev_close)
+            up = high - prev_high
+            down = prev_low - low
+            pos = up if (up > down and up > 0) else 0.0
+            neg = down if (down > up and down > 0) else 0.0
+
+            if t <= w:
+                trs, dip, din = trs + tr, dip + pos, din + neg
+            else:
+                trs = trs - trs / w + tr
+                dip = dip - dip / w + pos
+                din = din - din / w + neg
+
+            if t >= w:
+                di_pos = 100 * dip / trs if trs != 0 else 0.0
+                di_neg = 100 * din / trs if trs != 0 else 0.0
+                di_sum = di_pos + di_neg
+                dx = 100 * abs((di_pos - di_neg) / di_sum) if di_sum != 0 else 0.0
+
+                if t < 2 * w - 1:
+                    dx_warmup = dx_warmup + [dx]
+                elif t == 2 * w - 1:
+                    value = (sum(dx_warmup) + dx) / w
+                    dx_warmup = []
+                else:
+                    value = (value * (w - 1) + dx) / w
+
+                result = (value, di_pos, di_neg)
+
+        if commit:
+            self.prev = (high, low, close)
+            self.count = count
+            self.trs, self.dip, self.din = trs, dip, din
+            self.dx_warmup, self.value = dx_warmup, value
+        return result
+
+
+class StreamingStochastic:
+    """Stochastic %K / %D (14, 3)"""
+
+    def __init__(self, window: int = 14, smooth_window: int = 3):
+        self.highest = StreamingRollingExtreme(window, use_max=True)
+        self.lowest = StreamingRollingExtreme(window, use_max=False)
+        self.smooth = StreamingRollingStats(smooth_window)
+
+    def update(self, high: float, low: float, close: float, commit: bool = True) -> Optional[Tuple]:
+        highest = self.highest.update(high, commit)
+        lowest = self.lowest.update(low, commit)
+        if highest is None or lowest is None:
+            return None
+
+        span = highest - lowest
+        stoch_k = 100 * (close - lowest) / span if span != 0 else float('nan')
+        smoothed = self.smooth.update(stoch_k, commit)
+        return stoch_k, smoothed[0] if smoothed else None
+
+
+class IndicatorState:
+    """Running state for the full TechnicalIndicators set on one candle stream"""
+
+    def __init__(self):
+        self.emas = {period: StreamingEMA(span=period) for period in (9, 21, 50, 200)}
+        self.rsi = StreamingRSI(14)
+        self.macd = StreamingMACD(12, 26, 9)
+        self.bollinger = StreamingRollingStats(20)
+        self.stochastic = StreamingStochastic(14, 3)
+        self.adx = StreamingADX(14)
+        self.atr = StreamingATR(14)
+        self.volume = StreamingRollingStats(20)
+        self.count = 0
+        self.last_timestamp = None
+
+    def update(self, candle: Candle, timestamp=None) -> Dict[str, float]:
+        """Ingest a closed candle and return the indicators as of that candle"""
+        values = self._step(candle, commit=True)
+        self.count += 1
+        self.last_timestamp = timestamp
+        return values
+
+    def peek(self, candle: Candle) -> Dict[str, float]:
+        """What-if: indicators if `candle` closed now, without changing the state"""
+        return self._step(candle, commit=False)
+
+    def _step(self, candle: Candle, commit: bool) -> Dict[str, float]:
+        _, high, low, close, volume = candle
+        count = self.count + 1
+
+        emas = {period: ema.update(close, commit) for period, ema in self.emas.items()}
+        rsi = self.rsi.update(close, commit)
+        macd = self.macd.update(close, commit)
+        bollinger = self.bollinger.update(close, commit)
+        stochastic = self.stochastic.update(high, low, close, commit)
+        adx = self.adx.update(high, low, close, commit)
+        atr = self.atr.update(high, low, close, commit)
+        volume_stats = self.volume.update(volume, commit)
+
+        # Same keys and warm-up rule as TechnicalIndicators.calculate_all
+        if count < 50:
+            return {}
+
+        indicators = {
+            'ema_9': emas[9],
+            'ema_21': emas[21],
+            'ema_50': emas[50],
+        }
+        if count >= 200:
+            indicators['ema_200'] = emas[200]
+
+        indicators['rsi'] = rsi
+        indicators['macd'], indicators['macd_signal'], indicators['macd_diff'] = macd
+
+        middle, std = bollinger
+        indicators['bb_upper'] = middle + 2 * std
+        indicators['bb_middle'] = middle
+        indicators['bb_lower'] = middle - 2 * std
+        indicators['bb_width'] = (4 * std / middle) * 100
+
+        indicators['stoch_k'], indicators['stoch_d'] = stochastic
+        indicators['adx'], indicators['adx_pos'], indicators['adx_neg'] = adx
+        indicators['atr'] = atr
+
+        indicators['current_price'] = close
+        indicators['price_above_ema21'] = 1 if close > indicators['ema_21'] else 0
+        indicators['price_above_ema50'] = 1 if close > indicators['ema_50'] else 0
+
+        indicators['volume'] = volume
+        indicators['avg_volume_20'] = volume_stats[0]
+        indicators['volume_ratio'] = volume / volume_stats[0]
+
+        return indicators
+
+
+class StreamingIndicatorEngine:
+    """
+    Incremental indicator state per (symbol, timeframe)
+
+    `sync` feeds only the closed candles newer than the last one ingested, so
+    each candle close costs O(1) regardless of history length. `peek` evaluates
+    the still-forming candle without committing it.
+
+    Values match TechnicalIndicators.calculate_all over the same candle history
+    (within float tolerance). Against a fixed 200-candle window recomputed from
+    scratch, the recursive indicators (EMAs, RSI, ATR, ADX) differ only by the
+    seed effect of where that window happens to start.
+    """
+
+    def __init__(self):
+        self._states: Dict[Tuple[str, str], IndicatorState] = {}
+        self._latest: Dict[Tuple[str, str], Dict[str, float]] = {}
+
+    def sync(self, symbol: str, timeframe: str, closed_df: pd.DataFrame) -> Dict[str, float]:
+        """Ingest new closed candles and return indicators as of the last one"""
+        key = (symbol, timeframe)
+        state = self._states.get(key)
+
+        if closed_df.empty:
+            return self._latest.get(key, {})
+
+        first_ts, last_ts = closed_df.index[0], closed_df.index[-1]
+        if state is None or state.last_timestamp is None or \
+                state.last_timestamp < first_ts or state.last_timestamp > last_ts:
+            # Unknown stream or history gap - seed from the whole window
+            state = IndicatorState()
+            self._states[key] = state
+            new_candles = closed_df
+        else:
+            new_candles = closed_df[closed_df.index > state.last_timestamp]
+
+        latest = self._latest.get(key, {})
+        columns = [new_candles[c].to_numpy() for c in ('open', 'high', 'low', 'close', 'volume')]
+        for timestamp, *candle in zip(new_candles.index, *columns):
+            latest = state.update(tuple(float(v) for v in candle), timestamp)
+
+        self._latest[key] = latest
+        return latest
+
+    def peek(self, symbol: str, timeframe: str, candle: Candle) -> Dict[str, float]:
+        """Indicators including the still-forming candle (state unchanged)"""
+        state = self._states.get((symbol, timeframe))
+        if state is None:
+            return {}
+        return state.peek(tuple(float(v) for v in candle))
+
+    def reset(self, symbol: str = None, timeframe: str = None):
+        """Drop state for one stream, or all of them"""
+        if symbol is None:
+            self._states.clear()
+            self._latest.clear()
+            return
+        self._states.pop((symbol, timeframe), None)
+        self._latest.pop((symbol, timeframe), None)
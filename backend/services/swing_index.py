@@ -0,0 +1,105 @@
+"""
+Swing Index
+Swing highs/lows of a candle frame, computed once and queried per lookback window
+"""
+import weakref
+from typing import Dict, Tuple
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+def pivot_mask(values: np.ndarray, order: int = 2, high: bool = True) -> np.ndarray:
+    """
+    True where a value is a strict local high (or low) over `order` candles each side
+
+    Works along the last axis. The last `order` candles can't be confirmed yet
+    and are never pivots.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    mask = np.zeros(values.shape, dtype=bool)
+    if values.shape[-1] < 2 * order + 1:
+        return mask
+
+    signed = values if high else -values
+    windows = sliding_window_view(signed, 2 * order + 1, axis=-1)
+    center = windows[..., order]
+    neighbours = np.concatenate([windows[..., :order], windows[..., order + 1:]], axis=-1)
+    mask[..., order:-order] = center > neighbours.max(axis=-1)
+    return mask
+
+
+class SwingIndex:
+    """
+    Swing points of one candle frame
+
+    A swing high is a candle whose high is strictly above the `order` candles on
+    each side (swing lows mirror it). Positions are found once with vectorized
+    comparisons; a lookback window is then a binary search over them.
+
+    Window queries only count swings whose neighbours all fall inside the
+    window, the same as scanning `df.tail(window)` on its own.
+    """
+
+    _cache: Dict[Tuple[int, int], Tuple[Tuple, 'SwingIndex']] = {}
+
+    def __init__(self, df: pd.DataFrame, order: int = 2):
+        self.order = order
+        self.length = len(df)
+        self.high = df['high'].to_numpy(dtype=np.float64)
+        self.low = df['low'].to_numpy(dtype=np.float64)
+        self.high_positions = np.flatnonzero(pivot_mask(self.high, order, high=True))
+        self.low_positions = np.flatnonzero(pivot_mask(self.low, order, high=False))
+
+    @staticmethod
+    def for_frame(df: pd.DataFrame, order: int = 2) -> 'SwingIndex':
+        """
+        Shared index for `df`, built on first use
+
+        A cached index is reused only while the frame's length, last timestamp
+        and last high/low are unchanged, so appending or updating the forming
+        candle in place rebuilds it; edits to older candles aren't detected, so
+        build a new frame for those. Entries are dropped when the DataFrame is
+        garbage collected.
+        """
+        key = (id(df), order)
+        fingerprint = SwingIndex._fingerprint(df)
+        cached = SwingIndex._cache.get(key)
+        if cached is not None and cached[0] == fingerprint:
+            return cached[1]
+
+        index = SwingIndex(df, order)
+        if cached is None:
+            weakref.finalize(df, SwingIndex._cache.pop, key, None)
+        SwingIndex._cache[key] = (fingerprint, index)
+        return index
+
+    @staticmethod
+    def _fingerprint(df: pd.DataFrame) -> Tuple:
+        if not len(df):
+            return (0,)
+        return (len(df), df.index[-1], float(df['high'].iloc[-1]), float(df['low'].iloc[-1]))
+
+    def swing_highs(self, window: int = None) -> Tuple[np.ndarray, np.ndarray]:
+        """(positions, highs) of the swing highs in the last `window` candles, oldest first"""
+        positions = self._in_window(self.high_positions, window)
+        return positions, self.high[positions]
+
+    def swing_lows(self, window: int = None) -> Tuple[np.ndarray, np.ndarray]:
+        """(positions, lows) of the swing lows in the last `window` candles, oldest first"""
+        positions = self._in_window(self.low_positions, window)
+        return positions, self.low[positions]
+
+    def range_extremes(self, window: int = None) -> Tuple[int, float, int, float]:
+        """(position, value) of the highest high and lowest low in the last `window` candles"""
+        start = self._window_start(window)
+        high_pos = start + int(np.argmax(self.high[start:]))
+        low_pos = start + int(np.argmin(self.low[start:]))
+        return high_pos, self.high[high_pos], low_pos, self.low[low_pos]
+
+    def _window_start(self, window: int = None) -> int:
+        return 0 if window is None else max(0, self.length - window)
+
+    def _in_window(self, positions: np.ndarray, window: int = None) -> np.ndarray:
+        first = self._window_start(window) + self.order
+        return positions[np.searchsorted(positions, first):]
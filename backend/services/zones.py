@@ -0,0 +1,107 @@
+"""
+Zones
+Columnar containers for SMC zones: order blocks, FVGs, breakers, liquidity pools and key levels
+"""
+from typing import Dict, Iterable, List
+import numpy as np
+
+ORDER_BLOCK = np.dtype([
+    ('index', 'i8'), ('high', 'f8'), ('low', 'f8'), ('open', 'f8'), ('close', 'f8'), ('strength', 'f8')
+])
+FAIR_VALUE_GAP = np.dtype([
+    ('index', 'i8'), ('top', 'f8'), ('bottom', 'f8'), ('size', 'f8'), ('fill_pct', 'f8')
+])
+BREAKER_BLOCK = np.dtype([('high', 'f8'), ('low', 'f8'), ('strength', 'f8'), ('type', 'U24')])
+LIQUIDITY_POOL = np.dtype([('price', 'f8'), ('touches', 'i8'), ('last_index', 'i8')])
+# Key levels and limit-order entries; high/low are NaN and description is
+# empty when a level doesn't have them
+KEY_LEVEL = np.dtype([
+    ('type', 'U24'), ('price', 'f8'), ('high', 'f8'), ('low', 'f8'), ('confluence', 'i8'), ('description', 'U96')
+])
+
+
+def key_level(type_: str, price: float, confluence: int, high: float = np.nan,
+              low: float = np.nan, description: str = '') -> tuple:
+    """One KEY_LEVEL row, for ZoneSet.from_rows"""
+    return type_, price, high, low, confluence, description
+
+
+class ZoneSet:
+    """
+    Zones of one kind, stored as a NumPy structured array
+
+    Columns are whole arrays (`zones['low']`), so filters and comparisons run
+    vectorized; a row (`zones[0]`, or iterating) is indexable by field name
+    too. Slicing, masks and index arrays return another ZoneSet. Pickles as a
+    single buffer, which keeps cached analyses cheap to ship between processes.
+
+    `to_list` gives the plain-JSON form (Python scalars, one dict per zone) for
+    the API edge; NaN floats and empty strings count as absent fields and are
+    left out.
+    """
+
+    __slots__ = ('records',)
+
+    def __init__(self, records: np.ndarray):
+        self.records = records
+
+    @classmethod
+    def empty(cls, dtype: np.dtype) -> 'ZoneSet':
+        return cls(np.empty(0, dtype=dtype))
+
+    @classmethod
+    def from_rows(cls, dtype: np.dtype, rows: Iterable[tuple]) -> 'ZoneSet':
+        """Build from tuples in dtype field order"""
+        return cls(np.array(list(rows), dtype=dtype))
+
+    @classmethod
+    def from_dicts(cls, dtype: np.dtype, zones: Iterable[Dict]) -> 'ZoneSet':
+        """Build from dicts; missing floats become NaN, strings '' and ints 0"""
+        defaults = {
+            name: np.nan if dtype[name].kind == 'f' else ('' if dtype[name].kind == 'U' else 0)
+            for name in dtype.names
+        }
+        return cls.from_rows(dtype, (
+            tuple(zone.get(name, default) for name, default in defaults.items())
+            for zone in zones
+        ))
+
+    @classmethod
+    def concat(cls, zone_sets: List['ZoneSet']) -> 'ZoneSet':
+        return cls(np.concatenate([zones.records for zones in zone_sets]))
+
+    @property
+    def dtype(self) -> np.dtype:
+        return self.records.dtype
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __iter__(self):
+        return iter(self.records)
+
+    def __getitem__(self, item):
+        if isinstance(item, str):
+            return self.records[item]
+        if isinstance(item, (int, np.integer)):
+            return self.records[item]
+        return ZoneSet(self.records[item])
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, ZoneSet):
+            return NotImplemented
+        return self.to_list() == other.to_list()
+
+    def __repr__(self) -> str:
+        return f"ZoneSet({self.to_list()!r})"
+
+    def to_list(self) -> List[Dict]:
+        """Plain dicts with Python scalars, absent (NaN / '') fields left out"""
+        names = self.dtype.names
+        return [
+            {
+                name: value for name, value in zip(names, row)
+                if not (value == '' or (isinstance(value, float) and value != value))
+            }
+            for row in self.records.tolist()
+        ]
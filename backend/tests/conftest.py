@@ -0,0 +1,41 @@
+"""
+Shared fixtures: deterministic candle frames for equivalence tests
+"""
+import os
+import sys
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def make_candles(n: int = 600, seed: int = 0, start: float = 100.0, tick: float = 0.01,
+                 freq: str = '15min') -> pd.DataFrame:
+    """
+    Random-walk OHLCV candles with prices on a `tick` grid
+
+    Tick-aligned prices hit exact rounding halfway cases, the way real
+    exchange prices do.
+    """
+    rng = np.random.default_rng(seed)
+    close = start + np.cumsum(rng.normal(0, start * 0.004, n))
+    open_ = np.concatenate([[start], close[:-1]]) + rng.normal(0, start * 0.001, n)
+    high = np.maximum(open_, close) + np.abs(rng.normal(0, start * 0.002, n))
+    low = np.minimum(open_, close) - np.abs(rng.normal(0, start * 0.002, n))
+
+    def snap(values):
+        return np.round(values / tick) * tick
+
+    return pd.DataFrame({
+        'open': snap(open_),
+        'high': snap(high),
+        'low': snap(low),
+        'close': snap(close),
+        'volume': rng.uniform(10, 1000, n).round(3),
+    }, index=pd.date_range('2026-01-05', periods=n, freq=freq, name='timestamp'))
+
+
+@pytest.fixture
+def candles() -> pd.DataFrame:
+    return make_candles()
@@ -0,0 +1,21 @@
+import asyncio
+
+from services.analysis_executor import AnalysisExecutor
+from services.indicators import TechnicalIndicators
+
+
+def indicator_backend():
+    return TechnicalIndicators.backend
+
+
+def test_process_workers_use_the_backend_set_at_pool_start():
+    executor = AnalysisExecutor('process', max_workers=1)
+    try:
+        TechnicalIndicators.set_backend('numpy')
+        executor.start()
+        # Workers start on the first job; what they inherit must not matter
+        TechnicalIndicators.set_backend('ta')
+        assert asyncio.run(executor.run(indicator_backend)) == 'numpy'
+    finally:
+        executor.shutdown()
+        TechnicalIndicators.set_backend('ta')
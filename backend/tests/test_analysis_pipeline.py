@@ -0,0 +1,64 @@
+import pytest
+
+from conftest import make_candles
+from services.analysis_pipeline import AnalysisContext, Pipeline, Stage
+
+
+def recording_pipeline(calls):
+    def stage(name, inputs, fn, *args):
+        def run(*values):
+            calls.append(name)
+            return fn(*values)
+        return Stage(name, inputs, run, *args)
+
+    return Pipeline([
+        stage('total', ('doubled', 'last'), lambda doubled, last: doubled + last),
+        stage('doubled', ('last',), lambda last: 2 * last),
+        stage('last', ('close',), lambda close: float(close[-1])),
+        stage('long_only', ('close',), lambda close: 'ran', 50, lambda: 'fallback'),
+    ])
+
+
+def test_stages_run_once_in_dependency_order():
+    calls = []
+    df = make_candles(20)
+    context = AnalysisContext(df)
+    result = recording_pipeline(calls).run(context, 'total', 'doubled')
+    last = float(df['close'].iloc[-1])
+    assert result == {'total': 3 * last, 'doubled': 2 * last}
+    assert calls == ['last', 'doubled', 'total']
+    assert set(context.timings) == {'last', 'doubled', 'total'}
+    assert all(ms >= 0 for ms in context.timings.values())
+    assert context['price'] == last
+
+
+def test_seeded_artifacts_skip_their_stages():
+    calls = []
+    context = AnalysisContext(make_candles(20), last=5.0)
+    assert recording_pipeline(calls).run(context, 'total') == {'total': 15.0}
+    assert calls == ['doubled', 'total']
+
+
+def test_short_windows_get_the_fallback():
+    calls = []
+    pipeline = recording_pipeline(calls)
+    assert pipeline.run(AnalysisContext(make_candles(49)), 'long_only') == {'long_only': 'fallback'}
+    assert pipeline.run(AnalysisContext(make_candles(50)), 'long_only') == {'long_only': 'ran'}
+    assert calls == ['long_only']
+
+
+def test_rejects_cycles_and_duplicates():
+    with pytest.raises(ValueError, match='depends on itself'):
+        Pipeline([Stage('a', ('b',), len), Stage('b', ('c',), len), Stage('c', ('a',), len)])
+    with pytest.raises(ValueError, match='Duplicate'):
+        Pipeline([Stage('a', ('close',), len), Stage('a', ('open',), len)])
+    with pytest.raises(ValueError, match='depends on itself'):
+        Pipeline([Stage('a', ('close',), len)]).extend([Stage('b', ('b',), len)])
+
+
+def test_missing_input_is_reported():
+    pipeline = Pipeline([Stage('a', ('nowhere',), len)])
+    with pytest.raises(KeyError, match='nowhere'):
+        pipeline.run(AnalysisContext(make_candles(5)), 'a')
+    with pytest.raises(KeyError, match='unknown'):
+        pipeline.run(AnalysisContext(make_candles(5)), 'unknown')
@@ -0,0 +1,109 @@
+import asyncio
+import json
+
+from services import broadcast_hub
+from services.broadcast_hub import BroadcastHub, SLOW_CLIENT_CLOSE_CODE
+
+
+class FakeSocket:
+    """Records sent payloads; sends block until `open` is set, or raise if `broken`"""
+
+    def __init__(self, blocked=False, broken=False):
+        self.sent = []
+        self.closed_with = None
+        self.broken = broken
+        self.open = asyncio.Event()
+        if not blocked:
+            self.open.set()
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, payload):
+        await self.open.wait()
+        if self.broken:
+            raise RuntimeError("connection reset")
+        self.sent.append(json.loads(payload))
+
+    async def close(self, code=1000):
+        self.closed_with = code
+
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def test_drop_oldest_keeps_newest_messages():
+    async def scenario():
+        hub = BroadcastHub(max_queue=2, overflow_policy="drop_oldest")
+        socket = FakeSocket(blocked=True)
+        connection = await hub.connect(socket, topic="t")
+        hub.broadcast({"n": 0}, topic="t")
+        await settle()  # The writer takes message 0 and blocks sending it
+        for i in range(1, 5):
+            hub.broadcast({"n": i}, topic="t")
+        socket.open.set()
+        await settle()
+        assert [message["n"] for message in socket.sent] == [0, 3, 4]
+        assert connection.dropped_messages == 2
+        hub.disconnect(connection)
+
+    asyncio.run(scenario())
+
+
+def test_disconnect_policy_closes_slow_client():
+    async def scenario():
+        hub = BroadcastHub(max_queue=2, overflow_policy="disconnect")
+        slow, fast = FakeSocket(blocked=True), FakeSocket()
+        slow_connection = await hub.connect(slow, topic="t")
+        fast_connection = await hub.connect(fast, topic="t")
+        queued = []
+        for i in range(4):
+            queued.append(hub.broadcast({"n": i}, topic="t"))
+            await settle()  # The fast client keeps up, the slow one holds message 0
+        assert queued == [2, 2, 2, 1]
+        assert slow.closed_with == SLOW_CLIENT_CLOSE_CODE
+        assert slow_connection.closed and slow not in hub.connections
+        assert [message["n"] for message in fast.sent] == [0, 1, 2, 3]
+        hub.disconnect(fast_connection)
+
+    asyncio.run(scenario())
+
+
+def test_socket_failing_on_send_is_pruned():
+    async def scenario():
+        hub = BroadcastHub()
+        broken, healthy = FakeSocket(broken=True), FakeSocket()
+        await hub.connect(broken, topic="t")
+        healthy_connection = await hub.connect(healthy, topic="t")
+        hub.broadcast({"n": 0}, topic="t")
+        await settle()
+        assert broken not in hub.connections
+        assert hub.topics["t"] == {healthy_connection}
+        assert hub.broadcast({"n": 1}, topic="t") == 1
+        hub.disconnect(healthy_connection)
+
+    asyncio.run(scenario())
+
+
+def test_broadcast_serializes_once(monkeypatch):
+    dumps = []
+    real_dumps = json.dumps
+
+    def counting_dumps(*args, **kwargs):
+        dumps.append(args[0])
+        return real_dumps(*args, **kwargs)
+
+    async def scenario():
+        hub = BroadcastHub()
+        connections = [await hub.connect(FakeSocket(), topic="t") for _ in range(10)]
+        monkeypatch.setattr(broadcast_hub.json, "dumps", counting_dumps)
+        assert hub.broadcast({"n": 0}, topic="t") == 10
+        assert hub.broadcast({"n": 1}) == 10
+        monkeypatch.undo()
+        assert dumps == [{"n": 0}, {"n": 1}]
+        for connection in connections:
+            hub.disconnect(connection)
+
+    asyncio.run(scenario())
@@ -0,0 +1,54 @@
+import pandas as pd
+import pytest
+
+from conftest import make_candles
+from services.candle_resampler import CandleResampler
+
+AGGREGATION = {'open': 'first', 'high': 'max', 'low': 'min', 'close': 'last', 'volume': 'sum'}
+
+
+def exchange_candles(minutes: pd.DataFrame, timeframe: str) -> pd.DataFrame:
+    """What the exchange serves: epoch-aligned candles built from the 1m tape, last one forming"""
+    freq = pd.Timedelta(milliseconds=CandleResampler.timeframe_ms(timeframe))
+    candles = minutes.resample(freq, origin='epoch', label='left', closed='left').agg(AGGREGATION)
+    return candles.dropna()
+
+
+def normalized(df: pd.DataFrame) -> pd.DataFrame:
+    df = df.copy()
+    df.index = df.index.as_unit('ms')
+    df.index.freq = None
+    return df
+
+
+@pytest.mark.parametrize('source, target', [
+    ('5m', '15m'), ('15m', '1h'), ('15m', '4h'), ('1h', '4h'), ('1h', '1d'), ('30m', '1d'),
+])
+@pytest.mark.parametrize('skip, cut', [(0, 0), (7, 0), (3, 11), (40, 1)])
+def test_matches_exchange_candles(source, target, skip, cut):
+    # Five days of 1m candles; `skip` source candles missing at the start and
+    # the tape cut `cut` minutes early, leaving a forming candle at both sizes
+    minutes = make_candles(5 * 1440, seed=7, freq='1min')
+    if cut:
+        minutes = minutes.iloc[:-cut]
+    source_candles = exchange_candles(minutes, source).iloc[skip:]
+    expected = exchange_candles(minutes, target)
+
+    resampled = CandleResampler.resample(source_candles, source, target)
+    # Only buckets whose whole history is in the source are produced
+    expected = expected[expected.index >= resampled.index[0]]
+    assert resampled.index[0] >= source_candles.index[0]
+    pd.testing.assert_frame_equal(normalized(resampled), normalized(expected), check_names=False)
+    assert len(resampled) >= CandleResampler.expected_candles(len(source_candles), source, target)
+
+
+def test_rejects_uneven_timeframes():
+    assert not CandleResampler.can_resample('1h', '15m')
+    assert not CandleResampler.can_resample('3m', '5m')
+    with pytest.raises(ValueError):
+        CandleResampler.resample(make_candles(10), '1h', '15m')
+
+
+def test_history_shorter_than_one_bucket_is_empty():
+    source = make_candles(3, freq='1h').shift(1, freq='1h')
+    assert CandleResampler.resample(source, '1h', '4h').empty
@@ -0,0 +1,39 @@
+import pytest
+
+from conftest import make_candles
+from services.advanced_strategies import AdvancedStrategies
+from services.divergence import MIN_DIVERGENCE_CANDLES, find_divergences, recent_divergence_flags
+from services.indicators import LazyIndicators
+
+
+def expected_flags(df, lookback=10):
+    series = LazyIndicators(df)
+    flags = {}
+    for name in ('rsi', 'macd'):
+        found = find_divergences(df['low'].to_numpy(), df['high'].to_numpy(), series.series(name))
+        for kind, value in recent_divergence_flags(found, len(df), lookback).items():
+            regular, direction = kind.split('_')
+            flags[f'{name}_{direction}' if regular == 'regular' else f'{name}_hidden_{direction}'] = value
+    return flags
+
+
+@pytest.mark.parametrize('length', [30, 40, 49])
+def test_short_frames_are_analysed(length):
+    found = False
+    for seed in range(20):
+        df = make_candles(length, seed=seed)
+        divergences = AdvancedStrategies.detect_divergence(df, LazyIndicators(df))
+        assert divergences == expected_flags(df)
+        found = found or any(divergences.values())
+    assert found
+
+
+def test_minimum_frame_is_analysed():
+    for seed in range(20):
+        df = make_candles(MIN_DIVERGENCE_CANDLES, seed=seed)
+        assert AdvancedStrategies.detect_divergence(df, LazyIndicators(df)) == expected_flags(df)
+
+
+def test_frames_below_minimum_report_nothing():
+    df = make_candles(MIN_DIVERGENCE_CANDLES - 1)
+    assert not any(AdvancedStrategies.detect_divergence(df, LazyIndicators(df)).values())
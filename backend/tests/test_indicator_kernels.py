@@ -0,0 +1,44 @@
+import math
+
+import numpy as np
+import pytest
+
+from conftest import make_candles
+from services import indicator_kernels
+from services.indicators import TechnicalIndicators
+
+
+def assert_close(expected, actual, rel=1e-9):
+    assert set(expected) == set(actual), set(expected) ^ set(actual)
+    for key, value in expected.items():
+        if math.isnan(value):
+            assert math.isnan(actual[key]), key
+        else:
+            assert abs(actual[key] - value) <= rel * max(1.0, abs(value)), (key, value, actual[key])
+
+
+@pytest.mark.parametrize('length', [50, 51, 120, 200, 201, 600])
+@pytest.mark.parametrize('seed', [0, 1])
+def test_numpy_backend_matches_ta(length, seed):
+    df = make_candles(length, seed=seed)
+    assert_close(
+        TechnicalIndicators.calculate_all(df, backend='ta'),
+        TechnicalIndicators.calculate_all(df, backend='numpy')
+    )
+
+
+def test_flat_prices_match_ta():
+    # Zero ranges and zero price changes hit every division guard
+    df = make_candles(120)
+    df[['open', 'high', 'low', 'close']] = 100.0
+    assert_close(
+        TechnicalIndicators.calculate_all(df, backend='ta'),
+        TechnicalIndicators.calculate_all(df, backend='numpy')
+    )
+
+
+def test_ema_matches_pandas():
+    values = make_candles(300)['close']
+    for span in (5, 12, 50):
+        expected = values.ewm(span=span, adjust=False, min_periods=span).mean().to_numpy()
+        np.testing.assert_allclose(indicator_kernels.ema(values.to_numpy(), span=span, min_periods=span), expected, rtol=1e-12)
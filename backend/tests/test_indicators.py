@@ -0,0 +1,108 @@
+import pandas as pd
+import pytest
+
+from conftest import make_candles
+from services.advanced_strategies import AdvancedStrategies
+from services.indicators import GROUP_OF, LazyIndicators, TechnicalIndicators
+from services.signal_service import SignalService
+
+
+def test_batch_matches_per_symbol_calculate_all():
+    frames = {
+        'AAA/USDT': make_candles(600, seed=0),
+        'BBB/USDT': make_candles(300, seed=1, start=2.5, tick=0.0001),
+        'CCC/USDT': make_candles(250, seed=2, start=40000.0, tick=0.1),
+        'SHORT/USDT': make_candles(49, seed=3),
+    }
+    table = TechnicalIndicators.calculate_batch(frames)
+    assert list(table.index) == ['AAA/USDT', 'BBB/USDT', 'CCC/USDT']
+
+    for symbol in table.index:
+        # Aligned on the shortest usable frame's last 250 candles
+        expected = TechnicalIndicators.calculate_all(frames[symbol].tail(250), backend='numpy')
+        assert list(table.columns) == list(expected)
+        pd.testing.assert_series_equal(
+            table.loc[symbol].astype(float), pd.Series(expected, name=symbol, dtype=float),
+            rtol=1e-9, check_names=False
+        )
+
+
+def test_batch_limit_and_short_history():
+    frames = {'AAA/USDT': make_candles(600, seed=0), 'BBB/USDT': make_candles(300, seed=1)}
+    table = TechnicalIndicators.calculate_batch(frames, limit=120)
+    assert 'ema_200' not in table.columns
+    expected = TechnicalIndicators.calculate_all(frames['BBB/USDT'].tail(120), backend='numpy')
+    assert table.loc['BBB/USDT', 'rsi'] == pytest.approx(expected['rsi'], rel=1e-9)
+
+    assert TechnicalIndicators.calculate_batch({'SHORT/USDT': make_candles(49)}).empty
+
+
+def test_lazy_computes_only_requested_groups():
+    df = make_candles(300)
+    lazy = TechnicalIndicators.lazy(df, 'rsi')
+    assert lazy._done == {GROUP_OF['rsi']}
+
+    assert lazy['macd_diff'] == pytest.approx(TechnicalIndicators.calculate_all(df)['macd_diff'])
+    assert lazy._done == {GROUP_OF['rsi'], GROUP_OF['macd']}
+    assert set(lazy._values) == {'rsi', 'macd', 'macd_signal', 'macd_diff'}
+
+    lazy.require(TechnicalIndicators.detect_trend)
+    assert lazy._done == {GROUP_OF[key] for key in ('rsi', 'macd', 'ema_9', 'ema_21', 'ema_50', 'adx')}
+
+    # Keys stay listed without being computed, and match calculate_all once materialized
+    assert len(lazy) == len(GROUP_OF)
+    assert lazy.to_dict() == TechnicalIndicators.calculate_all(df)
+
+
+def test_lazy_short_history_has_no_keys():
+    lazy = TechnicalIndicators.lazy(make_candles(49), 'rsi')
+    assert len(lazy) == 0 and not lazy._done
+    assert lazy.get('rsi') is None
+
+
+class RecordingIndicators(LazyIndicators):
+    """LazyIndicators that remembers every key its caller reads"""
+
+    def __init__(self, df):
+        super().__init__(df)
+        self.read = set()
+        self._computing = False
+
+    def __getitem__(self, key):
+        if not self._computing:
+            self.read.add(key)
+        return super().__getitem__(key)
+
+    def _compute(self, group):
+        # Groups may read other indicators (price_above_ema21); those aren't the caller's
+        computing, self._computing = self._computing, True
+        try:
+            super()._compute(group)
+        finally:
+            self._computing = computing
+
+
+def consumers():
+    service = SignalService(price_service=None)
+    yield TechnicalIndicators.detect_trend, lambda df, ind: TechnicalIndicators.detect_trend(df, ind)
+    yield TechnicalIndicators.detect_volatility, lambda df, ind: TechnicalIndicators.detect_volatility(ind)
+    for name in (
+        'detect_support_resistance', 'calculate_trend_strength',
+        'calculate_volatility_percentile', 'market_regime_detection'
+    ):
+        fn = getattr(AdvancedStrategies, name)
+        yield fn, fn
+    for trend in ('BULLISH', 'BEARISH', 'NEUTRAL'):
+        yield service._analyze_confluences, lambda df, ind, trend=trend: service._analyze_confluences(
+            ind, trend, market_regime='TRENDING_UP'
+        )
+
+
+@pytest.mark.parametrize('seed', range(6))
+def test_required_indicators_cover_keys_read(seed):
+    df = make_candles(300, seed=seed)
+    for fn, call in consumers():
+        indicators = RecordingIndicators(df)
+        call(df, indicators)
+        assert indicators.read, fn.__name__
+        assert indicators.read <= set(fn.required_indicators), (fn.__name__, indicators.read - set(fn.required_indicators))
@@ -0,0 +1,62 @@
+import random
+
+import pytest
+
+from services.key_levels import KeyLevelIndex
+
+
+def random_levels(rng, count):
+    levels = []
+    for i in range(count):
+        # Few distinct prices so bands share edges and overlap
+        price = rng.choice([99, 100, 100.5, 101, 102]) + rng.choice([0, 0.25, 0.5])
+        level = {'price': price, 'confluence': rng.randint(0, 5), 'description': str(i)}
+        if rng.random() < 0.5:
+            level['high'] = price + rng.choice([0, 0.5, 1])
+            level['low'] = price - rng.choice([0, 0.5])
+        levels.append(level)
+    return levels
+
+
+def brute_force(levels, price, tolerance_pct):
+    """(containing, nearest above, nearest below) as level positions, by scanning every band"""
+    bands = []
+    for level in levels:
+        tolerance = level['price'] * tolerance_pct / 100
+        bands.append((level.get('low', level['price']) - tolerance, level.get('high', level['price']) + tolerance))
+
+    rank = lambda i: (-levels[i]['confluence'], i)
+    containing = sorted((i for i, (low, high) in enumerate(bands) if low <= price <= high), key=rank)
+    above = [i for i, (low, _) in enumerate(bands) if low > price]
+    below = [i for i, (_, high) in enumerate(bands) if high < price]
+    nearest_above = min(above, key=lambda i: (bands[i][0], rank(i))) if above else None
+    nearest_below = min(below, key=lambda i: (-bands[i][1], rank(i))) if below else None
+    return containing, nearest_above, nearest_below, bands
+
+
+def position(level):
+    return None if level is None else int(level['description'])
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_lookups_match_brute_force(seed):
+    rng = random.Random(seed)
+    for _ in range(200):
+        levels = random_levels(rng, rng.randint(0, 12))
+        index = KeyLevelIndex(levels, 0.3)
+        _, _, _, bands = brute_force(levels, 0, 0.3)
+        probes = [edge for band in bands for edge in band] + [rng.uniform(97, 105) for _ in range(10)]
+
+        for price in probes:
+            containing, above, below, _ = brute_force(levels, price, 0.3)
+            assert [position(level) for level in index.containing(price)] == containing
+            assert position(index.best(price)) == (containing[0] if containing else None)
+            assert position(index.nearest_above(price)) == above
+            assert position(index.nearest_below(price)) == below
+
+
+def test_empty_index():
+    index = KeyLevelIndex([])
+    assert index.containing(100) == []
+    assert index.best(100) is None
+    assert index.nearest_above(100) is None and index.nearest_below(100) is None
@@ -0,0 +1,70 @@
+import random
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+import pytz
+
+from services.killzones import label_killzones
+from services.smc_strategy import SMCStrategy
+
+
+def reference(timestamp):
+    """(in_killzone, name, multiplier) from the US/Eastern hour, by pytz conversion"""
+    hour = pytz.UTC.localize(timestamp).astimezone(pytz.timezone('US/Eastern')).hour
+    if 2 <= hour < 5:
+        return True, "London Open", 1.3
+    if 8 <= hour < 11:
+        return True, "New York AM", 1.5
+    if 10 <= hour < 12:
+        return True, "London Close", 1.2
+    return False, None, 1.0
+
+
+def labelled(frame):
+    return [
+        (bool(row.in_killzone), None if pd.isna(row.killzone_name) else row.killzone_name, row.probability_multiplier)
+        for row in frame.itertuples()
+    ]
+
+
+@pytest.fixture(scope='module')
+def timestamps():
+    rng = random.Random(0)
+    # Random instants across changing DST rules, plus every 7 minutes around the switches
+    stamps = [datetime(1900, 1, 1) + timedelta(seconds=rng.randrange(0, 160 * 365 * 86400)) for _ in range(3000)]
+    for year in (1950, 2006, 2007, 2026, 2045):
+        for start, end in ((f'{year}-03-01', f'{year}-04-10'), (f'{year}-10-20', f'{year}-11-12')):
+            stamps += pd.date_range(start, end, freq='7min').to_pydatetime().tolist()
+    return stamps
+
+
+def test_labels_match_per_timestamp_conversion(timestamps):
+    expected = [reference(ts) for ts in timestamps]
+    assert labelled(label_killzones(pd.DatetimeIndex(timestamps))) == expected
+
+    singles = [SMCStrategy.is_in_killzone(pytz.UTC.localize(ts)) for ts in timestamps[::50]]
+    assert [(s['in_killzone'], s['killzone_name'], s['probability_multiplier']) for s in singles] == expected[::50]
+
+
+@pytest.mark.parametrize('unit', ['s', 'ms', 'us', 'ns'])
+def test_index_unit_does_not_matter(timestamps, unit):
+    index = pd.DatetimeIndex(timestamps[:500])
+    assert labelled(label_killzones(index.as_unit(unit))) == [reference(ts) for ts in timestamps[:500]]
+
+
+def test_unsorted_and_aware_indexes(timestamps):
+    index = pd.DatetimeIndex(timestamps)
+    expected = labelled(label_killzones(index))
+
+    order = np.random.default_rng(0).permutation(len(index))
+    assert labelled(label_killzones(index[order])) == [expected[i] for i in order]
+
+    aware = index.tz_localize('UTC').tz_convert('Asia/Tokyo')
+    assert labelled(label_killzones(aware)) == expected
+
+
+def test_nat_is_outside_every_killzone():
+    frame = label_killzones(pd.DatetimeIndex([pd.NaT, '2026-01-05 13:30']))
+    assert labelled(frame) == [(False, None, 1.0), (True, "New York AM", 1.5)]
@@ -0,0 +1,48 @@
+from services.level_watch import LevelWatchIndex
+
+# Band of 100 at 0.3%: [99.7, 100.3]
+LEVELS = [{'price': 100.0, 'confluence': 3}]
+
+
+def test_triggers_only_when_price_enters_a_band():
+    index = LevelWatchIndex()
+    index.watch('a', 'BTC', LEVELS, price=110.0)
+    assert index.update({'BTC': 105.0}) == []
+    assert index.update({'BTC': 100.2}) == ['a']
+    # Triggered streams are dropped until they re-register
+    assert 'a' not in index
+    assert index.update({'BTC': 100.1}) == []
+
+
+def test_band_price_started_in_needs_to_be_left_first():
+    index = LevelWatchIndex()
+    index.watch('a', 'BTC', LEVELS, price=100.1)
+    assert index.update({'BTC': 100.2}) == []
+    assert index.update({'BTC': 101.0}) == []
+    assert index.update({'BTC': 99.9}) == ['a']
+
+
+def test_jumping_across_a_band_is_not_an_entry():
+    index = LevelWatchIndex()
+    index.watch('a', 'BTC', LEVELS, price=110.0)
+    assert index.update({'BTC': 90.0}) == []
+    assert index.update({'BTC': 80.0}) == []
+    assert 'a' in index
+
+
+def test_streams_are_checked_against_their_own_symbol():
+    index = LevelWatchIndex()
+    index.watch('btc', 'BTC', LEVELS, price=110.0)
+    index.watch('eth', 'ETH', [{'price': 10.0, 'confluence': 1}, {'price': 100.0, 'confluence': 1}], price=50.0)
+    assert sorted(index.symbols()) == ['BTC', 'ETH']
+    # A missing price leaves a stream's state alone
+    assert index.update({'ETH': 100.0}) == ['eth']
+    assert index.update({'BTC': 100.0, 'ETH': 10.0}) == ['btc']
+    assert len(index) == 0
+
+
+def test_empty_levels_unwatch():
+    index = LevelWatchIndex()
+    index.watch('a', 'BTC', LEVELS, price=110.0)
+    index.watch('a', 'BTC', [])
+    assert 'a' not in index and index.update({'BTC': 100.0}) == []
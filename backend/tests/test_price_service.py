@@ -0,0 +1,196 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import ccxt
+import pandas as pd
+import pytest
+
+from services import price_service as price_service_module
+from services.price_service import PriceService
+
+NOW_MS = 1_760_000_000_000
+
+
+class FakeExchange:
+    """Deterministic candles up to a settable clock; records every fetch_ohlcv call"""
+
+    def __init__(self, now_ms: int = NOW_MS, listed_ms: int = 0):
+        self.now = now_ms
+        self.listed_ms = listed_ms  # No candles before the symbol was listed
+        self.calls = []
+
+    def parse_timeframe(self, timeframe):
+        return ccxt.Exchange.parse_timeframe(timeframe)
+
+    def milliseconds(self):
+        return self.now
+
+    def fetch_ohlcv(self, symbol, timeframe, since=None, limit=None):
+        self.calls.append((timeframe, since, limit))
+        timeframe_ms = self.parse_timeframe(timeframe) * 1000
+        current = self.now // timeframe_ms * timeframe_ms
+        start = current - (limit - 1) * timeframe_ms if since is None else -(-since // timeframe_ms) * timeframe_ms
+        start = max(start, -(-self.listed_ms // timeframe_ms) * timeframe_ms)
+        candles = []
+        for ts in range(start, current + 1, timeframe_ms)[:limit]:
+            # The forming candle's close moves with the clock
+            close = 100 + (ts // timeframe_ms) % 17 + (self.now - ts) / 1e9 * (ts == current)
+            candles.append([ts, close - 0.5, close + 1, close - 1, close, 10.0])
+        return candles
+
+
+def make_service(**kwargs):
+    service = PriceService(backend="thread", cache_ttl=0, **kwargs)
+    service.exchange = FakeExchange()
+    return service
+
+
+def fetch(service, timeframe, limit=200):
+    return asyncio.run(service.get_ohlcv_df("BTC/USDT", timeframe, limit=limit))
+
+
+@pytest.mark.parametrize("timeframe, depth", [("15m", 1000), ("1h", 1000), ("1d", 200)])
+def test_first_fetch_goes_deep_only_for_resample_sources(timeframe, depth):
+    service = make_service(resample_targets=("4h", "1d"))
+    fetch(service, timeframe)
+    assert service.exchange.calls == [(timeframe, None, depth)]
+
+
+def test_first_fetch_without_resample_targets_fetches_limit():
+    service = make_service()
+    fetch(service, "15m", limit=201)
+    assert service.exchange.calls == [("15m", None, 201)]
+
+
+def test_incremental_sync_matches_full_fetch():
+    service = make_service()
+    fetch(service, "15m")
+    for minutes in (7, 8, 15, 44, 180):
+        service.exchange.now += minutes * 60_000
+        df = fetch(service, "15m")
+        # Only the newest stored candle onwards is requested
+        assert service.exchange.calls[-1][1] is not None
+
+        fresh = make_service()
+        fresh.exchange.now = service.exchange.now
+        pd.testing.assert_frame_equal(df, fetch(fresh, "15m"))
+
+
+def test_gap_wider_than_window_refetches():
+    service = make_service()
+    fetch(service, "15m")
+    service.exchange.now += 300 * 15 * 60_000
+    df = fetch(service, "15m")
+    assert service.exchange.calls[-1] == ("15m", None, 200)
+    assert len(df) == 200
+
+
+def test_deeper_request_refetches_once():
+    service = make_service()
+    fetch(service, "1d", limit=200)  # e.g. the MTF fallback
+    for _ in range(3):
+        service.exchange.now += 3600_000
+        assert len(fetch(service, "1d", limit=201)) == 201  # the signal path
+        fetch(service, "1d", limit=200)
+    full_fetches = [call for call in service.exchange.calls if call[1] is None]
+    assert full_fetches == [("1d", None, 200), ("1d", None, 201)]
+
+
+def test_short_exchange_history_is_not_refetched():
+    service = make_service()
+    service.exchange.listed_ms = NOW_MS - 150 * 86400_000
+    assert len(fetch(service, "1d", limit=201)) == 150
+    for _ in range(3):
+        service.exchange.now += 86400_000
+        fetch(service, "1d", limit=201)
+    assert [call[1] is None for call in service.exchange.calls] == [True, False, False, False]
+    assert len(fetch(service, "1d", limit=201)) == 153
+
+
+class StubSession:
+    def __init__(self, connector):
+        self.connector = connector
+        self.closed = False
+
+    async def close(self):
+        self.closed = True
+
+
+class StubAsyncExchange:
+    """ccxt.async_support stand-in serving FakeExchange candles"""
+
+    created = []
+
+    def __init__(self, config):
+        self.config = config
+        self.closed = False
+        self.sync = FakeExchange()
+        StubAsyncExchange.created.append(self)
+
+    async def fetch_ohlcv(self, symbol, timeframe, since=None, limit=None):
+        return self.sync.fetch_ohlcv(symbol, timeframe, since=since, limit=limit)
+
+    async def close(self):
+        self.closed = True
+
+
+def test_async_backend_lifecycle(monkeypatch):
+    StubAsyncExchange.created = []
+    monkeypatch.setattr(price_service_module, "aiohttp", SimpleNamespace(
+        TCPConnector=lambda **kwargs: kwargs, ClientSession=StubSession
+    ))
+    monkeypatch.setattr(price_service_module, "ccxt_async", SimpleNamespace(binance=StubAsyncExchange))
+
+    async def scenario():
+        service = PriceService(backend="async", cache_ttl=0, pool_size=7)
+        service.exchange = FakeExchange()
+        await service.start()
+        await service.start()
+        assert len(StubAsyncExchange.created) == 1
+        client = service.async_exchange
+        session = client.config["session"]
+        assert session.connector["limit"] == 7
+
+        assert len(await service.get_ohlcv_df("BTC/USDT", "15m")) == 200
+        assert client.sync.calls == [("15m", None, 200)]
+
+        await service.close()
+        assert client.closed and session.closed
+        assert service.async_exchange is None and service._session is None
+        await service.close()  # Closing twice is harmless
+
+        # The next request reopens the client
+        service.exchange.now += 15 * 60_000
+        await service.get_ohlcv_df("BTC/USDT", "15m")
+        assert len(StubAsyncExchange.created) == 2
+        await service.close()
+
+    asyncio.run(scenario())
+
+
+def resample(service, max_age=60.0):
+    return asyncio.run(service.get_resampled_ohlcv_df("BTC/USDT", "4h", limit=200, max_age=max_age))
+
+
+def test_resample_reuses_recent_store(monkeypatch):
+    service = make_service(resample_targets=("4h",))
+    fetch(service, "1h")
+    assert len(resample(service)) == 200
+    assert service.exchange.calls == [("1h", None, 1000)]
+
+    # Past max_age the held 1h candles may be missing the latest ones
+    later = time.monotonic() + 61
+    monkeypatch.setattr(price_service_module, "time", SimpleNamespace(monotonic=lambda: later))
+    assert len(resample(service)) == 200
+    assert service.exchange.calls[-1] == ("4h", None, 200)
+    calls = len(service.exchange.calls)
+    resample(service, max_age=120)
+    assert len(service.exchange.calls) == calls
+
+
+def test_resample_needs_enough_source_history():
+    service = make_service()
+    fetch(service, "1h")  # 200 1h candles only build 50 4h ones
+    resample(service)
+    assert service.exchange.calls[-1] == ("4h", None, 200)
@@ -0,0 +1,101 @@
+import asyncio
+
+import pytest
+
+from services.request_coalescer import RequestCoalescer
+
+
+class CountingFactory:
+    """Coroutine function that waits for a release event and counts its calls"""
+
+    def __init__(self, result="result", error=None):
+        self.calls = 0
+        self.release = asyncio.Event()
+        self.result = result
+        self.error = error
+
+    async def __call__(self):
+        self.calls += 1
+        await self.release.wait()
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+def test_concurrent_callers_share_one_request():
+    async def scenario():
+        coalescer = RequestCoalescer(ttl=0)
+        factory = CountingFactory()
+        waiters = [asyncio.create_task(coalescer.run("key", factory)) for _ in range(10)]
+        await asyncio.sleep(0)
+        factory.release.set()
+        assert await asyncio.gather(*waiters) == ["result"] * 10
+        assert factory.calls == 1
+
+        # Nothing is reused with ttl 0 once the request is done
+        await coalescer.run("key", factory)
+        assert factory.calls == 2
+
+    asyncio.run(scenario())
+
+
+def test_results_are_reused_within_ttl_per_key():
+    async def scenario():
+        coalescer = RequestCoalescer(ttl=60)
+        factory = CountingFactory()
+        factory.release.set()
+        await coalescer.run("a", factory)
+        await coalescer.run("a", factory)
+        assert factory.calls == 1
+        await coalescer.run("b", factory)
+        await coalescer.run("a", factory, ttl=0)
+        assert factory.calls == 3
+
+        coalescer.invalidate("a")
+        await coalescer.run("a", factory)
+        assert factory.calls == 4
+
+    asyncio.run(scenario())
+
+
+def test_errors_reach_every_waiter_and_are_not_cached():
+    async def scenario():
+        coalescer = RequestCoalescer(ttl=60)
+        factory = CountingFactory(error=RuntimeError("exchange down"))
+        waiters = [asyncio.create_task(coalescer.run("key", factory)) for _ in range(3)]
+        await asyncio.sleep(0)
+        factory.release.set()
+        results = await asyncio.gather(*waiters, return_exceptions=True)
+        assert all(isinstance(result, RuntimeError) for result in results)
+        assert factory.calls == 1
+
+        factory.error = None
+        assert await coalescer.run("key", factory) == "result"
+        assert factory.calls == 2
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_waiter_does_not_cancel_shared_request():
+    async def scenario():
+        coalescer = RequestCoalescer(ttl=0)
+        factory = CountingFactory()
+        first = asyncio.create_task(coalescer.run("key", factory))
+        second = asyncio.create_task(coalescer.run("key", factory))
+        await asyncio.sleep(0)
+        first.cancel()
+        await asyncio.sleep(0)
+        factory.release.set()
+        assert await second == "result"
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        assert factory.calls == 1
+
+    asyncio.run(scenario())
+
+
+def test_eviction_keeps_newest_entries():
+    coalescer = RequestCoalescer(ttl=60, max_entries=3)
+    for key in range(5):
+        coalescer.prime(key, key)
+    assert sorted(coalescer._results) == [2, 3, 4]
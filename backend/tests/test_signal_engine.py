@@ -0,0 +1,170 @@
+import asyncio
+
+from services.signal_engine import SignalEngine, SignalStream
+
+LEVELS = [{'price': 100.0, 'confluence': 3}]
+
+
+class FakeSignal:
+    def __init__(self, setup_state, price):
+        self.setup_state = setup_state
+        self.price = price
+
+    def model_dump(self):
+        return {'setup_state': self.setup_state, 'current_price': self.price}
+
+
+class FakeSignalService:
+    """Counts generate_signal calls; every signal has the same setup state and price"""
+
+    def __init__(self, setup_state='PENDING', price=110.0):
+        self.setup_state = setup_state
+        self.price = price
+        self.calls = 0
+
+    async def generate_signal(self, symbol, timeframe):
+        self.calls += 1
+        return FakeSignal(self.setup_state, self.price)
+
+    def watch_levels(self, symbol, timeframe):
+        return LEVELS
+
+
+def pending_message(price=110.0):
+    return {'type': 'signal_update', 'data': {'setup_state': 'PENDING', 'current_price': price}}
+
+
+def test_stale_stream_cleanup_keeps_new_watch():
+    async def scenario():
+        engine = SignalEngine(FakeSignalService(), lambda key, message: None, watch_interval=3600)
+        old, new = SignalStream('BTC/USDT', '15m'), SignalStream('BTC/USDT', '15m')
+        old_wait = asyncio.create_task(engine._wait_for_next(old, pending_message()))
+        await asyncio.sleep(0)
+        # A re-subscribed stream registers before the old task's cleanup runs
+        new_wait = asyncio.create_task(engine._wait_for_next(new, pending_message()))
+        await asyncio.sleep(0)
+        old_wait.cancel()
+        await asyncio.gather(old_wait, return_exceptions=True)
+        assert ('BTC/USDT', '15m') in engine.watch
+
+        new_wait.cancel()
+        await asyncio.gather(new_wait, return_exceptions=True)
+        assert ('BTC/USDT', '15m') not in engine.watch
+        await engine.stop()
+
+    asyncio.run(scenario())
+
+
+class FakePriceService:
+    def __init__(self, price):
+        self.price = price
+        self.polls = 0
+
+    async def get_current_prices(self, symbols):
+        self.polls += 1
+        return {symbol: {'price': self.price} for symbol in symbols}
+
+
+async def wait_until(condition, timeout=2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "timed out"
+        await asyncio.sleep(0.005)
+
+
+def test_pending_stream_wakes_only_on_band_entry():
+    async def scenario():
+        service = FakeSignalService(price=110.0)
+        service.price_service = FakePriceService(105.0)
+        engine = SignalEngine(service, lambda key, message: None, interval=3600, watch_interval=0.01, watch_max_age=60)
+        engine.subscribe('BTC/USDT', '1d')
+        await wait_until(lambda: ('BTC/USDT', '1d') in engine.watch)
+
+        # Outside the band, then across it: no recompute
+        polls = service.price_service.polls
+        await wait_until(lambda: service.price_service.polls >= polls + 3)
+        service.price_service.price = 90.0
+        await wait_until(lambda: service.price_service.polls >= polls + 6)
+        assert service.calls == 1
+
+        # Back up into the band: one recompute, then the stream waits again
+        service.price = service.price_service.price = 100.1
+        await wait_until(lambda: service.calls == 2)
+        await wait_until(lambda: ('BTC/USDT', '1d') in engine.watch)
+        polls = service.price_service.polls
+        await wait_until(lambda: service.price_service.polls >= polls + 3)
+        assert service.calls == 2
+        await engine.stop()
+
+    asyncio.run(scenario())
+
+
+def test_streams_without_a_pending_setup_run_on_the_interval():
+    async def scenario():
+        service = FakeSignalService(setup_state='ACTIVE')
+        service.price_service = FakePriceService(100.0)
+        engine = SignalEngine(service, lambda key, message: None, interval=0.02, watch_interval=0.01)
+        engine.subscribe('BTC/USDT', '15m')
+        await wait_until(lambda: service.calls >= 3)
+        assert len(engine.watch) == 0 and engine._watch_task is None
+        await engine.stop()
+
+    asyncio.run(scenario())
+
+
+def test_watch_disabled_pending_stream_runs_on_the_interval():
+    async def scenario():
+        service = FakeSignalService()
+        engine = SignalEngine(service, lambda key, message: None, interval=0.02, watch_interval=0)
+        engine.subscribe('BTC/USDT', '15m')
+        await wait_until(lambda: service.calls >= 3)
+        assert len(engine.watch) == 0
+        await engine.stop()
+
+    asyncio.run(scenario())
+
+
+def test_subscribers_share_one_stream_until_the_last_leaves():
+    async def scenario():
+        published = []
+        service = FakeSignalService(setup_state='ACTIVE')
+        engine = SignalEngine(service, lambda key, message: published.append(key), interval=3600)
+        engine.subscribe('BTC/USDT', '15m')
+        engine.subscribe('BTC/USDT', '15m')
+        stream = engine._streams[('BTC/USDT', '15m')]
+        assert engine.stream_counts() == {'BTC/USDT@15m': 2}
+        await wait_until(lambda: published)
+        assert service.calls == 1
+
+        # A late joiner reads the last published message
+        engine.subscribe('BTC/USDT', '15m')
+        assert engine.latest('BTC/USDT', '15m')['data']['setup_state'] == 'ACTIVE'
+
+        engine.unsubscribe('BTC/USDT', '15m')
+        engine.unsubscribe('BTC/USDT', '15m')
+        assert not stream.task.done()
+        engine.unsubscribe('BTC/USDT', '15m')
+        await asyncio.gather(stream.task, return_exceptions=True)
+        assert stream.task.cancelled()
+        assert engine.stream_counts() == {} and engine.latest('BTC/USDT', '15m') is None
+        engine.unsubscribe('BTC/USDT', '15m')  # Unknown stream: no-op
+
+    asyncio.run(scenario())
+
+
+def test_stop_awaits_stream_and_watch_tasks():
+    async def scenario():
+        service = FakeSignalService()
+        service.price_service = FakePriceService(105.0)
+        engine = SignalEngine(service, lambda key, message: None, watch_interval=0.01, watch_max_age=60)
+        engine.subscribe('BTC/USDT', '1d')
+        engine.subscribe('ETH/USDT', '1d')
+        await wait_until(lambda: len(engine.watch) == 2)
+        tasks = [stream.task for stream in engine._streams.values()] + [engine._watch_task]
+
+        await engine.stop()
+        assert all(task.done() for task in tasks)
+        assert engine.stream_counts() == {} and engine._watch_task is None
+        assert len(engine.watch) == 0
+
+    asyncio.run(scenario())
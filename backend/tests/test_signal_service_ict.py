@@ -0,0 +1,104 @@
+"""
+ICTSignalService data flow: what gets fetched, and where stream syncs run
+"""
+import asyncio
+import threading
+from services.analysis_executor import AnalysisExecutor
+from services.signal_service_ict import ICTSignalService
+from conftest import make_candles
+
+
+class RecordingPriceService:
+    """Serves synthetic candles and records every OHLCV request"""
+
+    def __init__(self):
+        self.requests = []
+
+    async def get_resampled_ohlcv_df(self, symbol, timeframe, limit=100):
+        self.requests.append((symbol, timeframe, limit))
+        return make_candles(n=limit, seed=len(self.requests))
+
+
+def test_mtf_reuses_base_frame():
+    prices = RecordingPriceService()
+    service = ICTSignalService(prices, executor=AnalysisExecutor('inline'))
+    base_df = make_candles(n=201)
+
+    result = asyncio.run(service._get_mtf_confirmation(
+        'BTC/USDT', '1h', 'LONG', 60.0, 'MODERATE', 'BULLISH', base_df
+    ))
+
+    assert result is not None and '1h' in result['timeframes_analyzed']
+    assert [timeframe for _, timeframe, _ in prices.requests] == ['4h', '1d']
+
+
+class StalledPriceService(RecordingPriceService):
+    """Never answers for the `stalled` timeframes; records which of those were cancelled"""
+
+    def __init__(self, *stalled):
+        super().__init__()
+        self.stalled = stalled
+        self.cancelled = []
+
+    async def get_resampled_ohlcv_df(self, symbol, timeframe, limit=100):
+        if timeframe in self.stalled:
+            try:
+                await asyncio.Event().wait()
+            except asyncio.CancelledError:
+                self.cancelled.append(timeframe)
+                raise
+        return await super().get_resampled_ohlcv_df(symbol, timeframe, limit)
+
+
+def test_mtf_scores_timeframes_that_meet_the_deadline():
+    prices = StalledPriceService('1d')
+    service = ICTSignalService(prices, mtf_deadline=0.5, executor=AnalysisExecutor('inline'))
+
+    async def confirm():
+        result = await service._get_mtf_confirmation(
+            'BTC/USDT', '1h', 'LONG', 60.0, 'MODERATE', 'BULLISH', make_candles(n=201)
+        )
+        await asyncio.sleep(0)  # Late timeframes are cancelled, not left running
+        return result, sorted(prices.cancelled)
+
+    result, cancelled = asyncio.run(confirm())
+    assert result['timeframes_analyzed'] == ['1h', '4h']
+    assert set(result['signals_by_timeframe']) == {'1h', '4h'}
+    assert cancelled == ['1d']
+
+
+def test_mtf_needs_two_timeframes_in_time():
+    prices = StalledPriceService('4h', '1d')
+    service = ICTSignalService(prices, mtf_deadline=0.5, executor=AnalysisExecutor('inline'))
+
+    async def confirm():
+        result = await service._get_mtf_confirmation(
+            'BTC/USDT', '1h', 'LONG', 60.0, 'MODERATE', 'BULLISH', make_candles(n=201)
+        )
+        await asyncio.sleep(0)  # Late timeframes are cancelled, not left running
+        return result, sorted(prices.cancelled)
+
+    result, cancelled = asyncio.run(confirm())
+    assert result is None
+    assert cancelled == ['1d', '4h']
+
+
+def test_stream_sync_runs_off_the_event_loop():
+    service = ICTSignalService(RecordingPriceService(), executor=AnalysisExecutor('thread'))
+    sync_threads = []
+    original = service._sync_streams
+
+    def recording_sync(*args):
+        sync_threads.append(threading.get_ident())
+        return original(*args)
+
+    service._sync_streams = recording_sync
+
+    async def analyse():
+        loop_thread = threading.get_ident()
+        analysis = await service._get_candle_analysis('BTC/USDT', '15m', make_candles(n=201))
+        return loop_thread, analysis
+
+    loop_thread, analysis = asyncio.run(analyse())
+    assert sync_threads and sync_threads[0] != loop_thread
+    assert analysis['smc'][0] in ('LONG', 'SHORT', 'HOLD')
@@ -0,0 +1,149 @@
+"""
+Vectorized SMC detectors against straightforward per-candle loops
+"""
+import numpy as np
+import pytest
+
+from conftest import make_candles
+from services.smc_strategy import SMCStrategy
+
+# (seed, start price, tick): a coarse tick gives dojis and equal highs/lows
+FRAMES = [(0, 100.0, 0.01), (1, 100.0, 0.01), (2, 1000.0, 0.5), (3, 100.0, 0.1), (4, 2000.0, 1.0)]
+
+
+def reference_order_blocks(df):
+    """The original loop: last opposite candle before a move over twice its body"""
+    bullish, bearish = [], []
+    for i in range(3, len(df) - 1):
+        curr, nxt = df.iloc[i], df.iloc[i + 1]
+        if curr['close'] < curr['open'] and nxt['close'] > nxt['open']:
+            move, body = nxt['close'] - nxt['open'], curr['open'] - curr['close']
+            if move > body * 2:
+                bearish.append({'index': i, 'high': curr['high'], 'low': curr['low'],
+                                'open': curr['open'], 'close': curr['close'], 'strength': min(move / body, 10)})
+        if curr['close'] > curr['open'] and nxt['close'] < nxt['open']:
+            move, body = nxt['open'] - nxt['close'], curr['close'] - curr['open']
+            if move > body * 2:
+                bullish.append({'index': i, 'high': curr['high'], 'low': curr['low'],
+                                'open': curr['open'], 'close': curr['close'], 'strength': min(move / body, 10)})
+    newest = lambda blocks: sorted(blocks, key=lambda b: (b['index'], b['strength']), reverse=True)[:3]
+    return {'bullish_ob': newest(bullish), 'bearish_ob': newest(bearish)}
+
+
+@pytest.mark.parametrize('seed, start, tick', FRAMES)
+def test_order_blocks_match_loop(seed, start, tick):
+    df = make_candles(300, seed=seed, start=start, tick=tick)
+    for end in range(10, len(df), 11):
+        window = df.iloc[:end]
+        found = SMCStrategy.detect_order_blocks(window, {})
+        expected = reference_order_blocks(window)
+        assert {side: zones.to_list() for side, zones in found.items()} == expected
+
+
+def test_order_blocks_need_ten_candles():
+    found = SMCStrategy.detect_order_blocks(make_candles(9), {})
+    assert not len(found['bullish_ob']) and not len(found['bearish_ob'])
+
+
+def reference_fair_value_gaps(df):
+    """Per-gap loop: gaps between candles i - 1 and i + 1, filled by price from i + 2 on"""
+    bullish, bearish = [], []
+    for i in range(1, len(df) - 1):
+        prev, nxt = df.iloc[i - 1], df.iloc[i + 1]
+        later = df.iloc[i + 2:]
+        if prev['high'] < nxt['low']:
+            top, bottom = nxt['low'], prev['high']
+            lowest = later['low'].min() if len(later) else float('inf')
+            if lowest > bottom:
+                bullish.append({'index': i, 'top': top, 'bottom': bottom, 'size': top - bottom,
+                                'fill_pct': min(max((top - lowest) / (top - bottom), 0), 1)})
+        if prev['low'] > nxt['high']:
+            top, bottom = prev['low'], nxt['high']
+            highest = later['high'].max() if len(later) else float('-inf')
+            if highest < top:
+                bearish.append({'index': i, 'top': top, 'bottom': bottom, 'size': top - bottom,
+                                'fill_pct': min(max((highest - bottom) / (top - bottom), 0), 1)})
+    return {'bullish_fvg': bullish[-5:], 'bearish_fvg': bearish[-5:]}
+
+
+@pytest.mark.parametrize('seed, start, tick', FRAMES)
+def test_fair_value_gaps_match_loop(seed, start, tick):
+    df = make_candles(300, seed=seed, start=start, tick=tick)
+    for end in range(3, len(df), 11):
+        window = df.iloc[:end]
+        found = SMCStrategy.detect_fair_value_gaps(window)
+        expected = reference_fair_value_gaps(window)
+        assert {side: zones.to_list() for side, zones in found.items()} == expected
+
+
+def reference_market_structure(df):
+    """The original loop: trend from the last two swings in the last 20 candles"""
+    if len(df) < 20:
+        return {"trend": "RANGING", "structure": "UNCLEAR"}
+    highs, lows = df['high'].tail(20).values, df['low'].tail(20).values
+    swing_highs, swing_lows = [], []
+    for i in range(2, len(highs) - 2):
+        if highs[i] > max(highs[i - 2], highs[i - 1], highs[i + 1], highs[i + 2]):
+            swing_highs.append(highs[i])
+        if lows[i] < min(lows[i - 2], lows[i - 1], lows[i + 1], lows[i + 2]):
+            swing_lows.append(lows[i])
+    if len(swing_highs) < 2 or len(swing_lows) < 2:
+        return {"trend": "RANGING", "structure": "INSUFFICIENT_DATA"}
+
+    (prev_high, last_high), (prev_low, last_low) = swing_highs[-2:], swing_lows[-2:]
+    if last_high > prev_high and last_low > prev_low:
+        trend, structure = "BULLISH", "HH_HL"
+    elif last_high < prev_high and last_low < prev_low:
+        trend, structure = "BEARISH", "LH_LL"
+    else:
+        trend, structure = "RANGING", "MIXED"
+    return {"trend": trend, "structure": structure, "last_high": last_high, "last_low": last_low}
+
+
+@pytest.mark.parametrize('seed, start, tick', FRAMES)
+def test_market_structure_and_ranges_match_loop(seed, start, tick):
+    df = make_candles(300, seed=seed, start=start, tick=tick)
+    for end in range(15, len(df), 3):
+        window = df.iloc[:end]
+        assert SMCStrategy.detect_market_structure(window) == reference_market_structure(window)
+        if end >= 20:
+            zones = SMCStrategy.calculate_premium_discount_zones(window)
+            assert (zones['swing_high'], zones['swing_low']) == (window['high'].tail(50).max(), window['low'].tail(50).min())
+
+
+def reference_liquidity_pools(values, offset):
+    """Every 5-candle run within 0.2%, merged into anchored 0.1% clusters, ranked by loop"""
+    runs = []
+    for i in range(len(values) - 4):
+        run = values[i:i + 5]
+        if np.std(run) < np.mean(run) * 0.002:
+            runs.append((np.mean(run), i + 4 + offset))
+
+    clusters = []
+    for level, last in sorted(runs, key=lambda run: run[0]):
+        if clusters and level <= clusters[-1][0][0] * 1.001:
+            clusters[-1].append((level, last))
+        else:
+            clusters.append([(level, last)])
+
+    pools = [{'price': round(sum(level for level, _ in cluster) / len(cluster), 2),
+              'touches': len(cluster), 'last_index': max(last for _, last in cluster)} for cluster in clusters]
+    return sorted(pools, key=lambda pool: (-pool['touches'], -pool['last_index']))
+
+
+@pytest.mark.parametrize('seed, start, tick', FRAMES)
+def test_liquidity_pools_match_loop(seed, start, tick):
+    df = make_candles(300, seed=seed, start=start, tick=tick)
+    for end in range(20, len(df), 7):
+        window = df.iloc[:end]
+        found = SMCStrategy.detect_liquidity_zones(window)
+        recent = window.tail(50)
+        offset = len(window) - len(recent)
+        for side, column in (('buy_side', 'high'), ('sell_side', 'low')):
+            expected = reference_liquidity_pools(recent[column].to_numpy(), offset)[:3]
+            pools = found[f'{side}_pools'].to_list()
+            assert [(p['touches'], p['last_index']) for p in pools] == [(p['touches'], p['last_index']) for p in expected]
+            # Tick-grid means sit on cent halfway cases, so summation order can flip the rounding
+            assert [p['price'] for p in pools] == pytest.approx([p['price'] for p in expected], abs=0.01 + 1e-9)
+        assert found['buy_side_liquidity'] == sorted(found['buy_side_pools']['price'].tolist(), reverse=True)
+        assert found['sell_side_liquidity'] == sorted(found['sell_side_pools']['price'].tolist())
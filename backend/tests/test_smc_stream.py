@@ -0,0 +1,50 @@
+"""
+StreamingSMCEngine / SMCState must reproduce SMCStrategy.generate_smc_signal
+"""
+from datetime import datetime
+import numpy as np
+import pytest
+import pytz
+from services.smc_strategy import SMCStrategy
+from services.smc_stream import StreamingSMCEngine
+from services.zones import ZoneSet
+from conftest import make_candles
+
+
+def plain(value):
+    """JSON-like form: ZoneSets as dicts, NumPy scalars as Python ones"""
+    if isinstance(value, ZoneSet):
+        return plain(value.to_list())
+    if isinstance(value, dict):
+        return {key: plain(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [plain(item) for item in value]
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+@pytest.mark.parametrize('seed,tick,window', [
+    (0, 0.01, 200), (1, 0.01, 200), (2, 0.5, 200), (3, 0.01, 60), (4, 0.1, 20),
+])
+def test_sliding_windows_match_batch(seed, tick, window):
+    df = make_candles(n=700, seed=seed, tick=tick)
+    engine = StreamingSMCEngine()
+    mismatches = []
+    for end in range(1, len(df) + 1):
+        closed = df.iloc[max(0, end - window):end]
+        now = datetime(2026, 1, 5, end % 24, tzinfo=pytz.UTC)
+        streamed = plain(engine.sync('BTC/USDT', '15m', closed, now))
+        batch = plain(SMCStrategy.generate_smc_signal(closed, now))
+        if streamed != batch:
+            mismatches.append(end)
+    assert mismatches == []
+
+
+def test_reseeds_on_gap_and_window_change():
+    df = make_candles(n=400, seed=5)
+    engine = StreamingSMCEngine()
+    now = datetime(2026, 1, 5, 9, tzinfo=pytz.UTC)
+    for closed in (df.iloc[:200], df.iloc[300:400], df.iloc[250:400], df.iloc[260:400]):
+        assert plain(engine.sync('ETH/USDT', '1h', closed, now)) == \
+            plain(SMCStrategy.generate_smc_signal(closed, now))
@@ -0,0 +1,50 @@
+import math
+
+import pytest
+
+from conftest import make_candles
+from services.indicators import TechnicalIndicators
+from services.streaming_indicators import StreamingIndicatorEngine
+
+
+def assert_close(expected, actual, rel=1e-9):
+    assert set(expected) == set(actual), set(expected) ^ set(actual)
+    for key, value in expected.items():
+        if math.isnan(value):
+            assert actual[key] is None or math.isnan(actual[key]), key
+        else:
+            assert abs(actual[key] - value) <= rel * max(1.0, abs(value)), (key, value, actual[key])
+
+
+@pytest.mark.parametrize('seed', [0, 1, 2])
+def test_sync_and_peek_match_batch_over_same_history(seed):
+    df = make_candles(600, seed=seed)
+    engine = StreamingIndicatorEngine()
+    for end in (60, 61, 120, 199, 200, 201, 350, 599):
+        closed = df.iloc[:end]
+        assert_close(TechnicalIndicators.calculate_all(closed, backend='ta'), engine.sync('X', '15m', closed))
+
+        forming = df.iloc[end][['open', 'high', 'low', 'close', 'volume']].to_numpy()
+        assert_close(
+            TechnicalIndicators.calculate_all(df.iloc[:end + 1], backend='ta'),
+            engine.peek('X', '15m', forming)
+        )
+
+
+def test_sync_reseeds_after_gap():
+    df = make_candles(400)
+    engine = StreamingIndicatorEngine()
+    engine.sync('X', '15m', df.iloc[:100])
+    # The stream's last candle is older than the new window's first one
+    window = df.iloc[200:400]
+    assert_close(TechnicalIndicators.calculate_all(window, backend='ta'), engine.sync('X', '15m', window))
+
+
+def test_streams_are_independent():
+    first, second = make_candles(200, seed=0), make_candles(200, seed=1)
+    engine = StreamingIndicatorEngine()
+    engine.sync('A', '15m', first)
+    engine.sync('B', '15m', second)
+    assert_close(TechnicalIndicators.calculate_all(first, backend='ta'), engine.sync('A', '15m', first))
+    engine.reset('A', '15m')
+    assert engine.peek('A', '15m', first.iloc[-1].to_numpy()) == {}
@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import make_candles
+from services.swing_index import SwingIndex
+
+
+def positions(index):
+    return index.swing_highs()[0].tolist(), index.swing_lows()[0].tolist()
+
+
+def test_for_frame_reuses_index_of_unchanged_frame():
+    df = make_candles(200)
+    assert SwingIndex.for_frame(df) is SwingIndex.for_frame(df)
+
+
+def test_for_frame_rebuilds_after_forming_candle_update():
+    df = make_candles(200)
+    SwingIndex.for_frame(df)
+    # Turn candle -3 into a swing high confirmed by the updated forming candle
+    df.iloc[-3, df.columns.get_loc('high')] = df['high'].max() + 1
+    df.iloc[-1, df.columns.get_loc('high')] = df['high'].iloc[-2] - 0.5
+    df.iloc[-1, df.columns.get_loc('low')] = df['low'].min() - 1
+    assert positions(SwingIndex.for_frame(df)) == positions(SwingIndex(df.copy()))
+
+
+def test_for_frame_rebuilds_after_append_in_place():
+    df = make_candles(200)
+    SwingIndex.for_frame(df)
+    last = df.iloc[-1]
+    df.loc[df.index[-1] + pd.Timedelta('15min')] = [last['close'], last['high'] + 5, last['low'], last['close'], 1.0]
+    index = SwingIndex.for_frame(df)
+    assert index.length == len(df)
+    assert positions(index) == positions(SwingIndex(df.copy()))
+    assert np.array_equal(index.high, df['high'].to_numpy())
+
+
+def reference_swings(values, high=True):
+    """Positions of strict 2-candle-each-side pivots in `values`, by loop"""
+    sign = 1 if high else -1
+    return [i for i in range(2, len(values) - 2)
+            if all(sign * values[i] > sign * values[i + k] for k in (-2, -1, 1, 2))]
+
+
+@pytest.mark.parametrize('seed, start, tick', [(0, 100.0, 0.01), (1, 1000.0, 0.5), (2, 2000.0, 1.0)])
+def test_window_queries_match_scanning_the_tail(seed, start, tick):
+    df = make_candles(300, seed=seed, start=start, tick=tick)
+    index = SwingIndex(df)
+    for window in (5, 20, 50, 299, 300, 400, None):
+        tail = df if window is None else df.tail(window)
+        offset = len(df) - len(tail)
+        for values, query, high in ((tail['high'].to_numpy(), index.swing_highs, True),
+                                    (tail['low'].to_numpy(), index.swing_lows, False)):
+            positions, prices = query(window)
+            expected = reference_swings(values, high)
+            assert (positions - offset).tolist() == expected
+            assert prices.tolist() == values[expected].tolist()
+
+        high_pos, high_value, low_pos, low_value = index.range_extremes(window)
+        assert (high_value, low_value) == (tail['high'].max(), tail['low'].min())
+        assert df['high'].iloc[high_pos] == high_value and df['low'].iloc[low_pos] == low_value
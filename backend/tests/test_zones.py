@@ -0,0 +1,46 @@
+import pickle
+
+import numpy as np
+
+from services.zones import KEY_LEVEL, LIQUIDITY_POOL, ORDER_BLOCK, ZoneSet, key_level
+
+
+def test_to_list_drops_nan_and_empty_fields():
+    levels = ZoneSet.from_rows(KEY_LEVEL, [
+        key_level('OB', 100.5, 3, high=101.0, low=100.0, description='Bullish OB'),
+        key_level('FVG', 99.0, 1),
+    ])
+    assert levels.to_list() == [
+        {'type': 'OB', 'price': 100.5, 'high': 101.0, 'low': 100.0, 'confluence': 3, 'description': 'Bullish OB'},
+        {'type': 'FVG', 'price': 99.0, 'confluence': 1},
+    ]
+    # Python scalars, ready for JSON
+    assert all(type(value) in (str, float, int) for level in levels.to_list() for value in level.values())
+
+
+def test_from_dicts_round_trips_the_dict_shape():
+    dicts = [
+        {'type': 'LIMIT', 'price': 100.0, 'confluence': 2},
+        {'type': 'OB', 'price': 101.0, 'high': 101.5, 'low': 100.5, 'confluence': 4, 'description': 'x'},
+    ]
+    assert ZoneSet.from_dicts(KEY_LEVEL, dicts).to_list() == dicts
+
+    blocks = [{'index': 7, 'high': 2.0, 'low': 1.0, 'open': 1.8, 'close': 1.2, 'strength': 3.5}]
+    assert ZoneSet.from_dicts(ORDER_BLOCK, blocks).to_list() == blocks
+
+
+def test_indexing_filters_and_concat():
+    pools = ZoneSet.from_rows(LIQUIDITY_POOL, [(100.0, 3, 10), (101.0, 1, 12), (99.0, 2, 14)])
+    assert pools['price'].tolist() == [100.0, 101.0, 99.0]
+    assert pools[0]['touches'] == 3
+    assert isinstance(pools[pools['touches'] > 1], ZoneSet)
+    assert pools[pools['touches'] > 1].to_list() == [pools.to_list()[0], pools.to_list()[2]]
+    assert pools[1:].to_list() == pools.to_list()[1:]
+    assert ZoneSet.concat([pools[:1], pools[2:]]) == pools[np.array([0, 2])]
+    assert len(ZoneSet.empty(LIQUIDITY_POOL)) == 0 and ZoneSet.empty(LIQUIDITY_POOL).to_list() == []
+
+
+def test_pickles_with_its_dtype():
+    pools = ZoneSet.from_rows(LIQUIDITY_POOL, [(100.0, 3, 10)])
+    restored = pickle.loads(pickle.dumps(pools))
+    assert restored == pools and restored.dtype == LIQUIDITY_POOL